@@ -1,14 +1,14 @@
 import streamlit as st
 from datetime import datetime
 from utils import (
-    ProjectManager,
+    get_project_manager,
     DEFAULT_PAVIMENTO, ETAPAS_OBRA, DEFAULT_CUSTOS_INDIRETOS, DEFAULT_CUSTOS_INDIRETOS_FIXOS
 )
 
 st.set_page_config(page_title="Estudo de Viabilidade", layout="wide")
 
-# Inicializa o gerenciador de projetos. A chamada init_storage() é feita internamente.
-project_manager = ProjectManager("projects.json")
+# Gerenciador de projetos compartilhado entre as sessões. A chamada init_storage() é feita internamente.
+project_manager = get_project_manager()
 
 # Injeta CSS para esconder o menu automático
 st.markdown("""
@@ -60,7 +60,15 @@ def page_project_selection():
     
     st.subheader("📂 Projetos Existentes")
     
-    projetos = project_manager.list_projects()
+    # Registros que a migração de esquema atualizou com dados inválidos ou não conseguiu atualizar
+    resumo_migracao = project_manager.migration_summary or {}
+    for chave, titulo in (("invalidos", "projeto(s) migrados com dados inválidos"), ("pendentes", "projeto(s) não puderam ser migrados")):
+        if resumo_migracao.get(chave):
+            with st.expander(f"⚠️ {len(resumo_migracao[chave])} {titulo}"):
+                for invalido in resumo_migracao[chave]:
+                    st.markdown(f"**{invalido['id']} – {invalido['nome']}**: " + "; ".join(invalido["erros"]))
+
+    projetos = project_manager.list_project_summaries()
     if not projetos:
         st.info("Nenhum projeto encontrado.")
     else:
@@ -76,7 +84,7 @@ def page_project_selection():
             cols[0].write(proj['id'])
             cols[1].write(proj['nome'])
             
-            data_criacao = datetime.fromisoformat(proj.get('created_at', '1970-01-01T00:00:00')).strftime('%d/%m/%Y')
+            data_criacao = datetime.fromisoformat(proj.get('created_at') or '1970-01-01T00:00:00').strftime('%d/%m/%Y')
             cols[2].write(data_criacao)
             
             if cols[3].button("Carregar", key=f"load_{proj['id']}", use_container_width=True):
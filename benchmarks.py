@@ -0,0 +1,1257 @@
+"""
+Benchmarks e testes de carga do armazenamento e dos cálculos.
+
+Uso: python benchmarks.py <nome> [opções]
+Cada rotina imprime um resumo e termina com código de saída diferente de
+zero se alguma verificação falhar.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from serialization import dumps, loads
+from storage import ConflictError, JsonStorage, ShardedJsonStorage, SQLiteStorage, atomic_write_json, migrate_storage
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    """Registra a rotina para ser chamada pela linha de comando."""
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def _synthetic_project(i, pavimentos=10):
+    """Projeto com o tamanho típico de um estudo real (valores variados, mas determinísticos)."""
+    rng = random.Random(i)
+    return {
+        "id": i, "nome": f"Projeto {i}", "created_at": "2024-01-01T00:00:00", "version": 1,
+        "area_terreno": round(rng.uniform(500, 5000), 2), "area_privativa": 5000.0, "num_unidades": 50, "endereco": "Rua Exemplo, 100",
+        "custos_config": {"custo_terreno_m2": round(rng.uniform(1000, 5000), 2), "custo_area_privativa": round(rng.uniform(3000, 6000), 2),
+                          "preco_medio_venda_m2": round(rng.uniform(7000, 14000), 2)},
+        "etapas_percentuais": {f"Etapa {k}": {"percentual": round(rng.uniform(4, 16), 2), "fonte": "Manual"} for k in range(12)},
+        "pavimentos": [{"nome": f"Pavimento {k}", "tipo": "Área Privativa (Autônoma)", "rep": rng.randint(1, 4), "coef": 1.0,
+                        "area": round(rng.uniform(100, 800), 2), "constr": rng.random() > 0.1}
+                       for k in range(pavimentos)],
+        "unidades": [{"nome": "Tipo", "quantidade": 50, "area_privativa": 100.0, "area_privativa_total": 5000.0}],
+        "custos_indiretos_percentuais": {f"Item {k}": {"percentual": round(rng.uniform(0.1, 4), 2), "fonte": "Manual"} for k in range(13)},
+        "custos_indiretos_fixos": {},
+    }
+
+
+def _timeit(func, repeat=5):
+    """Menor tempo (em ms) entre 'repeat' execuções."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _make_storage(backend, directory):
+    if backend == "sqlite":
+        return SQLiteStorage(os.path.join(directory, "projects.db"))
+    return JsonStorage(
+        os.path.join(directory, "projects.json"),
+        {"direto": os.path.join(directory, "historico_direto.json"), "indireto": os.path.join(directory, "historico_indireto.json")},
+    )
+
+
+def _stress_worker(backend, directory, pid, iterations, results):
+    storage = _make_storage(backend, directory)
+    criados, incrementos, conflitos = [], 0, 0
+    for i in range(iterations):
+        criados.append(storage.save_project({"nome": f"worker-{os.getpid()}-{i}"})["id"])
+        storage.add_historico("direto", {"nome": f"worker-{os.getpid()}-{i}", "percentuais": {}})
+        # Incremento disputado: ler, alterar e salvar com controle otimista.
+        while True:
+            proj = storage.get_project(pid)
+            proj["contador"] = proj.get("contador", 0) + 1
+            try:
+                storage.save_project(proj)
+                incrementos += 1
+                break
+            except ConflictError:
+                conflitos += 1
+    results.put((criados, incrementos, conflitos))
+
+
+@benchmark
+def stress(argv):
+    """Vários processos gravando no mesmo armazenamento ao mesmo tempo."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py stress")
+    parser.add_argument("--backend", choices=["sqlite", "json"], default="sqlite")
+    parser.add_argument("--processes", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=25)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        storage = _make_storage(args.backend, directory)
+        storage.init_storage()
+        pid = storage.save_project({"nome": "Disputado", "contador": 0})["id"]
+
+        results = multiprocessing.Queue()
+        start = time.perf_counter()
+        procs = [
+            multiprocessing.Process(target=_stress_worker, args=(args.backend, directory, pid, args.iterations, results))
+            for _ in range(args.processes)
+        ]
+        for p in procs:
+            p.start()
+        outcomes = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        criados = [i for o in outcomes for i in o[0]]
+        incrementos = sum(o[1] for o in outcomes)
+        conflitos = sum(o[2] for o in outcomes)
+        esperado = args.processes * args.iterations
+        projetos = storage.list_projects()
+        historico = storage.list_historico("direto")
+        disputado = storage.get_project(pid)
+
+        falhas = []
+        if len(set(criados)) != esperado:
+            falhas.append(f"ids duplicados na criação: {esperado - len(set(criados))}")
+        if len(projetos) != esperado + 1:
+            falhas.append(f"projetos gravados: {len(projetos)}, esperados {esperado + 1}")
+        if len({h['id'] for h in historico}) != esperado:
+            falhas.append(f"entradas de histórico únicas: {len({h['id'] for h in historico})}, esperadas {esperado}")
+        if disputado["contador"] != incrementos or incrementos != esperado:
+            falhas.append(f"contador = {disputado['contador']}, incrementos = {incrementos}, esperado {esperado}")
+
+    print(f"backend={args.backend} processos={args.processes} iterações={args.iterations} "
+          f"tempo={elapsed:.2f}s conflitos_detectados={conflitos}")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+@benchmark
+def layout(argv):
+    """Arquivo único (legado) versus SQLite e arquivos por projeto com índice."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py layout")
+    parser.add_argument("--projects", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        legado = _make_storage("json", directory)
+        atomic_write_json(legado.path, [_synthetic_project(i) for i in range(1, args.projects + 1)])
+        legado.init_storage()
+        backends = {"json (legado)": legado}
+        for nome, backend in (("sqlite", SQLiteStorage(os.path.join(directory, "projects.db"))),
+                              ("sharded", ShardedJsonStorage(os.path.join(directory, "sharded")))):
+            backend.init_storage()
+            start = time.perf_counter()
+            migrate_storage(legado, backend)
+            print(f"migração para {nome}: {time.perf_counter() - start:.1f}s")
+            backends[nome] = backend
+
+        pid = args.projects // 2
+        print(f"{'backend':<16}{'resumos (ms)':>14}{'load (ms)':>12}{'save (ms)':>12}")
+        for nome, backend in backends.items():
+            def save():
+                proj = backend.get_project(pid)
+                proj["area_terreno"] += 1
+                backend.save_project(proj)
+            print(f"{nome:<16}{_timeit(backend.list_summaries):>14.2f}{_timeit(lambda: backend.get_project(pid)):>12.2f}{_timeit(save):>12.2f}")
+    return 0
+
+
+@benchmark
+def replay(argv):
+    """Gravação incremental (patches), reconstrução, compactação e restauração com históricos longos."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py replay")
+    parser.add_argument("--edits", type=int, nargs="+", default=[100, 1000, 5000])
+    args = parser.parse_args(argv)
+
+    print(f"{'edições':>8}{'save (ms)':>11}{'load (ms)':>11}{'compact (ms)':>14}{'load comp. (ms)':>17}"
+          f"{'restore meio (ms)':>19}{'log (KB)':>10}{'cheio (KB)':>12}")
+    for edits in args.edits:
+        with tempfile.TemporaryDirectory() as directory:
+            storage = SQLiteStorage(os.path.join(directory, "projects.db"))
+            storage.COMPACT_EVERY = float("inf")
+            storage.init_storage()
+            proj = _synthetic_project(1, pavimentos=40)
+            del proj["id"], proj["version"]
+            storage.save_project(proj)
+            etapas = list(proj["etapas_percentuais"])
+
+            start = time.perf_counter()
+            for i in range(edits):
+                # Uma alteração de slider por gravação
+                proj["etapas_percentuais"][etapas[i % len(etapas)]]["percentual"] = (i % 50) / 10
+                storage.save_project(proj)
+            save_ms = (time.perf_counter() - start) / edits * 1000
+
+            load_ms = _timeit(lambda: storage.get_project(proj["id"]), repeat=3)
+            start = time.perf_counter()
+            storage.compact()
+            compact_ms = (time.perf_counter() - start) * 1000
+            load_comp_ms = _timeit(lambda: storage.get_project(proj["id"]), repeat=3)
+            restore_ms = _timeit(lambda: storage.load_project_at(proj["id"], edits // 2), repeat=3)
+
+            import sqlite3
+            with sqlite3.connect(storage.path) as conn:
+                log_bytes = conn.execute("SELECT SUM(LENGTH(patch)) FROM project_changes").fetchone()[0]
+            full_bytes = len(json.dumps(proj, ensure_ascii=False)) * edits
+            print(f"{edits:>8}{save_ms:>11.2f}{load_ms:>11.2f}{compact_ms:>14.2f}{load_comp_ms:>17.2f}"
+                  f"{restore_ms:>19.2f}{log_bytes / 1024:>10.0f}{full_bytes / 1024:>12.0f}")
+
+    # Ida e volta de trocas só de tipo (1 -> 1.0, True -> 1), inclusive dentro de listas
+    falhas = []
+    with tempfile.TemporaryDirectory() as directory:
+        storage = SQLiteStorage(os.path.join(directory, "projects.db"))
+        storage.init_storage()
+        proj = storage.save_project({"nome": "Tipos", "area_terreno": 1000, "flag": True, "pavimentos": [{"rep": 1, "area": 100}]})
+        esperado = dict(proj, area_terreno=1000.0, flag=1, pavimentos=[{"rep": 1, "area": 100.0}])
+        storage.save_project(dict(esperado))
+        esperado["version"] += 1
+        for rotulo, lido in (("reconstrução", SQLiteStorage(storage.path).get_project(proj["id"])),
+                             ("restauração", storage.load_project_at(proj["id"], esperado["version"]))):
+            if json.dumps(lido, sort_keys=True) != json.dumps(esperado, sort_keys=True):
+                falhas.append(f"{rotulo} perdeu uma troca só de tipo: {lido} (esperado {esperado})")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+@benchmark
+def serialization(argv):
+    """Tamanho e tempo de escrita/leitura de um portfólio sintético em cada formato, com verificação de ida e volta."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py serialization")
+    parser.add_argument("--mb", type=float, default=50.0, help="Tamanho aproximado do portfólio em JSON indentado.")
+    args = parser.parse_args(argv)
+
+    tamanho_projeto = len(dumps(_synthetic_project(1, pavimentos=20), "p.json"))
+    portfolio = [_synthetic_project(i, pavimentos=20) for i in range(1, int(args.mb * 1024 * 1024 / tamanho_projeto) + 1)]
+    print(f"{len(portfolio)} projetos")
+    print(f"{'formato':<14}{'tamanho (MB)':>14}{'escrita (ms)':>14}{'leitura (ms)':>14}")
+    falhas = []
+    for ext in (".json", ".json.gz", ".msgpack", ".msgpack.gz"):
+        raw = dumps(portfolio, f"portfolio{ext}")
+        if loads(raw) != portfolio:
+            falhas.append(ext)
+        escrita = _timeit(lambda: dumps(portfolio, f"portfolio{ext}"), repeat=3)
+        leitura = _timeit(lambda: loads(raw), repeat=3)
+        print(f"{ext:<14}{len(raw) / 1024 / 1024:>14.1f}{escrita:>14.0f}{leitura:>14.0f}")
+    for ext in falhas:
+        print(f"FALHA: ida e volta em {ext} não reproduz os dados")
+    return 1 if falhas else 0
+
+
+@benchmark
+def lote(argv):
+    """Motor vetorizado de áreas e custo direto versus o cálculo projeto a projeto, com verificação exata."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py lote")
+    parser.add_argument("--rows", type=int, default=100000, help="Total de pavimentos no lote.")
+    parser.add_argument("--pavimentos", type=int, default=10, help="Pavimentos por projeto.")
+    args = parser.parse_args(argv)
+
+    from orcamento.core import Pavimento, calcular_areas
+    from orcamento.core.lote import PavimentosLote, calcular_lote
+    from utils import calcular_areas_e_custos
+
+    projetos = [_synthetic_project(i, pavimentos=args.pavimentos) for i in range(1, args.rows // args.pavimentos + 1)]
+    listas = [p["pavimentos"] for p in projetos]
+    custos = [p["custos_config"]["custo_area_privativa"] for p in projetos]
+    print(f"{len(projetos)} projetos, {sum(map(len, listas))} pavimentos")
+
+    start = time.perf_counter()
+    referencia = [calcular_areas_e_custos(pavs, p["custos_config"]) for pavs, p in zip(listas, projetos)]
+    ref_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    nucleo = [calcular_areas([Pavimento.from_dict(d) for d in pavs]) for pavs in listas]
+    nucleo_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    entrada = PavimentosLote.from_listas(listas, custos)
+    montagem_ms = (time.perf_counter() - start) * 1000
+    calculo_ms = _timeit(lambda: calcular_lote(entrada))
+    resultado = calcular_lote(entrada)
+
+    falhas = []
+    for i, (area_constr, area_eq, custo, df) in enumerate(referencia):
+        linhas = slice(entrada.offsets[i], entrada.offsets[i + 1])
+        if (resultado.area_construida_total[i] != area_constr or resultado.area_equivalente_total[i] != area_eq
+                or resultado.custo_direto_total[i] != custo or resultado.area_total_projeto[i] != nucleo[i].area_total
+                or not (resultado.custo_direto[linhas] == df["custo_direto"].to_numpy()).all()):
+            falhas.append(f"projeto {projetos[i]['id']}: resultado do lote difere do cálculo individual")
+
+    print(f"{'método':<36}{'tempo (ms)':>12}{'aceleração':>12}")
+    for nome, ms in (("calcular_areas_e_custos por projeto", ref_ms), ("orcamento.core por projeto", nucleo_ms),
+                     ("lote: montagem das colunas", montagem_ms), ("lote: cálculo", calculo_ms)):
+        print(f"{nome:<36}{ms:>12.1f}{ref_ms / ms:>11.0f}x")
+    for falha in falhas[:10]:
+        print(f"FALHA: {falha}")
+    if calculo_ms * 50 > ref_ms:
+        falhas.append("aceleração do cálculo em lote abaixo de 50x")
+        print(f"FALHA: {falhas[-1]}")
+    return 1 if falhas else 0
+
+
+@benchmark
+def portfolio(argv):
+    """Resultado financeiro de todo o portfólio: cálculo inicial, leitura em cache e atualização após uma gravação."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py portfolio")
+    parser.add_argument("--projects", type=int, default=10000)
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Tempo máximo da atualização após uma gravação.")
+    args = parser.parse_args(argv)
+
+    from orcamento.core import calcular_projeto
+    from utils import ProjectManager
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend = SQLiteStorage(os.path.join(directory, "projects.db"))
+        backend.init_storage()
+        backend.import_projects([dict(_synthetic_project(i), schema_version=1) for i in range(1, args.projects + 1)])
+        backend.set_meta("schema_version", 1)
+        manager = ProjectManager(os.path.join(directory, "projects.json"), storage=backend)
+
+        start = time.perf_counter()
+        df = manager.portfolio()
+        inicial_ms = (time.perf_counter() - start) * 1000
+        cache_ms = _timeit(manager.portfolio)
+
+        proj = manager.load_project(args.projects // 2)
+        proj["custos_config"]["preco_medio_venda_m2"] += 100
+        manager.save_project(proj)
+        start = time.perf_counter()
+        df = manager.portfolio()
+        atualizacao_ms = (time.perf_counter() - start) * 1000
+
+        falhas = []
+        esperado = {p["id"]: calcular_projeto(p) for p in manager.list_projects()}
+        for row in df.itertuples():
+            r = esperado[row.id]
+            if (row.vgv, row.custo_total, row.lucro, row.margem) != (r.vgv_total, r.valor_total_despesas, r.lucratividade_valor, r.lucratividade_percentual):
+                falhas.append(f"projeto {row.id}: resultado do portfólio difere de calcular_projeto")
+
+    print(f"{args.projects} projetos")
+    print(f"cálculo inicial: {inicial_ms:.0f} ms   em cache: {cache_ms:.3f} ms   após uma gravação: {atualizacao_ms:.0f} ms")
+    if atualizacao_ms > args.budget_ms:
+        falhas.append(f"atualização levou {atualizacao_ms:.0f} ms (orçamento {args.budget_ms:.0f} ms)")
+    for falha in falhas[:10]:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+@benchmark
+def montecarlo(argv):
+    """Simulação de Monte Carlo da margem: tempo por milhão de sorteios e reprodutibilidade com vários processos."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py montecarlo")
+    parser.add_argument("--draws", type=int, default=1_000_000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    from orcamento.core import DEFAULT_CUSTOS_INDIRETOS, ETAPAS_OBRA
+    from orcamento.core.cenarios import Premissas, avaliar
+    from orcamento.core.simulacao import simular_margem
+
+    proj = _synthetic_project(1)
+    proj["etapas_percentuais"] = {e: {"percentual": v[1], "fonte": "Manual"} for e, v in ETAPAS_OBRA.items()}
+    proj["custos_indiretos_percentuais"] = {i: {"percentual": v[1], "fonte": "Manual"} for i, v in DEFAULT_CUSTOS_INDIRETOS.items()}
+    premissas = Premissas.from_projeto(proj)
+    # Área privativa típica (80% da equivalente), para uma margem realista
+    premissas.area_privativa = 0.8 * premissas.area_equivalente
+    spreads = {"preco_venda_m2": 0.1, "custo_m2": 0.1, "custo_terreno_m2": 0.05}
+
+    resultados = {}
+    for processos in sorted({1, args.processes}):
+        start = time.perf_counter()
+        resultados[processos] = simular_margem(premissas, n=args.draws, spreads=spreads, seed=args.seed, processos=processos)
+        print(f"{processos} processo(s): {time.perf_counter() - start:.2f}s para {args.draws} sorteios")
+    simulacao = resultados[1]
+    print(f"margem média {simulacao.media:.2f}%  desvio {simulacao.desvio:.2f}  "
+          + "  ".join(f"P{q} {v:.2f}%" for q, v in simulacao.percentis().items())
+          + f"  P(margem < 15%) {simulacao.prob_abaixo(15) * 100:.1f}%")
+
+    falhas = []
+    if any(not np.array_equal(r.margens, simulacao.margens) for r in resultados.values()):
+        falhas.append("resultados diferentes com números de processos diferentes")
+    if not np.array_equal(simular_margem(premissas, n=args.draws, spreads=spreads, seed=args.seed).margens, simulacao.margens):
+        falhas.append("a mesma semente não reproduz os sorteios")
+    # Sem spreads e com faixas simétricas (percentuais no meio de cada faixa), a média
+    # dos sorteios tem de reproduzir a margem determinística
+    simetricas = Premissas.from_projeto(proj)
+    simetricas.area_privativa = premissas.area_privativa
+    simetricas.percentuais_indiretos = {i: (v[0] + v[2]) / 2 for i, v in DEFAULT_CUSTOS_INDIRETOS.items()}
+    esperada = float(avaliar(simetricas).margem)
+    media = simular_margem(simetricas, n=args.draws, seed=args.seed).media
+    print(f"sem spreads: margem média {media:.3f}%  determinística {esperada:.3f}%")
+    if abs(media - esperada) > 0.05:
+        falhas.append(f"sem spreads, a margem média simulada ({media:.3f}%) difere da determinística ({esperada:.3f}%)")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+@benchmark
+def grade(argv):
+    """Grade de cenários (margem sobre duas premissas) e montagem do mapa de calor, com orçamento de tempo."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py grade")
+    parser.add_argument("--size", type=int, default=200, help="Pontos por eixo.")
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    import plotly.graph_objects as go
+    from orcamento.core.cenarios import Premissas, avaliar, grade as avaliar_grade
+
+    premissas = Premissas.from_projeto(_synthetic_project(1))
+    premissas.area_privativa = 0.8 * premissas.area_equivalente
+    valores_x = np.linspace(premissas.preco_venda_m2 * 0.7, premissas.preco_venda_m2 * 1.3, args.size)
+    valores_y = np.linspace(premissas.custo_m2 * 0.7, premissas.custo_m2 * 1.3, args.size)
+
+    def renderizar():
+        margem = np.round(avaliar_grade(premissas, "preco_venda_m2", valores_x, "custo_m2", valores_y).margem, 2)
+        fig = go.Figure(go.Heatmap(x=valores_x, y=valores_y, z=margem))
+        fig.add_trace(go.Contour(x=valores_x, y=valores_y, z=margem, contours=dict(start=0, end=0, coloring="lines")))
+        return fig.to_json()
+
+    calculo_ms = _timeit(lambda: avaliar_grade(premissas, "preco_venda_m2", valores_x, "custo_m2", valores_y))
+    total_ms = _timeit(renderizar)
+    print(f"grade {args.size}x{args.size}: cálculo {calculo_ms:.2f} ms, cálculo + figura {total_ms:.1f} ms")
+
+    falhas = []
+    # Um ponto da grade deve coincidir com a avaliação isolada do mesmo cenário
+    i, j = args.size // 3, args.size // 4
+    ponto = avaliar(premissas, preco_venda_m2=valores_x[j], custo_m2=valores_y[i]).margem
+    if avaliar_grade(premissas, "preco_venda_m2", valores_x, "custo_m2", valores_y).margem[i, j] != ponto:
+        falhas.append("ponto da grade difere da avaliação isolada")
+    if total_ms > args.budget_ms:
+        falhas.append(f"grade levou {total_ms:.0f} ms (orçamento {args.budget_ms:.0f} ms)")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+@benchmark
+def cronograma(argv):
+    """Cronogramas físico-financeiros de muitos projetos em lote, com obras de até 10 anos."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py cronograma")
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--max-months", type=int, default=120)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    from orcamento.core import ETAPAS_OBRA
+    from orcamento.core.cenarios import Premissas
+    from orcamento.core.cronograma import cronograma_de_premissas, cronogramas_de_projetos
+
+    projetos = [_synthetic_project(i) for i in range(args.projects)]
+    for i, projeto in enumerate(projetos):
+        projeto["etapas_percentuais"] = {etapa: {"percentual": vals[1], "fonte": "Manual"} for etapa, vals in ETAPAS_OBRA.items()}
+        projeto["duracao_obra"] = 6 + i % (args.max_months - 5)
+        projeto["cronograma"] = {"curva": "linear" if i % 2 else "s"}
+    premissas = [Premissas.from_projeto(p) for p in projetos]
+
+    lote_ms = _timeit(lambda: cronogramas_de_projetos(projetos), repeat=3)
+    um_a_um_ms = _timeit(lambda: [cronograma_de_premissas(p, curva=projetos[i]["cronograma"]["curva"]) for i, p in enumerate(premissas)], repeat=3)
+    lote = cronogramas_de_projetos(projetos)
+    print(f"{args.projects} projetos, matriz {lote.custos.shape}: lote {lote_ms:.1f} ms, um a um {um_a_um_ms:.1f} ms")
+
+    falhas = []
+    for i in range(0, args.projects, max(args.projects // 20, 1)):
+        individual, p = lote.projeto(i), premissas[i]
+        # Todo o custo das etapas e da administração deve estar distribuído nos meses da obra
+        custo_etapas = p.area_equivalente * p.custo_m2 * sum(p.etapas_percentuais.values()) / 100
+        if not np.isclose(individual.custos.sum(), custo_etapas, rtol=1e-12):
+            falhas.append(f"projeto {i}: custo distribuído {individual.custos.sum()} != {custo_etapas}")
+        if not np.isclose(individual.administracao.sum(), p.custo_mensal_obra * p.duracao_obra, rtol=1e-12):
+            falhas.append(f"projeto {i}: administração distribuída difere do total")
+        if not np.allclose(individual.custos, cronograma_de_premissas(p, curva=projetos[i]["cronograma"]["curva"]).custos, rtol=1e-12):
+            falhas.append(f"projeto {i}: lote difere do cálculo individual")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+@benchmark
+def fluxo(argv):
+    """Fluxo de caixa e TIR de muitos cenários sorteados, resolvidos em um só lote."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py fluxo")
+    parser.add_argument("--scenarios", type=int, default=10_000)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    from orcamento.core.cenarios import Premissas, avaliar
+    from orcamento.core.cronograma import cronograma_de_premissas
+    from orcamento.core.fluxo_caixa import fluxos, indicadores, vpl
+
+    premissas = Premissas.from_projeto(_synthetic_project(1))
+    premissas.area_privativa = 0.8 * premissas.area_equivalente
+    premissas.duracao_obra = args.months
+    cronograma = cronograma_de_premissas(premissas)
+    rng = np.random.default_rng(args.seed)
+    cenarios = {
+        "preco_venda_m2": rng.triangular(0.9, 1.15, 1.6, args.scenarios) * premissas.preco_venda_m2,
+        "custo_m2": rng.triangular(0.9, 1.0, 1.1, args.scenarios) * premissas.custo_m2,
+    }
+
+    start = time.perf_counter()
+    lote = fluxos(premissas, cronograma, **cenarios)
+    ind = indicadores(lote, 12.0)
+    lote_ms = (time.perf_counter() - start) * 1000
+    print(f"{args.scenarios} cenários x {lote.shape[-1]} meses: fluxos + indicadores em {lote_ms:.1f} ms "
+          f"({np.isnan(ind.tir_mensal).sum()} sem TIR)")
+
+    falhas = []
+    lucro = avaliar(premissas, **cenarios).lucro
+    if not np.allclose(lote.sum(axis=-1), lucro, rtol=1e-9, atol=1e-3):
+        falhas.append("a soma do fluxo difere do lucro de avaliar")
+    com_tir = ~np.isnan(ind.tir_mensal)
+    residuo = np.abs(vpl(lote[com_tir], ind.tir_mensal[com_tir])) / np.abs(lote[com_tir]).sum(axis=-1)
+    if residuo.size and residuo.max() > 1e-9:
+        falhas.append(f"VPL na TIR não é zero (resíduo relativo {residuo.max():.2e})")
+    # Um cenário resolvido sozinho deve dar a mesma TIR que dentro do lote
+    i = int(np.flatnonzero(com_tir)[0]) if com_tir.any() else 0
+    sozinho = indicadores(fluxos(premissas, cronograma, **{k: v[i] for k, v in cenarios.items()}), 12.0)
+    if not np.isclose(sozinho.tir_mensal, ind.tir_mensal[i], rtol=1e-9, equal_nan=True):
+        falhas.append("TIR de um cenário isolado difere da TIR no lote")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+@benchmark
+def vendas(argv):
+    """Cenários de velocidade de vendas de um portfólio: resumo em forma fechada e simulação mês a mês."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py vendas")
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--scenarios", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    from orcamento.core.vendas import TiposUnidade
+
+    projetos = [_synthetic_project(i) for i in range(args.projects)]
+    rng = random.Random(0)
+    for projeto in projetos:
+        projeto["unidades"] = [
+            {"nome": f"Tipo {j}", "quantidade": rng.randint(1, 120), "area_privativa": round(rng.uniform(35, 250), 2),
+             "velocidade_vendas": rng.choice([None, 0.8, 2.5, 6.0]), "desconto_lancamento": rng.choice([0.0, 5.0, 10.0]),
+             "reajuste_mensal": rng.choice([0.0, 0.4, 0.8])}
+            for j in range(rng.randint(1, 5))
+        ]
+    tipos = TiposUnidade.from_projetos(projetos)
+    fatores = np.linspace(0.2, 4.0, args.scenarios)
+
+    resumo_ms = _timeit(lambda: tipos.resumir(fatores), repeat=3)
+    resumo = tipos.resumir(fatores)
+    print(f"{args.projects} projetos, {len(tipos.quantidade)} tipos, {args.scenarios} cenários: resumo em {resumo_ms:.1f} ms")
+
+    falhas = []
+    # A forma fechada deve coincidir com a simulação mês a mês (em uma amostra de cenários)
+    amostra = fatores[::max(args.scenarios // 10, 1)]
+    start = time.perf_counter()
+    simulacao = tipos.simular(amostra)
+    print(f"simulação mês a mês de {len(amostra)} cenários x {simulacao.receita.shape[-2]} meses: {(time.perf_counter() - start) * 1000:.1f} ms")
+    conferencia = tipos.resumir(amostra)
+    # Só os projetos que a simulação vendeu dentro do horizonte
+    vendidos = ~np.isnan(simulacao.meses_para_vender_projetos)
+    if not np.array_equal(simulacao.meses_para_vender_projetos[vendidos], conferencia.meses_para_vender_projetos[vendidos]):
+        falhas.append("prazos da forma fechada diferem da simulação")
+    if not np.allclose(simulacao.por_projeto(simulacao.receita.sum(axis=-2))[vendidos], conferencia.receita_projetos[vendidos], rtol=1e-9):
+        falhas.append("receitas da forma fechada diferem da simulação")
+    necessaria = tipos.velocidade_necessaria(24)
+    if np.any(np.diagonal(tipos.resumir(necessaria).meses_para_vender_projetos) > 24):
+        falhas.append("a velocidade necessária não vende tudo no prazo")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+@benchmark
+def tabela(argv):
+    """Tabela de preços de milhares de unidades, com prêmios e reconciliação com o VGV alvo."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py tabela")
+    parser.add_argument("--units", type=int, default=5000)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    from orcamento.core.tabela_precos import ConfigTabela, gerar_tabela
+
+    por_tipo = args.units // 4
+    unidades = [{"nome": f"Tipo {j}", "quantidade": por_tipo + (args.units % 4 if j == 0 else 0), "area_privativa": 50.0 + 30 * j}
+                for j in range(4)]
+    config = ConfigTabela(andares=max(args.units // 20, 1), premio_andar=0.4, curva_andar="composta", premio_cobertura=12.0,
+                          premios_posicao={1: 3.0, 2: 3.0, 5: -2.0}, arredondamento=500.0)
+    vgv_alvo = 1.02 * sum(u["quantidade"] * u["area_privativa"] for u in unidades) * 10000.0
+
+    tempo_ms = _timeit(lambda: gerar_tabela(unidades, 10000.0, config, vgv_alvo))
+    tabela = gerar_tabela(unidades, 10000.0, config, vgv_alvo)
+    print(f"{len(tabela.preco)} unidades em {tabela.andar.max() - tabela.andar.min() + 1} andares: {tempo_ms:.2f} ms, "
+          f"VGV {tabela.vgv:,.0f} (alvo {vgv_alvo:,.0f})")
+
+    falhas = []
+    if len(tabela.preco) != args.units or len(np.unique(tabela.codigo)) != args.units:
+        falhas.append("códigos de unidade repetidos ou unidades faltando")
+    if abs(tabela.vgv - vgv_alvo) > config.arredondamento / 2:
+        falhas.append(f"VGV da tabela difere do alvo em {tabela.vgv - vgv_alvo:,.2f}")
+    if np.any(tabela.preco % config.arredondamento):
+        falhas.append("preços fora do arredondamento")
+    if tempo_ms > args.budget_ms:
+        falhas.append(f"tabela levou {tempo_ms:.1f} ms (orçamento {args.budget_ms:.0f} ms)")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+@benchmark
+def metas(argv):
+    """Busca de metas: conferência das formas fechadas com a avaliação direta e tempo com e sem memorização."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py metas")
+    parser.add_argument("--targets", type=float, nargs="+", default=[-10.0, 0.0, 10.0, 15.0, 20.0])
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    from orcamento.core.cenarios import Premissas, avaliar
+    from orcamento.core.metas import VARIAVEIS, resolver_metas
+
+    premissas = Premissas.from_projeto(_synthetic_project(1))
+    premissas.area_privativa = 0.8 * premissas.area_equivalente
+    falhas = []
+    print(f"{'premissa':<22}{'1ª chamada (ms)':>17}{'memorizada (ms)':>17}  soluções")
+    for variavel in VARIAVEIS:
+        for metrica, metas_alvo in (("margem", args.targets), ("lucro", [0.0, 1e6])):
+            start = time.perf_counter()
+            solucoes = resolver_metas(premissas, variavel, metas_alvo, metrica)
+            primeira_ms = (time.perf_counter() - start) * 1000
+            memo_ms = _timeit(lambda: resolver_metas(premissas, variavel, metas_alvo, metrica))
+            for meta, valor in zip(metas_alvo, solucoes):
+                if np.isfinite(valor):
+                    obtido = float(getattr(avaliar(premissas, **{variavel: valor}), metrica))
+                    if abs(obtido - meta) > 1e-6 * max(1.0, abs(meta)):
+                        falhas.append(f"{variavel}: meta de {metrica} {meta} resolvida como {valor}, que dá {obtido}")
+            if metrica == "margem":
+                print(f"{variavel:<22}{primeira_ms:>17.3f}{memo_ms:>17.4f}  " + ", ".join(f"{v:.2f}" for v in solucoes))
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+@benchmark
+def grafo(argv):
+    """Grafo de cálculo: conferência com calcular_projeto, tempo sem e com cache e nós recalculados por alteração."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py grafo")
+    parser.add_argument("--pavimentos", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    from orcamento.core import GRAFO_PROJETO, ResultadoProjeto, calcular_projeto
+
+    projeto = _synthetic_project(1, args.pavimentos)
+    falhas = []
+    GRAFO_PROJETO.limpar()
+    start = time.perf_counter()
+    financeiro = ResultadoProjeto.from_projeto(projeto).financeiro
+    frio_ms = (time.perf_counter() - start) * 1000
+    quente_ms = _timeit(lambda: ResultadoProjeto.from_projeto(projeto).financeiro)
+    direto_ms = _timeit(lambda: calcular_projeto(projeto))
+    if financeiro != calcular_projeto(projeto):
+        falhas.append("resultado do grafo difere de calcular_projeto")
+    print(f"{'sem cache (ms)':<34}{frio_ms:>10.3f}")
+    print(f"{'com cache (ms)':<34}{quente_ms:>10.3f}")
+    print(f"{'calcular_projeto (ms)':<34}{direto_ms:>10.3f}")
+
+    # Cada alteração deve recalcular exatamente os nós que dependem da fonte alterada
+    alteracoes = {
+        "percentuais_indiretos": lambda p: p["custos_indiretos_percentuais"]["Item 0"].update(percentual=9.99),
+        "preco_venda_m2": lambda p: p["custos_config"].update(preco_medio_venda_m2=12345.0),
+        "pavimentos": lambda p: p["pavimentos"][0].update(area=999.0),
+        "duracao_obra": lambda p: p.update(duracao_obra=30),
+    }
+    print(f"\n{'fonte alterada':<24}{'ms':>10}  nós recalculados")
+    for fonte, alterar in alteracoes.items():
+        alterado = json.loads(json.dumps(projeto))
+        alterar(alterado)
+        ResultadoProjeto.from_projeto(projeto).financeiro
+        ResultadoProjeto.from_projeto(projeto).custo_direto_por_tipo
+        antes = {nome: e.calculos for nome, e in GRAFO_PROJETO.estatisticas.items()}
+        start = time.perf_counter()
+        resultado = ResultadoProjeto.from_projeto(alterado)
+        resultado.financeiro
+        resultado.custo_direto_por_tipo
+        ms = (time.perf_counter() - start) * 1000
+        recalculados = [nome for nome, e in GRAFO_PROJETO.estatisticas.items() if e.calculos > antes[nome]]
+        print(f"{fonte:<24}{ms:>10.3f}  {', '.join(recalculados)}")
+        if recalculados != GRAFO_PROJETO.dependentes(fonte):
+            falhas.append(f"alterar {fonte} recalculou {recalculados}")
+        if resultado.financeiro != calcular_projeto(alterado):
+            falhas.append(f"resultado com {fonte} alterado difere de calcular_projeto")
+
+    print(f"\n{'nó':<24}{'avaliações':>12}{'acertos':>10}{'tempo médio (ms)':>18}")
+    for nome, e in GRAFO_PROJETO.estatisticas.items():
+        print(f"{nome:<24}{e.avaliacoes:>12}{e.taxa_acertos:>10.0%}{e.tempo_medio * 1000:>18.4f}")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+@benchmark
+def redistribuicao(argv):
+    """Redistribuição de percentuais: propriedades da projeção em casos aleatórios e tempo por edição."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py redistribuicao")
+    parser.add_argument("--casos", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    import math
+    from orcamento.core import ETAPAS_OBRA, projetar, redistribuir
+
+    rng = random.Random(args.seed)
+    falhas, verificados = [], 0
+    for caso in range(args.casos):
+        # Metade dos casos com as faixas das etapas da obra, metade com faixas aleatórias que comportam 100
+        if caso % 2 == 0:
+            limites = {k: (v[0], v[2]) for k, v in ETAPAS_OBRA.items()}
+        else:
+            n = rng.randint(2, 30)
+            pares = [sorted((rng.uniform(0, 200 / n), rng.uniform(0, 200 / n))) for _ in range(n)]
+            if not math.fsum(lo for lo, _ in pares) <= 100 <= math.fsum(hi for _, hi in pares):
+                continue
+            limites = {f"Item {i}": tuple(par) for i, par in enumerate(pares)}
+        itens = list(limites)
+        anteriores = dict(zip(itens, projetar([rng.uniform(*limites[k]) for k in itens], list(limites.values()), 100.0)))
+        editados = rng.sample(itens, rng.randint(1, min(3, len(itens) - 1)))
+        pedidos = {k: rng.uniform(*limites[k]) for k in editados}
+        novos = redistribuir({**anteriores, **pedidos}, limites, editados, anteriores)
+        verificados += 1
+
+        if abs(math.fsum(novos.values()) - 100) > 1e-9:
+            falhas.append(f"caso {caso}: soma {math.fsum(novos.values())!r}")
+        fora = [k for k in itens if not limites[k][0] - 1e-9 <= novos[k] <= limites[k][1] + 1e-9]
+        if fora:
+            falhas.append(f"caso {caso}: fora da faixa: {fora}")
+        livres = [k for k in itens if k not in pedidos]
+        absorvivel = (math.fsum(limites[k][0] for k in livres) <= 100 - math.fsum(pedidos.values())
+                      <= math.fsum(limites[k][1] for k in livres))
+        if absorvivel and any(abs(novos[k] - v) > 1e-9 for k, v in pedidos.items()):
+            falhas.append(f"caso {caso}: valor editado não foi mantido")
+        # Sem edição, um vetor já válido não muda
+        if any(abs(a - b) > 1e-9 for a, b in zip(redistribuir(novos, limites).values(), novos.values())):
+            falhas.append(f"caso {caso}: redistribuir sem edição alterou os valores")
+        if len(falhas) > 10:
+            break
+
+    limites = {k: (v[0], v[2]) for k, v in ETAPAS_OBRA.items()}
+    padrao = {k: v[1] for k, v in ETAPAS_OBRA.items()}
+    etapa = next(iter(ETAPAS_OBRA))
+    ms = _timeit(lambda: redistribuir({**padrao, etapa: limites[etapa][1]}, limites, [etapa], padrao), repeat=200)
+    print(f"{verificados} casos verificados; uma edição nas {len(ETAPAS_OBRA)} etapas: {ms * 1000:.1f} µs")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+def _medir_interacoes(repeticoes):
+    """
+    Executada em um subprocesso, na raiz de uma cópia da árvore (ver
+    interacao): abre as páginas de custos com AppTest e mede cada interação.
+    Imprime um JSON com, por interação, o tempo de execução da página (todas
+    as execuções que a interação dispara) e, se a árvore tiver a medição dos
+    fragmentos, o tempo do fragmento, que é o que o servidor executa quando
+    a interação acontece dentro dele.
+    """
+    import json
+    import statistics
+    import time
+    from streamlit.testing.v1 import AppTest
+    from utils import DEFAULT_PAVIMENTO, DEFAULT_CUSTOS_INDIRETOS, DEFAULT_CUSTOS_INDIRETOS_OBRA, ETAPAS_OBRA
+
+    info = {
+        "nome": "Benchmark", "area_terreno": 1000.0, "area_privativa": 2000.0, "num_unidades": 20, "endereco": "",
+        "custos_config": {"custo_terreno_m2": 2500.0, "custo_area_privativa": 4500.0, "preco_medio_venda_m2": 10000.0},
+        "etapas_percentuais": {e: {"percentual": v[1], "fonte": "Manual"} for e, v in ETAPAS_OBRA.items()},
+        "pavimentos": [dict(DEFAULT_PAVIMENTO, rep=10), dict(DEFAULT_PAVIMENTO, nome="Garagem", tipo="Garagem (Subsolo)", coef=0.6, area=500.0)],
+        "unidades": [{"nome": "Apto", "quantidade": 20, "area_privativa": 100.0, "area_privativa_total": 2000.0}],
+        "custos_indiretos_percentuais": {i: {"percentual": v[1], "fonte": "Manual"} for i, v in DEFAULT_CUSTOS_INDIRETOS.items()},
+        "custos_indiretos_obra": dict(DEFAULT_CUSTOS_INDIRETOS_OBRA),
+    }
+
+    def abrir(pagina):
+        at = AppTest.from_file(f"pages/{pagina}", default_timeout=120)
+        dados = json.loads(json.dumps(info))
+        at.session_state["projeto_info"] = dados
+        for key in ("pavimentos", "unidades", "etapas_percentuais", "custos_indiretos_percentuais", "custos_indiretos_obra"):
+            at.session_state[key] = json.loads(json.dumps(dados[key]))
+        return at.run()
+
+    def enviar(at, rotulo):
+        # Nas árvores com formulário, a edição só é aplicada ao enviá-lo
+        for botao in at.button:
+            if botao.label == rotulo:
+                botao.click()
+
+    item_obra = next(iter(DEFAULT_CUSTOS_INDIRETOS_OBRA))
+    interacoes = {
+        "indiretos": ("4_Custos_Indiretos.py", "custos_indiretos", lambda at, i: (
+            at.text_input(key="custo_percentual_Corretagem").input(("4,00", "3,50")[i % 2]), enviar(at, "Aplicar Percentuais"))),
+        "administracao": ("3_Administracao_da_Obra.py", "administracao_obra", lambda at, i: (
+            at.text_input(key=f"custo_mensal_{item_obra}").input(("15000,00", "16000,00")[i % 2]), enviar(at, "Aplicar Custos"))),
+        "etapas": ("2_Custos_Diretos.py", "etapas_obra", lambda at, i: (
+            at.slider(key="slider_etapa_Estrutura (Supraestrutura)").set_value((20.0, 18.0)[i % 2]),)),
+    }
+    resultado = {}
+    for nome, (pagina, fragmento, interagir) in interacoes.items():
+        at = abrir(pagina)
+        pagina_ms, fragmento_ms = [], []
+        for i in range(repeticoes):
+            interagir(at, i)
+            start = time.perf_counter()
+            at.run()
+            pagina_ms.append((time.perf_counter() - start) * 1000)
+            if at.exception:
+                raise RuntimeError(f"{pagina}: {at.exception[0].value}")
+            tempos = at.session_state["tempos_execucao"] if "tempos_execucao" in at.session_state else {}
+            if fragmento in tempos:
+                fragmento_ms.append(tempos[fragmento]["ultima_ms"])
+        resultado[nome] = {
+            "pagina_ms": statistics.median(pagina_ms),
+            "fragmento_ms": statistics.median(fragmento_ms) if fragmento_ms else None,
+        }
+    print(json.dumps(resultado))
+
+
+def _copiar_arvore(destino, revisao=None):
+    """Cópia da árvore de trabalho (ou de 'revisao' do git) em 'destino', sem bancos de dados."""
+    import shutil
+    import subprocess
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    if revisao is None:
+        shutil.copytree(raiz, destino, ignore=shutil.ignore_patterns(".git", "__pycache__", "*.db", "*.db-*"))
+    else:
+        os.makedirs(destino)
+        arquivo = subprocess.run(["git", "archive", revisao], cwd=raiz, check=True, capture_output=True).stdout
+        subprocess.run(["tar", "-x", "-C", destino], input=arquivo, check=True)
+
+
+def _medir_nas_arvores(funcao, argumentos, antes=None):
+    """
+    Executa 'funcao' (autossuficiente, que imprime um JSON na última linha)
+    em um subprocesso na raiz de uma cópia da árvore de trabalho e, se
+    'antes' for dado, também na da revisão 'antes' do git. Devolve
+    {'antes': ..., 'depois': ...} ou None se alguma execução falhar.
+    """
+    import inspect
+    import subprocess
+
+    codigo = inspect.getsource(funcao) + f"\n{funcao.__name__}(*{argumentos!r})\n"
+    medidas = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for rotulo, revisao in (("antes", antes), ("depois", None)):
+            if rotulo == "antes" and not revisao:
+                continue
+            arvore = os.path.join(directory, rotulo)
+            _copiar_arvore(arvore, revisao)
+            saida = subprocess.run([sys.executable, "-c", codigo], cwd=arvore, capture_output=True, text=True)
+            if saida.returncode != 0:
+                print(saida.stderr[-2000:])
+                print(f"FALHA: medição na árvore '{rotulo}' terminou com código {saida.returncode}")
+                return None
+            medidas[rotulo] = json.loads(saida.stdout.strip().splitlines()[-1])
+    return medidas
+
+
+@benchmark
+def interacao(argv):
+    """Tempo no servidor por interação nos editores de custos (13 itens indiretos, 12 etapas), antes e depois."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py interacao")
+    parser.add_argument("--antes", help="revisão do git para comparar (p. ex. HEAD~1)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    medidas = _medir_nas_arvores(_medir_interacoes, (args.repeat,), args.antes)
+    if medidas is None:
+        return 1
+    print(f"{'interação':<16}{'antes: página (ms)':>20}{'depois: página (ms)':>21}{'depois: fragmento (ms)':>24}")
+    for nome, depois in medidas["depois"].items():
+        antes = medidas.get("antes", {}).get(nome)
+        print(f"{nome:<16}{antes['pagina_ms'] if antes else float('nan'):>20.1f}{depois['pagina_ms']:>21.1f}"
+              f"{depois['fragmento_ms'] if depois['fragmento_ms'] is not None else float('nan'):>24.1f}")
+    print("\nAppTest sempre reexecuta a página inteira; no navegador, uma interação dentro de um fragmento")
+    print("executa só o fragmento (última coluna).")
+    return 0
+
+
+def _medir_editor(tamanhos, repeticoes):
+    """
+    Executada em um subprocesso, na raiz de uma cópia da árvore (ver editor):
+    tempo de reexecução da página Dados do Projeto com cada número de
+    pavimentos (e um décimo disso em tipos de unidade). Imprime um JSON
+    {pavimentos: ms (mediana)}.
+    """
+    import json
+    import statistics
+    import time
+    from streamlit.testing.v1 import AppTest
+    from utils import TIPOS_PAVIMENTO, DEFAULT_CUSTOS_INDIRETOS, ETAPAS_OBRA
+
+    tipos = list(TIPOS_PAVIMENTO)
+    resultado = {}
+    for n in tamanhos:
+        info = {
+            "nome": "Benchmark", "area_terreno": 1000.0, "area_privativa": 2000.0, "num_unidades": 20, "endereco": "",
+            "custos_config": {"custo_terreno_m2": 2500.0, "custo_area_privativa": 4500.0, "preco_medio_venda_m2": 10000.0},
+            "etapas_percentuais": {e: {"percentual": v[1], "fonte": "Manual"} for e, v in ETAPAS_OBRA.items()},
+            "pavimentos": [{"nome": f"Pavimento {i}", "tipo": tipos[i % len(tipos)], "rep": 1 + i % 3,
+                            "coef": TIPOS_PAVIMENTO[tipos[i % len(tipos)]][0], "area": 100.0 + i, "constr": i % 7 != 0}
+                           for i in range(n)],
+            "unidades": [{"nome": f"Tipo {i}", "quantidade": 2, "area_privativa": 50.0 + i, "area_privativa_total": 100.0 + 2 * i}
+                         for i in range(max(n // 10, 1))],
+            "custos_indiretos_percentuais": {i: {"percentual": v[1], "fonte": "Manual"} for i, v in DEFAULT_CUSTOS_INDIRETOS.items()},
+        }
+        at = AppTest.from_file("pages/1_Dados_do_Projeto.py", default_timeout=600)
+        at.session_state["projeto_info"] = info
+        at.session_state["pavimentos"] = [dict(p) for p in info["pavimentos"]]
+        at.session_state["unidades"] = [dict(u) for u in info["unidades"]]
+        at.session_state["deleting_pav_index"] = None
+        at.run()
+        tempos = []
+        for _ in range(repeticoes):
+            start = time.perf_counter()
+            at.run()
+            tempos.append((time.perf_counter() - start) * 1000)
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+        resultado[n] = statistics.median(tempos)
+    print(json.dumps(resultado))
+
+
+def _verificar_editor_vazio():
+    """
+    Executada em um subprocesso, na raiz de uma cópia da árvore (ver editor):
+    abre a página Dados do Projeto sem pavimentos e/ou sem tipos de unidade
+    (projeto novo, todas as linhas excluídas). Imprime um JSON {caso: erro ou null}.
+    """
+    import json
+    from streamlit.testing.v1 import AppTest
+    from utils import DEFAULT_PAVIMENTO
+
+    casos = {
+        "sem unidades": ([dict(DEFAULT_PAVIMENTO)], []),
+        "sem pavimentos": ([], [{"nome": "Tipo 1", "quantidade": 2, "area_privativa": 50.0}]),
+        "sem pavimentos e unidades": ([], []),
+    }
+    resultado = {}
+    for caso, (pavimentos, unidades) in casos.items():
+        at = AppTest.from_file("pages/1_Dados_do_Projeto.py", default_timeout=600)
+        at.session_state["projeto_info"] = {"nome": "Benchmark", "custos_config": {}, "pavimentos": pavimentos, "unidades": unidades}
+        at.session_state["pavimentos"] = [dict(p) for p in pavimentos]
+        at.session_state["unidades"] = [dict(u) for u in unidades]
+        at.session_state["deleting_pav_index"] = None
+        at.run()
+        resultado[caso] = str(at.exception[0].value) if at.exception else None
+    print(json.dumps(resultado))
+
+
+@benchmark
+def editor(argv):
+    """Editor de pavimentos e unidades: tempo de reexecução da página Dados do Projeto conforme o número de linhas."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py editor")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--antes", help="revisão do git para comparar (p. ex. HEAD~1)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    vazias = _medir_nas_arvores(_verificar_editor_vazio, ())
+    if vazias is None:
+        return 1
+    erros = {caso: erro for caso, erro in vazias["depois"].items() if erro}
+    for caso, erro in erros.items():
+        print(f"FALHA: a página Dados do Projeto {caso} levantou: {erro}")
+    if erros:
+        return 1
+
+    medidas = _medir_nas_arvores(_medir_editor, (args.sizes, args.repeat), args.antes)
+    if medidas is None:
+        return 1
+    print(f"{'pavimentos':>10}{'antes (ms)':>14}{'depois (ms)':>14}")
+    for n, depois in medidas["depois"].items():
+        antes = medidas.get("antes", {}).get(n, float("nan"))
+        print(f"{n:>10}{antes:>14.1f}{depois:>14.1f}")
+    # Custo constante: 1.000 linhas não podem custar muito mais que 10
+    tempos = list(medidas["depois"].values())
+    if tempos[-1] > 3 * tempos[0] + 100:
+        print(f"FALHA: a reexecução com {args.sizes[-1]} linhas levou {tempos[-1]:.0f} ms contra {tempos[0]:.0f} ms com {args.sizes[0]}")
+        return 1
+    return 0
+
+
+def _escrever_planilhas(directory, linhas):
+    """
+    Quadro de áreas sintético com 'linhas' pavimentos e linhas/10 tipos de
+    unidade, em CSV (só os pavimentos) e em XLSX (uma aba de cada), com uma
+    linha inválida a cada 50. Devolve (csv, xlsx, linhas inválidas).
+    """
+    import csv
+    import openpyxl
+
+    tipos = [("Área Privativa (Autônoma)", "1,00"), ("Garagem (subsolo)", "0,6"), ("lazer", "3"), ("varandas", ""), ("Loja", "0,5")]
+    pavimentos, invalidas = [], 0
+    for i in range(linhas):
+        tipo, coef = tipos[i % len(tipos)]
+        if i % 50 == 49:
+            coef, invalidas = "9,9", invalidas + 1
+        pavimentos.append([f"Pavimento {i}", tipo, 1 + i % 3, coef, f"{100 + i % 900:.2f}".replace(".", ","), "sim" if i % 7 else "não"])
+    caminho_csv = os.path.join(directory, "quadro.csv")
+    with open(caminho_csv, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f, delimiter=";")
+        escritor.writerow(["Nome", "Tipo", "Rep.", "Coef.", "Área (m²)", "A.C?"])
+        escritor.writerows(pavimentos)
+    livro = openpyxl.Workbook(write_only=True)
+    aba = livro.create_sheet("Pavimentos")
+    aba.append(["Nome", "Tipo", "Rep.", "Coef.", "Área (m²)", "A.C?"])
+    for linha in pavimentos:
+        aba.append(linha)
+    aba = livro.create_sheet("Unidades")
+    aba.append(["Tipo de Unidade", "Quantidade", "Área Privativa (m²)"])
+    for i in range(linhas // 10):
+        aba.append([f"Tipo {i}", 1 + i % 8, 40.0 + i % 120])
+    caminho_xlsx = os.path.join(directory, "quadro.xlsx")
+    livro.save(caminho_xlsx)
+    return caminho_csv, caminho_xlsx, invalidas
+
+
+@benchmark
+def importacao(argv):
+    """Importação de planilhas: linhas por segundo (CSV e XLSX) e memória de pico da leitura em lotes."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py importacao")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    import io
+    import tracemalloc
+    from orcamento.core import importar_em_lotes, importar_planilha
+
+    falhas = []
+    with tempfile.TemporaryDirectory() as directory:
+        pico = {}
+        for linhas in (args.rows // 10, args.rows):
+            caminho_csv, caminho_xlsx, invalidas = _escrever_planilhas(directory, linhas)
+            for formato, caminho in (("csv", caminho_csv), ("xlsx", caminho_xlsx)):
+                lidas = linhas + 1 + (linhas // 10 + 1 if formato == "xlsx" else 0)
+                start = time.perf_counter()
+                resultado = importar_planilha(caminho, tamanho_lote=args.batch)
+                decorrido = time.perf_counter() - start
+                # Memória de pico lendo em lotes e descartando cada um (como um consumidor que grava em fluxo)
+                tracemalloc.start()
+                for _ in importar_em_lotes(caminho, tamanho_lote=args.batch):
+                    pass
+                pico[formato, linhas] = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+                print(f"{formato:<5}{linhas:>8} linhas: {lidas / decorrido:>10,.0f} linhas/s ({decorrido * 1000:.0f} ms), "
+                      f"pico da leitura em lotes {pico[formato, linhas]:.1f} MiB, {resultado.total_erros} linhas inválidas")
+                if resultado.linhas != lidas:
+                    falhas.append(f"{formato}: {resultado.linhas} linhas lidas de {lidas}")
+                if len(resultado.pavimentos) != linhas - invalidas or resultado.total_erros != invalidas:
+                    falhas.append(f"{formato}: {len(resultado.pavimentos)} pavimentos e {resultado.total_erros} erros, "
+                                  f"esperados {linhas - invalidas} e {invalidas}")
+                if formato == "xlsx" and len(resultado.unidades) != linhas // 10:
+                    falhas.append(f"xlsx: {len(resultado.unidades)} tipos de unidade, esperados {linhas // 10}")
+        # Memória limitada: no CSV, 10 vezes mais linhas não podem exigir mais memória na leitura. O XLSX
+        # guarda os textos em uma tabela de strings compartilhadas que o openpyxl carrega inteira; só ela
+        # pode crescer com o arquivo, bem menos que as próprias linhas convertidas (centenas de bytes cada)
+        crescimento = {formato: (pico[formato, args.rows] - pico[formato, args.rows // 10]) * 2**20 / (args.rows - args.rows // 10)
+                       for formato in ("csv", "xlsx")}
+        for formato, limite in (("csv", 8), ("xlsx", 150)):
+            if crescimento[formato] > limite:
+                falhas.append(f"{formato}: a memória de pico cresce {crescimento[formato]:.0f} bytes por linha (limite {limite})")
+
+    # CSV em UTF-8 com uma linha em Windows-1252 depois da amostra usada para detectar o encoding
+    linhas = ["Nome;Tipo;Rep.;Coef.;Área (m²);A.C?"] + [f"Pavimento {i};lazer;1;2;100,5;sim" for i in range(10000)]
+    conteudo = "\n".join(linhas).encode("utf-8").replace(b"Pavimento 5001;", "Térreo;".encode("cp1252"))
+    try:
+        resultado = importar_planilha(io.BytesIO(conteudo), "misto.csv")
+        if len(resultado.pavimentos) != 10000 or resultado.pavimentos[5001]["nome"] != "Térreo":
+            falhas.append(f"csv misto: {len(resultado.pavimentos)} pavimentos, linha 5001 = {resultado.pavimentos[5001]['nome']!r}")
+    except ValueError as e:
+        falhas.append(f"csv misto: a importação inteira falhou ({e})")
+
+    # Separador de milhar pt-BR sem vírgula decimal: '1.234' m² são 1.234 m², não 1,234
+    conteudo = "Nome;Tipo;Rep.;Coef.;Área (m²);A.C?\nTipo;Garagem;1;0.600;1.234;sim\nTorre;Área Privativa;2;1;12.345.678;sim\n"
+    areas = [p["area"] for p in importar_planilha(io.BytesIO(conteudo.encode("utf-8")), "milhar.csv").pavimentos]
+    if areas != [1234.0, 12345678.0]:
+        falhas.append(f"csv com separador de milhar: áreas {areas}, esperadas [1234.0, 12345678.0]")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+def _medir_relatorio(tamanhos, repeticoes):
+    """
+    Executada em um subprocesso, na raiz de uma cópia da árvore (ver
+    relatorio): tempo de utils.generate_pdf_report na primeira chamada e
+    nas seguintes, com os mesmos dados, para cada número de pavimentos.
+    Imprime um JSON {pavimentos: {primeira_ms, repetida_ms}}.
+    """
+    import json
+    import statistics
+    import time
+    import utils
+
+    def argumentos(n):
+        pavimentos = [{"nome": f"Pavimento {i}", "tipo": "Área Privativa (Autônoma)", "rep": 1 + i % 3, "coef": 1.0,
+                       "area": 100.0 + i, "constr": i % 7 != 0} for i in range(n)]
+        config = {"custo_area_privativa": 4500.0, "preco_medio_venda_m2": 10000.0}
+        area_construida, _, custo_direto, pavimentos_df = utils.calcular_areas_e_custos(pavimentos, config)
+        info = {"nome": f"Benchmark {n}", "area_privativa": 0.8 * area_construida,
+                "etapas_percentuais": {e: {"percentual": v[1]} for e, v in utils.ETAPAS_OBRA.items()}}
+        indiretos = {k: {"percentual": v[1]} for k, v in utils.DEFAULT_CUSTOS_INDIRETOS.items()}
+        return (info, 1e8, 8e7, 2e7, 20.0, custo_direto, 5e6, 1e7, area_construida, config, indiretos, pavimentos_df, 2e6)
+
+    # Primeiro PDF do processo: carrega o WeasyPrint e as fontes
+    utils.generate_pdf_report(*argumentos(1))
+    resultado = {}
+    for n in tamanhos:
+        args = argumentos(n)
+        start = time.perf_counter()
+        utils.generate_pdf_report(*args)
+        primeira = (time.perf_counter() - start) * 1000
+        tempos = []
+        for _ in range(repeticoes):
+            start = time.perf_counter()
+            utils.generate_pdf_report(*args)
+            tempos.append((time.perf_counter() - start) * 1000)
+        resultado[n] = {"primeira_ms": primeira, "repetida_ms": statistics.median(tempos)}
+    print(json.dumps(resultado))
+
+
+@benchmark
+def relatorio(argv):
+    """Relatório PDF: montagem do HTML, renderização e cache, de 10 a 2.000 pavimentos."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py relatorio")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500, 2000])
+    parser.add_argument("--antes", help="revisão do git para comparar generate_pdf_report (p. ex. HEAD~1)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from relatorio import ESTILO, CacheRelatorios, gerar_pdf, montar_html
+    from utils import DEFAULT_CUSTOS_INDIRETOS, ETAPAS_OBRA, calcular_areas_e_custos
+
+    falhas = []
+    print(f"{'pavimentos':>10}{'HTML (ms)':>11}{'PDF (ms)':>11}{'em cache (ms)':>15}")
+    for n in args.sizes:
+        info = _synthetic_project(n, pavimentos=n)
+        info["etapas_percentuais"] = {e: {"percentual": v[1], "fonte": "Manual"} for e, v in ETAPAS_OBRA.items()}
+        area_construida, _, custo_direto, pavimentos_df = calcular_areas_e_custos(info["pavimentos"], info["custos_config"])
+        indiretos = {k: {"percentual": v[1], "fonte": "Manual"} for k, v in DEFAULT_CUSTOS_INDIRETOS.items()}
+        dados = (info, 1e8, 8e7, 2e7, 20.0, custo_direto, 5e6, 1e7, area_construida, info["custos_config"], indiretos, pavimentos_df, 2e6)
+
+        html_ms = _timeit(lambda: montar_html(*dados), repeat=args.repeat)
+        cache = CacheRelatorios()
+        try:
+            start = time.perf_counter()
+            pdf = gerar_pdf(*dados, cache=cache)
+            pdf_ms = (time.perf_counter() - start) * 1000
+        except (ImportError, OSError) as e:
+            print(f"WeasyPrint indisponível ({e}); medindo só a montagem do HTML")
+            print(f"{n:>10}{html_ms:>11.2f}")
+            continue
+        cache_ms = _timeit(lambda: gerar_pdf(*dados, cache=cache), repeat=args.repeat)
+        print(f"{n:>10}{html_ms:>11.2f}{pdf_ms:>11.1f}{cache_ms:>15.2f}")
+        if gerar_pdf(*dados, cache=cache) is not pdf or cache.faltas != 1:
+            falhas.append(f"{n} pavimentos: relatório sem alterações não foi servido do cache")
+        info["pavimentos"][0]["area"] += 1
+        _, _, _, pavimentos_df = calcular_areas_e_custos(info["pavimentos"], info["custos_config"])
+        gerar_pdf(*dados[:11], pavimentos_df, 2e6, cache=cache)
+        if cache.faltas != 2:
+            falhas.append(f"{n} pavimentos: relatório alterado foi servido do cache")
+        # Sem alterações, o custo é o de montar o HTML para calcular a chave
+        if cache_ms > 2 * html_ms + 5:
+            falhas.append(f"{n} pavimentos: relatório em cache levou {cache_ms:.1f} ms (HTML: {html_ms:.1f} ms)")
+        if "http://" in montar_html(*dados) + ESTILO or "https://" in montar_html(*dados) + ESTILO:
+            falhas.append("o relatório referencia recursos da rede")
+
+    if args.antes:
+        medidas = _medir_nas_arvores(_medir_relatorio, (args.sizes, args.repeat), args.antes)
+        if medidas is None:
+            return 1
+        print(f"\ngenerate_pdf_report (ms){'antes: 1ª':>14}{'antes: repetida':>17}{'depois: 1ª':>13}{'depois: repetida':>18}")
+        for n, depois in medidas["depois"].items():
+            antes = medidas["antes"][n]
+            print(f"{n:>24}{antes['primeira_ms']:>14.1f}{antes['repetida_ms']:>17.1f}{depois['primeira_ms']:>13.1f}{depois['repetida_ms']:>18.2f}")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+def _import_profile(module):
+    """
+    Importa 'module' em um interpretador novo e devolve (total em ms,
+    {dependência direta: ms}, nomes dos módulos carregados).
+    """
+    import subprocess
+    code = f"import sys, {module}; print('\\n'.join(sys.modules))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    total, diretas, pendentes = 0.0, {}, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        nivel = (len(name) - len(name.lstrip()) - 1) // 2
+        ms = int(cumulative) / 1000
+        # O -X importtime lista os filhos antes do pai: as dependências diretas
+        # (nível 1) acumuladas até a linha de nível 0 pertencem a ela.
+        if nivel == 1:
+            pendentes[name.strip()] = ms
+        elif nivel == 0:
+            if name.strip() == module:
+                total, diretas = ms, pendentes
+            pendentes = {}
+    return total, diretas, set(proc.stdout.split())
+
+
+# Bibliotecas que só a geração de PDF e a análise com I.A. usam; não devem
+# ser carregadas pelo import dos módulos das páginas.
+LAZY_MODULES = ("weasyprint", "matplotlib", "PIL", "requests", "openpyxl")
+
+
+@benchmark
+def startup(argv):
+    """Tempo de import de utils e do núcleo de cálculo, com orçamento máximo e relatório por dependência."""
+    parser = argparse.ArgumentParser(prog="benchmarks.py startup")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Tempo máximo de 'import utils'.")
+    parser.add_argument("--core-budget-ms", type=float, default=100.0, help="Tempo máximo de 'import orcamento.core'.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args(argv)
+
+    # O próprio Streamlit já carrega parte dessas bibliotecas (p. ex. PIL);
+    # só conta o que os módulos do projeto acrescentam.
+    _, _, base = _import_profile("streamlit")
+    falhas = []
+    for module, budget in (("utils", args.budget_ms), ("orcamento.core", args.core_budget_ms)):
+        # O menor tempo entre as repetições descarta o custo de cache frio do disco.
+        total, pacotes, carregados = min((_import_profile(module) for _ in range(args.repeat)), key=lambda r: r[0])
+        print(f"import {module}: {total:.0f} ms (orçamento {budget:.0f} ms)")
+        for nome, ms in sorted(pacotes.items(), key=lambda d: -d[1])[:args.top]:
+            print(f"    {nome:<32}{ms:>9.1f} ms")
+        if total > budget:
+            falhas.append(f"import {module} levou {total:.0f} ms (orçamento {budget:.0f} ms)")
+        for lazy in LAZY_MODULES:
+            if lazy in carregados and lazy not in base:
+                falhas.append(f"import {module} carregou '{lazy}', que deveria ser importado só no primeiro uso")
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(f"Uso: python benchmarks.py <{'|'.join(BENCHMARKS)}> [opções]")
+        sys.exit(2)
+    sys.exit(BENCHMARKS[sys.argv[1]](sys.argv[2:]))
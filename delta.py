@@ -0,0 +1,51 @@
+"""
+Diferenças estruturais entre documentos JSON (dicts, listas e escalares).
+
+Um patch é uma lista de operações {"op": "set"|"del", "path": [...], "value": ...},
+em que 'path' é a sequência de chaves (str) e índices (int) até o valor.
+"""
+import copy
+
+
+def diff(old, new, path=None):
+    """
+    Calcula o patch mínimo (por campo) que transforma 'old' em 'new'.
+    Os itens são sempre percorridos, sem comparar com '!=' antes: 1 == 1.0 e
+    True == 1, e uma troca só de tipo (mesmo dentro de um dict ou lista
+    "iguais") se perderia ao reconstruir o documento.
+    """
+    path = path or []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "set", "path": path + [key], "value": value})
+            else:
+                ops.extend(diff(old[key], value, path + [key]))
+        ops.extend({"op": "del", "path": path + [key]} for key in old if key not in new)
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for i, (a, b) in enumerate(zip(old, new)):
+            ops.extend(diff(a, b, path + [i]))
+        return ops
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "set", "path": path, "value": new}]
+
+
+def apply_patch(doc, ops):
+    """Aplica o patch sobre 'doc' (modificado no lugar) e devolve o resultado."""
+    for op in ops:
+        path = op["path"]
+        if not path:
+            doc = copy.deepcopy(op["value"])
+            continue
+        target = doc
+        for key in path[:-1]:
+            target = target[key]
+        if op["op"] == "set":
+            target[path[-1]] = copy.deepcopy(op["value"])
+        else:
+            del target[path[-1]]
+    return doc
@@ -0,0 +1,4 @@
+"""
+Pacote do estudo de viabilidade. 'orcamento.core' contém o modelo de dados
+e os cálculos, sem dependências de interface (Streamlit, PDF, gráficos).
+"""
@@ -0,0 +1,21 @@
+"""
+Núcleo de cálculo do estudo de viabilidade, em Python puro.
+
+Não depende de Streamlit, pandas ou bibliotecas de PDF, de modo que pode
+ser importado rapidamente por páginas, scripts, workers e testes.
+"""
+from .constantes import (
+    TIPOS_PAVIMENTO, DEFAULT_PAVIMENTO, ETAPAS_OBRA, DEFAULT_CUSTOS_INDIRETOS,
+    DEFAULT_CUSTOS_INDIRETOS_FIXOS, DEFAULT_CUSTOS_INDIRETOS_OBRA, DEFAULT_DURACAO_OBRA, CUB_DATA,
+    JANELAS_ETAPAS, DEFAULT_MESES_VENDA,
+)
+from .modelos import Pavimento, Unidade, CustosConfig, Projeto
+from .calculos import (
+    ResumoAreas, ResultadoFinanceiro,
+    calcular_areas, custo_direto, area_privativa_total, calcular_vgv, custo_indireto_venda,
+    custo_indireto_obra, custo_terreno, margem, resultado_financeiro, calcular_projeto,
+)
+from .redistribuicao import projetar, redistribuir
+from .grafo import GrafoCalculo, EstatisticasNo
+from .resultado import GRAFO_PROJETO, ResultadoProjeto, fontes_do_projeto
+from .importacao import ErroImportacao, ResultadoImportacao, importar_planilha, importar_em_lotes, mapear_tipo
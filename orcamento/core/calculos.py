@@ -0,0 +1,119 @@
+"""
+Cálculos de áreas, custos e resultado financeiro do empreendimento.
+
+Funções puras sobre os objetos de modelos.py (ou valores simples), sem
+estado de sessão nem dependências externas.
+"""
+from dataclasses import dataclass
+
+from .modelos import Projeto
+
+
+@dataclass(slots=True)
+class ResumoAreas:
+    area_total: float
+    area_equivalente: float
+    area_construida: float
+
+
+@dataclass(slots=True)
+class ResultadoFinanceiro:
+    vgv_total: float
+    custo_direto_total: float
+    custo_indireto_calculado: float
+    custo_indireto_obra_total: float
+    custo_terreno_total: float
+    valor_total_despesas: float
+    lucratividade_valor: float
+    lucratividade_percentual: float
+    area_privativa_total: float
+    area_construida_total: float
+    area_equivalente_total: float
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def calcular_areas(pavimentos):
+    """Soma as áreas total, equivalente e construída de uma lista de Pavimento."""
+    area_total = area_eq = area_constr = 0.0
+    for pav in pavimentos:
+        total = pav.area * pav.rep
+        area_total += total
+        area_eq += total * pav.coef
+        if pav.constr:
+            area_constr += total
+    return ResumoAreas(area_total, area_eq, area_constr)
+
+
+def custo_direto(area_equivalente, custo_area_privativa):
+    """Custo direto da obra: área equivalente × custo por m²."""
+    return area_equivalente * custo_area_privativa
+
+
+def area_privativa_total(unidades):
+    return sum(u.area_privativa_total for u in unidades)
+
+
+def calcular_vgv(area_privativa, preco_medio_venda_m2):
+    """Valor Geral de Vendas."""
+    return area_privativa * preco_medio_venda_m2
+
+
+def custo_indireto_venda(vgv, percentuais):
+    """Custos indiretos proporcionais ao VGV ({item: percentual})."""
+    return sum(vgv * (float(p) / 100) for p in percentuais.values())
+
+
+def custo_indireto_obra(custos_mensais, duracao_obra):
+    """Custos de administração da obra: soma mensal × duração (meses)."""
+    return sum(custos_mensais.values()) * duracao_obra
+
+
+def custo_terreno(area_terreno, custo_terreno_m2):
+    return area_terreno * custo_terreno_m2
+
+
+def margem(vgv, valor_total_despesas):
+    """Lucro bruto e margem (% do VGV)."""
+    lucro = vgv - valor_total_despesas
+    return lucro, (lucro / vgv) * 100 if vgv > 0 else 0
+
+
+def resultado_financeiro(vgv, custo_direto_total, custo_indireto_calculado, custo_terreno_total, custo_indireto_obra_total,
+                         area_privativa=0.0, area_construida=0.0, area_equivalente=0.0):
+    """Consolida os componentes de custo em despesas totais, lucro e margem."""
+    valor_total_despesas = custo_direto_total + custo_indireto_calculado + custo_terreno_total + custo_indireto_obra_total
+    lucro, percentual = margem(vgv, valor_total_despesas)
+    return ResultadoFinanceiro(
+        vgv_total=vgv,
+        custo_direto_total=custo_direto_total,
+        custo_indireto_calculado=custo_indireto_calculado,
+        custo_indireto_obra_total=custo_indireto_obra_total,
+        custo_terreno_total=custo_terreno_total,
+        valor_total_despesas=valor_total_despesas,
+        lucratividade_valor=lucro,
+        lucratividade_percentual=percentual,
+        area_privativa_total=area_privativa,
+        area_construida_total=area_construida,
+        area_equivalente_total=area_equivalente,
+    )
+
+
+def calcular_projeto(projeto):
+    """Resultado financeiro completo de um Projeto (ou do dicionário gravado)."""
+    if isinstance(projeto, dict):
+        projeto = Projeto.from_dict(projeto)
+    areas = calcular_areas(projeto.pavimentos)
+    area_priv = area_privativa_total(projeto.unidades)
+    vgv = calcular_vgv(area_priv, projeto.custos.preco_medio_venda_m2)
+    return resultado_financeiro(
+        vgv,
+        custo_direto(areas.area_equivalente, projeto.custos.custo_area_privativa),
+        custo_indireto_venda(vgv, projeto.custos_indiretos_percentuais),
+        custo_terreno(projeto.area_terreno, projeto.custos.custo_terreno_m2),
+        custo_indireto_obra(projeto.custos_indiretos_obra, projeto.duracao_obra),
+        area_privativa=area_priv,
+        area_construida=areas.area_construida,
+        area_equivalente=areas.area_equivalente,
+    )
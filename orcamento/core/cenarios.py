@@ -0,0 +1,126 @@
+"""
+Avaliação vetorizada do resultado financeiro de um projeto em muitos
+cenários (simulação, sensibilidade, grades e metas).
+
+Premissas reduz o projeto às grandezas das quais o resultado depende; avaliar
+aceita qualquer uma delas como array NumPy e calcula VGV, custo total, lucro e
+margem por broadcasting. No cenário base o resultado coincide com
+calculos.calcular_projeto (a menos do arredondamento da soma dos percentuais
+indiretos, que aqui é feita antes da multiplicação pelo VGV).
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .calculos import area_privativa_total, calcular_areas
+from .modelos import Projeto
+
+
+@dataclass(slots=True)
+class Premissas:
+    area_privativa: float
+    area_equivalente: float
+    area_terreno: float
+    preco_venda_m2: float
+    custo_m2: float
+    custo_terreno_m2: float
+    duracao_obra: float
+    # Percentuais por item (custos indiretos sobre o VGV e etapas do custo direto)
+    percentuais_indiretos: dict = field(default_factory=dict)
+    etapas_percentuais: dict = field(default_factory=dict)
+    # Custos mensais de administração da obra
+    custos_mensais: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_projeto(cls, projeto):
+        if isinstance(projeto, dict):
+            projeto = Projeto.from_dict(projeto)
+        return cls(
+            area_privativa=area_privativa_total(projeto.unidades),
+            area_equivalente=calcular_areas(projeto.pavimentos).area_equivalente,
+            area_terreno=projeto.area_terreno,
+            preco_venda_m2=projeto.custos.preco_medio_venda_m2,
+            custo_m2=projeto.custos.custo_area_privativa,
+            custo_terreno_m2=projeto.custos.custo_terreno_m2,
+            duracao_obra=projeto.duracao_obra,
+            percentuais_indiretos=dict(projeto.custos_indiretos_percentuais),
+            etapas_percentuais=dict(projeto.etapas_percentuais),
+            custos_mensais=dict(projeto.custos_indiretos_obra),
+        )
+
+    def chave(self):
+        """Tupla imutável com todos os valores, para uso como chave de cache."""
+        return tuple(
+            tuple(sorted(valor.items())) if isinstance(valor, dict) else valor
+            for valor in (getattr(self, nome) for nome in self.__slots__)
+        )
+
+    @classmethod
+    def from_chave(cls, chave):
+        """Reconstrói as premissas a partir de chave()."""
+        return cls(*(dict(valor) if isinstance(valor, tuple) else valor for valor in chave))
+
+    @property
+    def percentual_indireto(self):
+        return sum(self.percentuais_indiretos.values())
+
+    @property
+    def custo_mensal_obra(self):
+        return sum(self.custos_mensais.values())
+
+
+@dataclass(slots=True)
+class ResultadoCenarios:
+    vgv: np.ndarray
+    custo_total: np.ndarray
+    lucro: np.ndarray
+    margem: np.ndarray
+
+
+def avaliar(premissas, preco_venda_m2=None, custo_m2=None, custo_terreno_m2=None, duracao_obra=None,
+            percentual_indireto=None, custo_mensal_obra=None, fator_custo_direto=1.0):
+    """
+    Resultado financeiro com as premissas substituídas pelos valores dados
+    (escalares ou arrays; os arrays são combinados por broadcasting).
+    'fator_custo_direto' multiplica o custo direto (p. ex. 1.05 para um
+    aditivo de 5%).
+    """
+    def valor(dado, padrao):
+        return np.asarray(padrao if dado is None else dado, dtype=np.float64)
+
+    p = premissas
+    vgv = p.area_privativa * valor(preco_venda_m2, p.preco_venda_m2)
+    custo_direto = p.area_equivalente * valor(custo_m2, p.custo_m2) * fator_custo_direto
+    custo_indireto = vgv * (valor(percentual_indireto, p.percentual_indireto) / 100)
+    custo_terreno = p.area_terreno * valor(custo_terreno_m2, p.custo_terreno_m2)
+    custo_obra = valor(custo_mensal_obra, p.custo_mensal_obra) * valor(duracao_obra, p.duracao_obra)
+    custo_total = custo_direto + custo_indireto + custo_terreno + custo_obra
+    lucro = vgv - custo_total
+    margem = np.divide(lucro, vgv, out=np.zeros(np.broadcast(lucro, vgv).shape), where=vgv > 0) * 100
+    return ResultadoCenarios(vgv=vgv, custo_total=custo_total, lucro=lucro, margem=margem)
+
+
+# Premissas que podem ser usadas como eixos de uma grade de cenários
+EIXOS = {
+    "preco_venda_m2": "Preço de Venda / m² (R$)",
+    "custo_m2": "Custo de Construção / m² (R$)",
+    "custo_terreno_m2": "Custo do Terreno / m² (R$)",
+    "duracao_obra": "Duração da Obra (meses)",
+    "percentual_indireto": "Custos Indiretos (% do VGV)",
+}
+
+
+def grade(premissas, eixo_x, valores_x, eixo_y, valores_y):
+    """
+    Avalia todos os pares (x, y) de uma grade de duas premissas. O resultado
+    tem forma (len(valores_y), len(valores_x)): linhas variam y, colunas x.
+    """
+    if eixo_x == eixo_y:
+        raise ValueError("Os eixos da grade devem ser premissas diferentes.")
+    valores = {
+        eixo_x: np.asarray(valores_x, dtype=np.float64)[np.newaxis, :],
+        eixo_y: np.asarray(valores_y, dtype=np.float64)[:, np.newaxis],
+    }
+    resultado = avaliar(premissas, **valores)
+    forma = (len(valores_y), len(valores_x))
+    return ResultadoCenarios(*(np.broadcast_to(v, forma) for v in (resultado.vgv, resultado.custo_total, resultado.lucro, resultado.margem)))
@@ -0,0 +1,92 @@
+"""
+Constantes do domínio: tipos de pavimento com as faixas de coeficiente,
+etapas da obra e custos indiretos com faixas (mínimo, padrão, máximo) e
+janelas padrão das etapas no cronograma.
+"""
+
+TIPOS_PAVIMENTO = {
+    "Área Privativa (Autônoma)": (1.00, 1.00), "Áreas de lazer ambientadas": (2.00, 4.00), "Varandas": (0.75, 1.00),
+    "Terraços / Áreas Descobertas": (0.30, 0.60), "Garagem (Subsolo)": (0.50, 0.75), "Estacionamento (terreno)": (0.05, 0.10),
+    "Salas com Acabamento": (1.00, 1.00), "Salas sem Acabamento": (0.75, 0.90), "Loja sem Acabamento": (0.40, 0.60),
+    "Serviço (unifam. baixa, aberta)": (0.50, 0.50), "Barrilete / Cx D'água / Casa Máquinas": (0.50, 0.75),
+    "Piscinas": (0.50, 0.75), "Quintais / Calçadas / Jardins": (0.10, 0.30), "Projeção Terreno sem Benfeitoria": (0.00, 0.00),
+}
+DEFAULT_PAVIMENTO = {"nome": "Pavimento Tipo", "tipo": "Área Privativa (Autônoma)", "rep": 1, "coef": 1.00, "area": 100.0, "constr": True}
+
+ETAPAS_OBRA = {
+    "Serviços Preliminares e Fundações":        (7.0, 8.0, 9.0),
+    "Estrutura (Supraestrutura)":               (14.0, 16.0, 22.0),
+    "Vedações (Alvenaria)":                     (8.0, 10.0, 15.0),
+    "Cobertura e Impermeabilização":            (4.0, 5.0, 8.0),
+    "Revestimentos de Fachada":                 (5.0, 6.0, 10.0),
+    "Instalações (Elétrica e Hidráulica)":      (12.0, 15.0, 18.0),
+    "Esquadrias (Portas e Janelas)":            (6.0, 8.0, 12.0),
+    "Revestimentos de Piso":                    (8.0, 10.0, 15.0),
+    "Revestimentos de Parede":                  (6.0, 8.0, 12.0),
+    "Revestimentos de Forro":                   (3.0, 4.0, 6.0),
+    "Pintura":                                  (4.0, 5.0, 8.0),
+    "Serviços Complementares e Externos":       (3.0, 5.0, 10.0)
+}
+
+# Janela de execução de cada etapa no cronograma (início, fim), em % da
+# duração da obra. As janelas se sobrepõem como em uma obra vertical típica.
+JANELAS_ETAPAS = {
+    "Serviços Preliminares e Fundações":        (0.0, 20.0),
+    "Estrutura (Supraestrutura)":               (10.0, 55.0),
+    "Vedações (Alvenaria)":                     (30.0, 70.0),
+    "Cobertura e Impermeabilização":            (50.0, 75.0),
+    "Revestimentos de Fachada":                 (55.0, 90.0),
+    "Instalações (Elétrica e Hidráulica)":      (25.0, 90.0),
+    "Esquadrias (Portas e Janelas)":            (60.0, 95.0),
+    "Revestimentos de Piso":                    (60.0, 95.0),
+    "Revestimentos de Parede":                  (55.0, 90.0),
+    "Revestimentos de Forro":                   (65.0, 95.0),
+    "Pintura":                                  (75.0, 100.0),
+    "Serviços Complementares e Externos":       (85.0, 100.0)
+}
+
+DEFAULT_CUSTOS_INDIRETOS = {
+    "IRPJ/ CS/ PIS/ COFINS":        (3.0, 4.0, 6.0),
+    "Corretagem":                   (3.0, 3.61, 5.0),
+    "Publicidade":                  (0.5, 0.9, 2.0),
+    "Manutenção":                   (0.3, 0.5, 1.0),
+    "Custo Fixo da Incorporadora": (3.0, 4.0, 6.0),
+    "Assessoria Técnica":           (0.5, 0.7, 1.5),
+    "Projetos":                     (0.4, 0.52, 1.5),
+    "Licenças e Incorporação":      (0.1, 0.2, 0.5),
+    "Outorga Onerosa":              (0.0, 0.0, 10.0),
+    "Condomínio":                   (0.0, 0.0, 0.5),
+    "IPTU":                         (0.05, 0.07, 0.2),
+    "Preparação do Terreno":        (0.2, 0.33, 1.0),
+    "Financiamento Bancário":       (1.0, 1.9, 3.0),
+}
+DEFAULT_CUSTOS_INDIRETOS_FIXOS = {}
+DEFAULT_CUSTOS_INDIRETOS_OBRA = {
+    "Administração de Obra (Engenheiro/Arquiteto)": 15000.0,
+    "Mestre de Obras e Encarregados": 8000.0,
+    "Aluguel de Equipamentos (andaimes, betoneira, etc.)": 5000.0,
+    "Consumo de Energia": 1000.0,
+    "Consumo de Água": 500.0,
+    "Telefone e Internet": 300.0,
+    "Seguros e Licenças de Canteiro": 1200.0,
+    "Transporte de Materiais e Pessoas": 2500.0,
+    "Despesas de Escritório e Apoio": 800.0,
+}
+
+CUB_DATA = {
+    "R-1": {
+        "acabamento_baixo": 2000.00,
+        "acabamento_normal": 2500.00,
+        "acabamento_alto": 3000.00
+    },
+    "P-1": {
+        "acabamento_baixo": 1800.00,
+        "acabamento_normal": 2200.00,
+        "acabamento_alto": 2700.00
+    },
+}
+
+DEFAULT_DURACAO_OBRA = 12
+
+# Prazo de vendas (meses) usado para a velocidade padrão de cada tipo de unidade
+DEFAULT_MESES_VENDA = 24
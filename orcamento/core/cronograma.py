@@ -0,0 +1,207 @@
+"""
+Cronograma físico-financeiro: distribuição mensal do custo da obra.
+
+O custo direto de cada etapa (percentual da etapa × custo direto) é
+desembolsado dentro da janela da etapa (início e fim em % da duração, ver
+constantes.JANELAS_ETAPAS), seguindo uma curva acumulada: 'linear'
+(desembolso constante) ou 's' (lento no início e no fim da etapa). As
+janelas se sobrepõem, e a soma das etapas forma a curva S da obra. Os
+custos mensais de administração (custos_indiretos_obra) são somados em
+cada mês da obra.
+
+Os pesos de todos os meses, etapas e projetos são calculados de uma vez,
+por broadcasting, em um array (projetos × meses × etapas); projetos mais
+curtos que o mais longo do lote ficam com zeros nos meses excedentes.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .constantes import DEFAULT_CUSTOS_INDIRETOS_OBRA, DEFAULT_DURACAO_OBRA, ETAPAS_OBRA, JANELAS_ETAPAS
+from .lote import PavimentosLote, calcular_lote
+from .modelos import _janela, _percentual
+
+
+def _curva_linear(t):
+    return t
+
+
+def _curva_s(t):
+    return t * t * (3 - 2 * t)
+
+
+# Curvas acumuladas de desembolso dentro da janela: f(0) = 0, f(1) = 1
+CURVAS = {
+    "s": _curva_s,
+    "linear": _curva_linear,
+}
+
+
+def pesos_mensais(duracoes, janelas, curva="s", meses=None):
+    """
+    Fração do custo de cada etapa desembolsada em cada mês.
+
+    duracoes: duração da obra de cada projeto (P,), em meses.
+    janelas:  (início, fim) de cada etapa em % da duração, (E, 2) para todos
+              os projetos ou (P, E, 2) por projeto.
+    curva:    chave de CURVAS, única ou uma por projeto.
+    meses:    número de meses do resultado (padrão: a maior duração).
+
+    Devolve um array (P, meses, E) em que cada etapa soma 1 ao longo dos
+    meses. Etapas com janela vazia são desembolsadas no mês em que ocorrem.
+    """
+    duracoes = np.asarray(duracoes, dtype=np.float64)
+    num_projetos = len(duracoes)
+    janelas = np.clip(np.asarray(janelas, dtype=np.float64), 0.0, 100.0)
+    janelas = np.broadcast_to(janelas, (num_projetos, *janelas.shape[-2:]))
+    if meses is None:
+        meses = max(int(np.ceil(duracoes.max())) if num_projetos else 0, 1)
+
+    duracao = duracoes[:, np.newaxis]
+    inicio = np.minimum(janelas[..., 0], janelas[..., 1]) / 100 * duracao
+    fim = np.maximum(janelas[..., 0], janelas[..., 1]) / 100 * duracao
+    vazia = fim - inicio <= 0
+    inicio = np.where(vazia, np.minimum(np.floor(inicio), np.maximum(np.ceil(duracao) - 1, 0)), inicio)
+    fim = np.where(vazia, inicio + 1, fim)
+
+    # Posição relativa de cada limite de mês dentro da janela de cada etapa
+    limites = np.arange(meses + 1, dtype=np.float64)[np.newaxis, :, np.newaxis]
+    t = np.clip((limites - inicio[:, np.newaxis, :]) / (fim - inicio)[:, np.newaxis, :], 0.0, 1.0)
+
+    if isinstance(curva, str):
+        acumulado = CURVAS[curva](t)
+    else:
+        curva = np.asarray(curva)
+        acumulado = np.empty_like(t)
+        for nome in np.unique(curva):
+            selecao = curva == nome
+            acumulado[selecao] = CURVAS[nome](t[selecao])
+    return np.diff(acumulado, axis=1)
+
+
+@dataclass(slots=True)
+class Cronograma:
+    etapas: list
+    # Custo direto (R$) de cada etapa em cada mês: (meses, etapas)
+    custos: np.ndarray
+    # Custo de administração da obra (R$) em cada mês
+    administracao: np.ndarray
+
+    @property
+    def meses(self):
+        return len(self.administracao)
+
+    @property
+    def custo_direto_mensal(self):
+        return self.custos.sum(axis=1)
+
+    @property
+    def total_mensal(self):
+        return self.custo_direto_mensal + self.administracao
+
+    @property
+    def acumulado(self):
+        return np.cumsum(self.total_mensal)
+
+    @property
+    def percentual_acumulado(self):
+        acumulado = self.acumulado
+        total = acumulado[-1] if len(acumulado) else 0.0
+        return acumulado / total * 100 if total > 0 else np.zeros_like(acumulado)
+
+    def as_columns(self):
+        """Colunas da tabela mês a mês (para montar um DataFrame)."""
+        colunas = {"Mês": np.arange(1, self.meses + 1)}
+        colunas.update({etapa: self.custos[:, j] for j, etapa in enumerate(self.etapas)})
+        colunas.update({
+            "Administração da Obra": self.administracao,
+            "Total do Mês": self.total_mensal,
+            "Acumulado": self.acumulado,
+            "% Acumulado": self.percentual_acumulado,
+        })
+        return colunas
+
+
+@dataclass(slots=True)
+class CronogramaLote:
+    etapas: list
+    duracoes: np.ndarray
+    # (projetos, meses, etapas) e (projetos, meses)
+    custos: np.ndarray
+    administracao: np.ndarray
+
+    @property
+    def num_projetos(self):
+        return len(self.duracoes)
+
+    def projeto(self, i):
+        """Cronograma do projeto i, com os meses da sua própria duração."""
+        meses = max(int(np.ceil(self.duracoes[i])), 1)
+        return Cronograma(etapas=self.etapas, custos=self.custos[i, :meses], administracao=self.administracao[i, :meses])
+
+
+def calcular_cronogramas(custos_etapas, custos_mensais, duracoes, janelas, curva="s", etapas=None):
+    """
+    Cronogramas de um lote de projetos.
+
+    custos_etapas:  custo direto (R$) de cada etapa, (P, E).
+    custos_mensais: custo de administração da obra (R$/mês) de cada projeto, (P,).
+    duracoes, janelas, curva: como em pesos_mensais.
+    """
+    duracoes = np.asarray(duracoes, dtype=np.float64)
+    custos_etapas = np.asarray(custos_etapas, dtype=np.float64)
+    pesos = pesos_mensais(duracoes, janelas, curva)
+    meses = np.arange(pesos.shape[1], dtype=np.float64)
+    # Fração de cada mês dentro da obra (a última pode ser parcial)
+    fracao_mes = np.clip(duracoes[:, np.newaxis] - meses[np.newaxis, :], 0.0, 1.0)
+    return CronogramaLote(
+        etapas=list(etapas) if etapas is not None else list(ETAPAS_OBRA)[:custos_etapas.shape[1]],
+        duracoes=duracoes,
+        custos=pesos * custos_etapas[:, np.newaxis, :],
+        administracao=np.asarray(custos_mensais, dtype=np.float64)[:, np.newaxis] * fracao_mes,
+    )
+
+
+def cronograma_de_premissas(premissas, janelas=None, curva="s"):
+    """
+    Cronograma de um projeto a partir de cenarios.Premissas. 'janelas' é um
+    dict {etapa: (início, fim)} em % da duração (padrão: JANELAS_ETAPAS).
+    """
+    janelas = {**JANELAS_ETAPAS, **(janelas or {})}
+    etapas = list(premissas.etapas_percentuais)
+    custo_direto = premissas.area_equivalente * premissas.custo_m2
+    custos_etapas = np.array([[custo_direto * premissas.etapas_percentuais[e] / 100 for e in etapas]])
+    lote = calcular_cronogramas(
+        custos_etapas, [premissas.custo_mensal_obra], [premissas.duracao_obra],
+        np.array([_janela(janelas.get(e, (0.0, 100.0))) for e in etapas]).reshape(len(etapas), 2),
+        curva, etapas,
+    )
+    return lote.projeto(0)
+
+
+def cronogramas_de_projetos(projetos):
+    """
+    Cronogramas de vários projetos (dicts como gravados) em um só cálculo,
+    cada um com as suas janelas e curva (chave 'cronograma' do projeto).
+    As etapas são as de ETAPAS_OBRA seguidas das demais que aparecem nos
+    projetos (com janela de toda a obra); etapas ausentes em um projeto
+    custam zero nele.
+    """
+    etapas = list(dict.fromkeys([*ETAPAS_OBRA, *(e for p in projetos for e in p.get("etapas_percentuais", {}))]))
+    n = len(projetos)
+    custo_m2 = np.fromiter(((p.get("custos_config") or {}).get("custo_area_privativa", 4500.0) for p in projetos),
+                           dtype=np.float64, count=n)
+    custo_direto = calcular_lote(PavimentosLote.from_listas([p.get("pavimentos", []) for p in projetos], custo_m2)).custo_direto_total
+
+    percentuais = np.array([[_percentual(p.get("etapas_percentuais", {}).get(e, 0)) for e in etapas] for p in projetos],
+                           dtype=np.float64).reshape(n, len(etapas))
+    configs = [p.get("cronograma") or {} for p in projetos]
+    janelas = np.array([[_janela(c.get("janelas", {}).get(e, JANELAS_ETAPAS.get(e, (0.0, 100.0)))) for e in etapas] for c in configs],
+                       dtype=np.float64).reshape(n, len(etapas), 2)
+    mensais = np.fromiter((sum(p.get("custos_indiretos_obra", DEFAULT_CUSTOS_INDIRETOS_OBRA).values()) for p in projetos),
+                          dtype=np.float64, count=n)
+    duracoes = np.fromiter((p.get("duracao_obra", DEFAULT_DURACAO_OBRA) for p in projetos), dtype=np.float64, count=n)
+    return calcular_cronogramas(
+        custo_direto[:, np.newaxis] * percentuais / 100, mensais, duracoes, janelas,
+        [c.get("curva", "s") for c in configs], etapas,
+    )
@@ -0,0 +1,163 @@
+"""
+Fluxo de caixa mensal do empreendimento e seus indicadores (VPL, TIR,
+payback e exposição máxima de caixa).
+
+O mês 0 é o lançamento: pagamento do terreno e entrada das vendas. Os meses
+1 a D são a obra, com o custo direto e a administração distribuídos como no
+cronograma físico-financeiro (ver cronograma.py) e as parcelas das vendas
+recebidas em partes iguais. No mês D + 1 é recebido o saldo (chaves ou
+repasse). Os custos indiretos de venda são pagos junto com cada
+recebimento, na proporção do percentual indireto.
+
+Como em cenarios.avaliar, as premissas podem ser arrays: os fluxos de todos
+os cenários são montados por broadcasting em um array (cenários × meses) e
+a TIR é resolvida para todos de uma vez. A duração da obra define o número
+de meses e por isso é a mesma para todos os cenários de um lote. A soma do
+fluxo de cada cenário é o lucro calculado por cenarios.avaliar.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(slots=True)
+class CondicoesFluxo:
+    # Taxa mínima de atratividade, em % ao ano
+    taxa_desconto_anual: float = 12.0
+    # Percentuais do VGV recebidos no lançamento e em parcelas durante a obra;
+    # o restante é recebido no mês seguinte ao fim da obra
+    entrada: float = 10.0
+    parcelas_obra: float = 20.0
+
+
+def taxa_mensal(taxa_anual):
+    """Taxa mensal equivalente a uma taxa anual em %, como fração."""
+    return (1 + np.asarray(taxa_anual, dtype=np.float64) / 100) ** (1 / 12) - 1
+
+
+def perfis(cronograma, condicoes):
+    """
+    Frações mensais (meses 0 a D + 1) do VGV recebido, do custo direto e da
+    administração da obra, cada uma somando 1.
+    """
+    meses = cronograma.meses
+    recebimentos = np.zeros(meses + 2)
+    recebimentos[0] = condicoes.entrada / 100
+    recebimentos[1:meses + 1] = condicoes.parcelas_obra / 100 / meses
+    recebimentos[meses + 1] = 1 - recebimentos[:meses + 1].sum()
+
+    def distribuir(mensal):
+        perfil = np.zeros(meses + 2)
+        total = mensal.sum()
+        perfil[1:meses + 1] = mensal / total if total > 0 else 1 / meses
+        return perfil
+
+    return recebimentos, distribuir(cronograma.custo_direto_mensal), distribuir(cronograma.administracao)
+
+
+def fluxos(premissas, cronograma, condicoes=None, preco_venda_m2=None, custo_m2=None, custo_terreno_m2=None,
+           percentual_indireto=None, custo_mensal_obra=None, fator_custo_direto=1.0):
+    """
+    Fluxo de caixa mensal (R$, meses 0 a D + 1) com as premissas
+    substituídas pelos valores dados, escalares ou arrays como em
+    cenarios.avaliar. O resultado tem a forma dos arrays combinados seguida
+    do eixo dos meses.
+    """
+    def valor(dado, padrao):
+        return np.asarray(padrao if dado is None else dado, dtype=np.float64)[..., np.newaxis]
+
+    p = premissas
+    recebimentos, perfil_direto, perfil_obra = perfis(cronograma, condicoes or CondicoesFluxo())
+    vgv = p.area_privativa * valor(preco_venda_m2, p.preco_venda_m2)
+    custo_direto = p.area_equivalente * valor(custo_m2, p.custo_m2) * np.asarray(fator_custo_direto, dtype=np.float64)[..., np.newaxis]
+    custo_obra = valor(custo_mensal_obra, p.custo_mensal_obra) * p.duracao_obra
+    custo_terreno = p.area_terreno * valor(custo_terreno_m2, p.custo_terreno_m2)
+    fator_liquido = 1 - valor(percentual_indireto, p.percentual_indireto) / 100
+
+    fluxo = vgv * fator_liquido * recebimentos - custo_direto * perfil_direto - custo_obra * perfil_obra
+    fluxo[..., 0] -= custo_terreno[..., 0]
+    return fluxo
+
+
+def vpl(fluxos, taxa):
+    """Valor presente (no mês 0) de cada fluxo à taxa mensal 'taxa' (fração)."""
+    fluxos = np.asarray(fluxos, dtype=np.float64)
+    meses = np.arange(fluxos.shape[-1], dtype=np.float64)
+    return (fluxos * (1 + np.asarray(taxa, dtype=np.float64)[..., np.newaxis]) ** -meses).sum(axis=-1)
+
+
+def tir(fluxos, intervalo=(-0.9, 1.0), divisoes=100, tolerancia=1e-12, max_iter=200):
+    """
+    TIR mensal (fração) de cada fluxo. O VPL é avaliado em 'divisoes'
+    subintervalos de 'intervalo' para localizar as mudanças de sinal; com
+    mais de uma (fluxos não convencionais, com entrada no lançamento), vale
+    a raiz mais próxima de zero. A raiz é então refinada por bisseção
+    vetorizada: todos os fluxos avançam juntos a cada iteração. Fluxos sem
+    mudança de sinal no intervalo (p. ex. só saídas) resultam em NaN.
+    """
+    fluxos = np.asarray(fluxos, dtype=np.float64)
+    taxas = np.linspace(intervalo[0], intervalo[1], divisoes + 1)
+    # VPL de todos os fluxos em todas as taxas da varredura: um produto de matrizes
+    descontos = (1 + taxas[np.newaxis, :]) ** -np.arange(fluxos.shape[-1], dtype=np.float64)[:, np.newaxis]
+    sinais = np.sign(fluxos @ descontos)
+    mudancas = sinais[..., :-1] * sinais[..., 1:] <= 0
+    distancia = np.where(mudancas, np.abs((taxas[:-1] + taxas[1:]) / 2), np.inf)
+    escolhido = np.argmin(distancia, axis=-1)
+    sem_raiz = ~mudancas.any(axis=-1)
+
+    a, b = taxas[escolhido], taxas[escolhido + 1]
+    fa = vpl(fluxos, a)
+    for _ in range(max_iter):
+        meio = (a + b) / 2
+        fm = vpl(fluxos, meio)
+        mesmo_lado = np.sign(fm) == np.sign(fa)
+        a, fa = np.where(mesmo_lado, meio, a), np.where(mesmo_lado, fm, fa)
+        b = np.where(mesmo_lado, b, meio)
+        if np.all(b - a <= tolerancia):
+            break
+    return np.where(sem_raiz, np.nan, (a + b) / 2)
+
+
+def payback(fluxos):
+    """
+    Primeiro mês a partir do qual o saldo acumulado não volta a ficar
+    negativo (NaN se o saldo final for negativo).
+    """
+    acumulado = np.cumsum(fluxos, axis=-1)
+    negativos = acumulado < 0
+    meses = acumulado.shape[-1]
+    # Último mês negativo + 1 (0 quando nunca fica negativo)
+    ultimo = np.where(negativos.any(axis=-1), meses - np.argmax(negativos[..., ::-1], axis=-1), 0)
+    return np.where(acumulado[..., -1] < 0, np.nan, ultimo.astype(np.float64))
+
+
+@dataclass(slots=True)
+class IndicadoresFluxo:
+    vpl: np.ndarray
+    tir_mensal: np.ndarray
+    payback: np.ndarray
+    payback_descontado: np.ndarray
+    # Maior saldo acumulado negativo (em valor positivo) e o mês em que ocorre
+    exposicao_maxima: np.ndarray
+    mes_exposicao_maxima: np.ndarray
+
+    @property
+    def tir_anual(self):
+        """TIR em % ao ano."""
+        return ((1 + self.tir_mensal) ** 12 - 1) * 100
+
+
+def indicadores(fluxos, taxa_desconto_anual):
+    """VPL à taxa anual dada (%), TIR, paybacks e exposição máxima de cada fluxo."""
+    fluxos = np.asarray(fluxos, dtype=np.float64)
+    taxa = taxa_mensal(taxa_desconto_anual)
+    descontados = fluxos * (1 + taxa) ** -np.arange(fluxos.shape[-1], dtype=np.float64)
+    acumulado = np.cumsum(fluxos, axis=-1)
+    return IndicadoresFluxo(
+        vpl=descontados.sum(axis=-1),
+        tir_mensal=tir(fluxos),
+        payback=payback(fluxos),
+        payback_descontado=payback(descontados),
+        exposicao_maxima=np.maximum(-acumulado.min(axis=-1), 0.0),
+        mes_exposicao_maxima=np.argmin(acumulado, axis=-1),
+    )
@@ -0,0 +1,161 @@
+"""
+Grafo de cálculo com dependências declaradas e memoização por hash das
+entradas.
+
+Cada nó é uma função pura registrada com os nomes das suas entradas, que
+podem ser outros nós ou fontes (valores fornecidos a cada avaliação, como
+os pavimentos ou os percentuais indiretos). A chave de cache de uma fonte é
+o digest BLAKE2b do seu nome com o valor serializado; a de um nó, o digest
+do seu nome com as chaves das suas entradas. Assim, alterar uma fonte muda
+só as chaves dos nós que dependem dela, e os demais são servidos do cache
+sem recalcular nem mesmo as suas entradas. Com 256 bits, uma colisão (que
+serviria os valores de outro projeto) não é uma possibilidade prática, ao
+contrário do hash() de 64 bits.
+
+O grafo guarda, por nó, o número de avaliações, de acertos no cache e o
+tempo gasto calculando (só o do próprio nó, sem o das entradas).
+"""
+import hashlib
+import marshal
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+def assinatura(valor):
+    """
+    Bytes que identificam o valor de uma fonte. Dados como os gravados no
+    projeto (dicts, listas, números e textos) são serializados com marshal
+    na versão 2, que não registra referências compartilhadas nem strings
+    internadas e por isso depende só do valor; é bem mais rápido que
+    percorrer a estrutura em Python. Outros objetos recorrem ao pickle. Os
+    mesmos itens em outra ordem resultam apenas em uma falta no cache, nunca
+    em um acerto indevido.
+    """
+    try:
+        return marshal.dumps(valor, 2)
+    except ValueError:
+        return pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _digest(tipo, nome, conteudo):
+    return hashlib.blake2b(b"%s\0%s\0%s" % (tipo, nome.encode("utf-8"), conteudo), digest_size=32).digest()
+
+
+@dataclass(slots=True)
+class EstatisticasNo:
+    avaliacoes: int = 0
+    acertos: int = 0
+    # Segundos gastos calculando o nó (sem as entradas)
+    tempo_total: float = 0.0
+    tempo_ultimo: float = 0.0
+
+    @property
+    def calculos(self):
+        return self.avaliacoes - self.acertos
+
+    @property
+    def taxa_acertos(self):
+        return self.acertos / self.avaliacoes if self.avaliacoes else 0.0
+
+    @property
+    def tempo_medio(self):
+        return self.tempo_total / self.calculos if self.calculos else 0.0
+
+
+class GrafoCalculo:
+    """
+    Grafo de nós memoizados. Cada nó guarda até 'max_entradas' resultados
+    (os usados mais recentemente), o que permite alternar entre projetos ou
+    sessões sem perder o cache.
+    """
+    def __init__(self, max_entradas=32):
+        self.max_entradas = max_entradas
+        self._nos = {}
+        self._cache = {}
+        self.estatisticas = {}
+        self._lock = threading.Lock()
+
+    def no(self, nome, *entradas):
+        """Decorador que registra a função como o nó 'nome', calculado a partir de 'entradas'."""
+        def registrar(funcao):
+            self._nos[nome] = (entradas, funcao)
+            self._cache[nome] = OrderedDict()
+            self.estatisticas[nome] = EstatisticasNo()
+            return funcao
+        return registrar
+
+    @property
+    def nos(self):
+        return list(self._nos)
+
+    def fontes(self):
+        """Nomes das entradas que não são nós (devem ser fornecidas na avaliação)."""
+        return sorted({e for entradas, _ in self._nos.values() for e in entradas if e not in self._nos})
+
+    def dependentes(self, fonte):
+        """Nós que dependem, direta ou indiretamente, de 'fonte'."""
+        afetados = {fonte}
+        mudou = True
+        while mudou:
+            mudou = False
+            for nome, (entradas, _) in self._nos.items():
+                if nome not in afetados and afetados.intersection(entradas):
+                    afetados.add(nome)
+                    mudou = True
+        return [nome for nome in self._nos if nome in afetados]
+
+    def chave(self, nome, fontes, chaves=None):
+        """Digest (bytes) que identifica o valor de 'nome' para as fontes dadas."""
+        chaves = {} if chaves is None else chaves
+        if nome not in chaves:
+            if nome in self._nos:
+                entradas, _ = self._nos[nome]
+                # As chaves das entradas têm tamanho fixo: a concatenação não é ambígua
+                chaves[nome] = _digest(b"no", nome, b"".join(self.chave(e, fontes, chaves) for e in entradas))
+            elif nome in fontes:
+                chaves[nome] = _digest(b"fonte", nome, assinatura(fontes[nome]))
+            else:
+                raise KeyError(f"Fonte '{nome}' não fornecida")
+        return chaves[nome]
+
+    def avaliar(self, nome, fontes, chaves=None):
+        """
+        Valor de 'nome' para as fontes dadas ({fonte: valor}). 'chaves' é o
+        dicionário de chaves já calculadas, que pode ser reaproveitado entre
+        avaliações com as mesmas fontes.
+        """
+        if nome not in self._nos:
+            return fontes[nome]
+        chaves = {} if chaves is None else chaves
+        chave = self.chave(nome, fontes, chaves)
+        cache = self._cache[nome]
+        estatisticas = self.estatisticas[nome]
+        with self._lock:
+            estatisticas.avaliacoes += 1
+            if chave in cache:
+                cache.move_to_end(chave)
+                estatisticas.acertos += 1
+                return cache[chave]
+
+        entradas, funcao = self._nos[nome]
+        valores = [self.avaliar(e, fontes, chaves) for e in entradas]
+        inicio = time.perf_counter()
+        valor = funcao(*valores)
+        decorrido = time.perf_counter() - inicio
+        with self._lock:
+            estatisticas.tempo_total += decorrido
+            estatisticas.tempo_ultimo = decorrido
+            cache[chave] = valor
+            if len(cache) > self.max_entradas:
+                cache.popitem(last=False)
+        return valor
+
+    def limpar(self):
+        """Esvazia o cache e zera as estatísticas."""
+        with self._lock:
+            for nome in self._nos:
+                self._cache[nome].clear()
+                self.estatisticas[nome] = EstatisticasNo()
@@ -0,0 +1,357 @@
+"""
+Importação de pavimentos e tipos de unidade a partir de planilhas CSV ou
+XLSX (quadros de áreas vindos do projeto de arquitetura).
+
+O arquivo é lido em fluxo, linha a linha, sem carregá-lo inteiro: o CSV
+pelo módulo csv e o XLSX pelo openpyxl em modo somente leitura. As linhas
+são convertidas em lotes de 'tamanho_lote', de modo que a memória usada na
+leitura não cresce com o tamanho do arquivo.
+
+Cada tabela (o CSV, ou cada aba do XLSX) é identificada pelo cabeçalho: com
+uma coluna de quantidade é uma tabela de unidades, senão de pavimentos. Os
+nomes das colunas são comparados sem acentos, maiúsculas ou pontuação, e
+aceitam as variações mais comuns ('Área (m²)', 'Repetições', 'Qtde'...).
+
+Os tipos de pavimento são associados a TIPOS_PAVIMENTO pelo nome completo ou
+por um trecho que identifique um só tipo ('garagem', 'lazer') e o
+coeficiente é validado contra a faixa do tipo; vazio, recebe o mínimo da
+faixa. Linhas inválidas não interrompem a importação: viram um
+ErroImportacao com a aba, a linha e o motivo, e são ignoradas.
+"""
+import codecs
+import csv
+import functools
+import io
+import itertools
+import math
+import os
+import re
+import unicodedata
+import zipfile
+from dataclasses import dataclass, field
+
+from .constantes import TIPOS_PAVIMENTO, DEFAULT_PAVIMENTO
+
+FORMATOS = {".csv": "csv", ".txt": "csv", ".xlsx": "xlsx", ".xlsm": "xlsx"}
+
+# Nomes aceitos para cada coluna, já normalizados (ver _normalizar)
+COLUNAS_PAVIMENTOS = {
+    "nome": ("nome", "pavimento", "descricao", "nome do pavimento"),
+    "tipo": ("tipo", "tipo de pavimento", "tipo do pavimento"),
+    "rep": ("rep", "repeticoes", "repeticao", "repetir", "n de pavimentos"),
+    "coef": ("coef", "coeficiente", "coeficiente de equivalencia", "coef equivalencia"),
+    "area": ("area", "area m2", "area do pavimento", "area do pavimento m2", "area unitaria", "area unitaria m2"),
+    "constr": ("constr", "a c", "ac", "construido", "area construida", "entra na area construida"),
+}
+COLUNAS_UNIDADES = {
+    "nome": ("nome", "unidade", "tipo", "tipo de unidade", "tipologia"),
+    "quantidade": ("quantidade", "qtd", "qtde", "quant", "n de unidades", "unidades"),
+    "area_privativa": ("area privativa", "area privativa m2", "area privativa unitaria", "area", "area m2"),
+}
+
+ROTULOS = {"area": "área", "quantidade": "quantidade", "area_privativa": "área privativa"}
+
+VERDADEIROS = {"sim", "s", "x", "1", "true", "verdadeiro", "v", "yes", "y"}
+FALSOS = {"nao", "n", "0", "false", "falso", "f", "no", ""}
+
+
+def _normalizar(texto):
+    """Minúsculas, sem acentos e com a pontuação trocada por espaços."""
+    texto = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", texto).split())
+
+
+_TIPOS_NORMALIZADOS = {_normalizar(tipo): tipo for tipo in TIPOS_PAVIMENTO}
+
+
+@dataclass(slots=True)
+class ErroImportacao:
+    # Aba do XLSX (vazio no CSV) e número da linha na planilha, contando o cabeçalho
+    aba: str
+    linha: int
+    mensagem: str
+
+    def to_dict(self):
+        return {"aba": self.aba, "linha": self.linha, "mensagem": self.mensagem}
+
+
+@dataclass(slots=True)
+class LoteImportacao:
+    pavimentos: list = field(default_factory=list)
+    unidades: list = field(default_factory=list)
+    erros: list = field(default_factory=list)
+    # Linhas lidas no lote, inclusive as vazias e as com erro
+    linhas: int = 0
+
+
+@dataclass(slots=True)
+class ResultadoImportacao:
+    pavimentos: list = field(default_factory=list)
+    unidades: list = field(default_factory=list)
+    # Primeiros 'max_erros' erros; total_erros conta todos
+    erros: list = field(default_factory=list)
+    total_erros: int = 0
+    linhas: int = 0
+
+
+@functools.lru_cache(maxsize=1024)
+def mapear_tipo(texto):
+    """
+    Tipo de TIPOS_PAVIMENTO correspondente a 'texto': o de mesmo nome
+    (ignorando acentos e maiúsculas) ou o único cujo nome contém o texto.
+    Vazio resulta no tipo padrão. ValueError se nenhum ou vários tipos
+    corresponderem. Memorizada: uma planilha repete poucos textos de tipo.
+    """
+    chave = _normalizar(texto) if texto is not None else ""
+    if not chave:
+        return DEFAULT_PAVIMENTO["tipo"]
+    if chave in _TIPOS_NORMALIZADOS:
+        return _TIPOS_NORMALIZADOS[chave]
+    candidatos = [tipo for normalizado, tipo in _TIPOS_NORMALIZADOS.items() if chave in normalizado]
+    if len(candidatos) == 1:
+        return candidatos[0]
+    if candidatos:
+        raise ValueError(f"tipo '{texto}' é ambíguo ({', '.join(candidatos)})")
+    raise ValueError(f"tipo '{texto}' não corresponde a nenhum tipo de pavimento")
+
+
+# Pontos só como separadores de milhar (pt-BR): 1.234, 12.345.678
+_MILHARES = re.compile(r"[+-]?[1-9]\d{0,2}(\.\d{3})+")
+
+
+def _numero(valor, coluna):
+    """
+    Número de uma célula: aceita 1234.5, 1.234,5 e 1234,5. Sem vírgula, pontos
+    seguidos de grupos de exatamente três dígitos são separadores de milhar
+    ('1.234' é 1234, como no Excel em português); '0.600' e '1.5' são decimais.
+    """
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool) and math.isfinite(valor):
+        return float(valor)
+    texto = str(valor).strip().replace(" ", "").replace("\xa0", "")
+    if "," in texto:
+        texto = texto.replace(".", "").replace(",", ".") if texto.rfind(",") > texto.rfind(".") else texto.replace(",", "")
+    elif _MILHARES.fullmatch(texto):
+        texto = texto.replace(".", "")
+    try:
+        numero = float(texto)
+    except ValueError:
+        numero = math.nan
+    if not math.isfinite(numero):
+        raise ValueError(f"{coluna} '{valor}' não é um número")
+    return numero
+
+
+def _inteiro(valor, coluna, minimo):
+    numero = _numero(valor, coluna)
+    if numero != int(numero) or numero < minimo:
+        raise ValueError(f"{coluna} '{valor}' deve ser um inteiro maior ou igual a {minimo}")
+    return int(numero)
+
+
+@functools.lru_cache(maxsize=256)
+def _logico(valor):
+    if isinstance(valor, bool):
+        return valor
+    chave = _normalizar(valor)
+    if chave in VERDADEIROS:
+        return True
+    if chave in FALSOS:
+        return False
+    raise ValueError(f"A.C. '{valor}' deve ser sim ou não")
+
+
+def _vazio(valor):
+    return valor is None or (isinstance(valor, str) and not valor.strip())
+
+
+def converter_pavimento(celulas):
+    """Pavimento (dict, como gravado) a partir de {coluna: valor da célula}. ValueError se inválido."""
+    tipo = mapear_tipo(celulas.get("tipo"))
+    minimo, maximo = TIPOS_PAVIMENTO[tipo]
+    coef = celulas.get("coef")
+    coef = minimo if _vazio(coef) else _numero(coef, "coeficiente")
+    if not minimo - 1e-9 <= coef <= maximo + 1e-9:
+        raise ValueError(f"coeficiente {coef:g} fora da faixa {minimo:.2f}–{maximo:.2f} de '{tipo}'")
+    if _vazio(celulas.get("area")):
+        raise ValueError("área não informada")
+    area = _numero(celulas["area"], "área")
+    if area < 0:
+        raise ValueError(f"área {area:g} negativa")
+    rep = celulas.get("rep")
+    nome = celulas.get("nome")
+    return {
+        "nome": DEFAULT_PAVIMENTO["nome"] if _vazio(nome) else str(nome).strip(),
+        "tipo": tipo,
+        "rep": DEFAULT_PAVIMENTO["rep"] if _vazio(rep) else _inteiro(rep, "repetições", 1),
+        "coef": coef,
+        "area": area,
+        "constr": DEFAULT_PAVIMENTO["constr"] if _vazio(celulas.get("constr")) else _logico(celulas["constr"]),
+    }
+
+
+def converter_unidade(celulas, numero):
+    """Tipo de unidade (dict, como gravado); 'numero' dá nome às unidades sem nome. ValueError se inválido."""
+    if _vazio(celulas.get("quantidade")):
+        raise ValueError("quantidade não informada")
+    quantidade = _inteiro(celulas["quantidade"], "quantidade", 1)
+    if _vazio(celulas.get("area_privativa")):
+        raise ValueError("área privativa não informada")
+    area = _numero(celulas["area_privativa"], "área privativa")
+    if area < 0:
+        raise ValueError(f"área privativa {area:g} negativa")
+    nome = celulas.get("nome")
+    return {
+        "nome": f"Unidade {numero}" if _vazio(nome) else str(nome).strip(),
+        "quantidade": quantidade,
+        "area_privativa": area,
+        "area_privativa_total": quantidade * area,
+    }
+
+
+def _formato(nome):
+    formato = FORMATOS.get(os.path.splitext(str(nome or "").lower())[1])
+    if formato is None:
+        raise ValueError(f"Formato de planilha não suportado: '{nome}' (use CSV ou XLSX)")
+    return formato
+
+
+def _ler_csv(linhas, separador):
+    try:
+        yield from csv.reader(linhas, delimiter=separador)
+    except csv.Error as e:
+        raise ValueError(f"CSV inválido: {e}") from e
+
+
+def _cp1252_no_utf8(erro):
+    """
+    Tratador de erros de decodificação: bytes inválidos em UTF-8 são lidos
+    como Windows-1252. A detecção do encoding só vê o início do arquivo, e um
+    "Térreo" gravado pelo Excel milhares de linhas adiante não pode derrubar a
+    importação inteira.
+    """
+    if not isinstance(erro, UnicodeDecodeError):
+        raise erro
+    return erro.object[erro.start:erro.end].decode("cp1252", errors="replace"), erro.end
+
+
+codecs.register_error("importacao.cp1252", _cp1252_no_utf8)
+
+
+def _linhas_csv(arquivo):
+    """
+    Tabelas (uma só) de um CSV binário: o encoding (UTF-8 ou, na falta,
+    Windows-1252, o do Excel em português) é detectado no início do arquivo
+    e o separador (';', ',' ou tabulação) no cabeçalho. Bytes inválidos em
+    UTF-8 mais adiante são lidos como Windows-1252 (ver _cp1252_no_utf8).
+    """
+    inicio = arquivo.tell()
+    amostra = arquivo.read(1 << 16)
+    arquivo.seek(inicio)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(amostra, final=False)
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError:
+        encoding = "cp1252"
+    texto = io.TextIOWrapper(arquivo, encoding=encoding, errors="importacao.cp1252", newline="")
+    try:
+        cabecalho = texto.readline()
+        separador = max(";,\t", key=cabecalho.count)
+        yield "", _ler_csv(itertools.chain([cabecalho], texto), separador)
+    finally:
+        # Devolve o arquivo ao chamador sem fechá-lo
+        texto.detach()
+
+
+def _linhas_xlsx(arquivo):
+    """Tabelas (uma por aba) de um XLSX, lido em modo somente leitura."""
+    try:
+        import openpyxl
+    except ImportError as e:
+        raise ImportError("A importação de .xlsx requer o pacote 'openpyxl' (pip install openpyxl).") from e
+    try:
+        livro = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, KeyError, openpyxl.utils.exceptions.InvalidFileException) as e:
+        raise ValueError(f"XLSX inválido: {e}") from e
+    try:
+        for aba in livro.worksheets:
+            yield aba.title, aba.iter_rows(values_only=True)
+    finally:
+        livro.close()
+
+
+def _colunas(cabecalho):
+    """
+    ('pavimentos' ou 'unidades', {índice da coluna: campo}) a partir do
+    cabeçalho; colunas não reconhecidas são ignoradas.
+    """
+    normalizados = [_normalizar(c) if c is not None else "" for c in cabecalho]
+    tipo_tabela = "unidades" if any(n in COLUNAS_UNIDADES["quantidade"] for n in normalizados) else "pavimentos"
+    aliases = COLUNAS_UNIDADES if tipo_tabela == "unidades" else COLUNAS_PAVIMENTOS
+    campos = {}
+    for indice, normalizado in enumerate(normalizados):
+        for campo, nomes in aliases.items():
+            if normalizado in nomes and campo not in campos.values():
+                campos[indice] = campo
+                break
+    return tipo_tabela, campos
+
+
+def importar_em_lotes(arquivo, nome=None, tamanho_lote=5000):
+    """
+    Lê a planilha 'arquivo' (caminho ou arquivo binário, como o de
+    st.file_uploader) em fluxo e gera um LoteImportacao a cada
+    'tamanho_lote' linhas. O formato vem da extensão de 'nome' (padrão: o
+    nome do arquivo).
+    """
+    nome = nome or getattr(arquivo, "name", arquivo)
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, "rb") as f:
+            yield from importar_em_lotes(f, nome, tamanho_lote)
+        return
+
+    tabelas = _linhas_csv(arquivo) if _formato(nome) == "csv" else _linhas_xlsx(arquivo)
+    lote = LoteImportacao()
+    unidades_lidas = 0
+    for aba, linhas in tabelas:
+        campos = None
+        for numero, linha in enumerate(linhas, start=1):
+            lote.linhas += 1
+            if all(_vazio(v) for v in linha):
+                pass
+            elif campos is None:
+                tipo_tabela, campos = _colunas(linha)
+                obrigatorios = ("quantidade", "area_privativa") if tipo_tabela == "unidades" else ("area",)
+                faltando = [ROTULOS[c] for c in obrigatorios if c not in campos.values()]
+                if faltando:
+                    lote.erros.append(ErroImportacao(aba, numero, f"cabeçalho sem a coluna de {' e '.join(faltando)}; tabela ignorada"))
+                    break
+            else:
+                celulas = {campo: linha[i] for i, campo in campos.items() if i < len(linha)}
+                try:
+                    if tipo_tabela == "unidades":
+                        lote.unidades.append(converter_unidade(celulas, unidades_lidas + 1))
+                        unidades_lidas += 1
+                    else:
+                        lote.pavimentos.append(converter_pavimento(celulas))
+                except ValueError as e:
+                    lote.erros.append(ErroImportacao(aba, numero, str(e)))
+            if lote.linhas >= tamanho_lote:
+                yield lote
+                lote = LoteImportacao()
+    if lote.linhas:
+        yield lote
+
+
+def importar_planilha(arquivo, nome=None, tamanho_lote=5000, max_erros=1000):
+    """
+    Importa a planilha inteira (ver importar_em_lotes), guardando no
+    máximo 'max_erros' erros.
+    """
+    resultado = ResultadoImportacao()
+    for lote in importar_em_lotes(arquivo, nome, tamanho_lote):
+        resultado.pavimentos.extend(lote.pavimentos)
+        resultado.unidades.extend(lote.unidades)
+        resultado.erros.extend(lote.erros[:max_erros - len(resultado.erros)])
+        resultado.total_erros += len(lote.erros)
+        resultado.linhas += lote.linhas
+    return resultado
@@ -0,0 +1,196 @@
+"""
+Cálculo vetorizado (NumPy) de áreas, custos e resultado para muitos projetos.
+
+Os pavimentos de todos os projetos ficam em colunas planas (area, rep,
+coef, constr) e 'offsets' marca onde começa cada projeto: os pavimentos do
+projeto i são as linhas offsets[i]:offsets[i + 1].
+
+Os totais por projeto são somados na mesma ordem que calculos.calcular_areas
+(pavimento a pavimento, da esquerda para a direita), de modo que os
+resultados são idênticos bit a bit aos do cálculo de um projeto só.
+calcular_portfolio estende o mesmo esquema a unidades, custos indiretos e
+administração da obra, produzindo o resultado financeiro de cada projeto.
+
+Este módulo depende de NumPy e por isso não é reexportado por
+orcamento.core; importe-o diretamente: from orcamento.core.lote import ...
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .constantes import DEFAULT_CUSTOS_INDIRETOS_OBRA, DEFAULT_DURACAO_OBRA
+from .modelos import _percentual
+
+
+@dataclass(slots=True)
+class PavimentosLote:
+    area: np.ndarray
+    rep: np.ndarray
+    coef: np.ndarray
+    constr: np.ndarray
+    offsets: np.ndarray
+    # Custo por m² de área equivalente, um valor por projeto
+    custo_area_privativa: np.ndarray
+
+    @classmethod
+    def from_listas(cls, listas, custos_area_privativa):
+        """
+        Monta o lote a partir de uma lista de listas de pavimentos (dicts,
+        como gravados no projeto) e do custo por m² de cada projeto.
+        """
+        tamanhos = np.fromiter((len(pavs) for pavs in listas), dtype=np.int64, count=len(listas))
+        offsets = np.zeros(len(listas) + 1, dtype=np.int64)
+        np.cumsum(tamanhos, out=offsets[1:])
+        linhas = [p for pavs in listas for p in pavs]
+        n = len(linhas)
+        return cls(
+            area=np.fromiter((p.get("area", 0) for p in linhas), dtype=np.float64, count=n),
+            rep=np.fromiter((p.get("rep", 0) for p in linhas), dtype=np.float64, count=n),
+            coef=np.fromiter((p.get("coef", 0) for p in linhas), dtype=np.float64, count=n),
+            constr=np.fromiter((bool(p.get("constr", True)) for p in linhas), dtype=bool, count=n),
+            offsets=offsets,
+            custo_area_privativa=np.asarray(custos_area_privativa, dtype=np.float64),
+        )
+
+    @property
+    def num_projetos(self):
+        return len(self.offsets) - 1
+
+
+@dataclass(slots=True)
+class ResultadoLote:
+    # Por pavimento (linhas do lote)
+    area_total: np.ndarray
+    area_eq: np.ndarray
+    area_constr: np.ndarray
+    custo_direto: np.ndarray
+    # Por projeto
+    area_total_projeto: np.ndarray
+    area_equivalente_total: np.ndarray
+    area_construida_total: np.ndarray
+    custo_direto_total: np.ndarray
+
+
+def _projeto_de_cada_linha(offsets):
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def somar_segmentos(valores, offsets):
+    """
+    Soma 'valores' por projeto, acumulando da primeira à última linha de
+    cada segmento (a mesma ordem de uma soma em Python). A iteração é sobre
+    a posição dentro do segmento; cada passo soma uma coluna de todos os
+    projetos de uma vez. Projetos sem linhas somam 0.
+    """
+    totais = np.zeros(len(offsets) - 1, dtype=np.float64)
+    if len(valores) == 0:
+        return totais
+    projeto = _projeto_de_cada_linha(offsets)
+    posicao = np.arange(len(valores)) - offsets[projeto]
+    ordem = np.argsort(posicao, kind="stable")
+    limites = np.zeros(int(posicao.max()) + 2, dtype=np.int64)
+    np.cumsum(np.bincount(posicao), out=limites[1:])
+    valores, projeto = valores[ordem], projeto[ordem]
+    for k in range(len(limites) - 1):
+        fatia = slice(limites[k], limites[k + 1])
+        totais[projeto[fatia]] += valores[fatia]
+    return totais
+
+
+def calcular_lote(lote):
+    """Áreas e custo direto de todos os pavimentos e totais por projeto."""
+    area_total = lote.area * lote.rep
+    area_eq = area_total * lote.coef
+    area_constr = np.where(lote.constr, area_total, 0.0)
+    custo_linha = lote.custo_area_privativa[_projeto_de_cada_linha(lote.offsets)]
+    area_eq_projeto = somar_segmentos(area_eq, lote.offsets)
+    return ResultadoLote(
+        area_total=area_total,
+        area_eq=area_eq,
+        area_constr=area_constr,
+        custo_direto=area_eq * custo_linha,
+        area_total_projeto=somar_segmentos(area_total, lote.offsets),
+        area_equivalente_total=area_eq_projeto,
+        area_construida_total=somar_segmentos(area_constr, lote.offsets),
+        # Como em calculos.custo_direto: área equivalente total × custo por m²
+        custo_direto_total=area_eq_projeto * lote.custo_area_privativa,
+    )
+
+
+# --- PORTFÓLIO ---
+
+def _colunas(listas, valor):
+    """Achata 'listas' aplicando 'valor' a cada elemento; devolve (valores, offsets)."""
+    offsets = np.zeros(len(listas) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter((len(l) for l in listas), dtype=np.int64, count=len(listas)), out=offsets[1:])
+    valores = np.fromiter((valor(x) for l in listas for x in l), dtype=np.float64, count=int(offsets[-1]))
+    return valores, offsets
+
+
+@dataclass(slots=True)
+class ResultadoPortfolio:
+    id: np.ndarray
+    nome: list
+    area_privativa: np.ndarray
+    area_construida: np.ndarray
+    vgv: np.ndarray
+    custo_direto: np.ndarray
+    custo_indireto: np.ndarray
+    custo_indireto_obra: np.ndarray
+    custo_terreno: np.ndarray
+    custo_total: np.ndarray
+    lucro: np.ndarray
+    margem: np.ndarray
+
+    def as_columns(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def calcular_portfolio(projetos):
+    """
+    VGV, custos, lucro e margem de todos os projetos (dicts como gravados)
+    em uma passada vetorizada. Reproduz exatamente calculos.calcular_projeto
+    aplicado a cada projeto.
+    """
+    n = len(projetos)
+
+    def coluna(valor):
+        return np.fromiter((valor(p) for p in projetos), dtype=np.float64, count=n)
+
+    custos = [p.get("custos_config") or {} for p in projetos]
+    custo_m2 = np.fromiter((c.get("custo_area_privativa", 4500.0) for c in custos), dtype=np.float64, count=n)
+    preco_m2 = np.fromiter((c.get("preco_medio_venda_m2", 10000.0) for c in custos), dtype=np.float64, count=n)
+    terreno_m2 = np.fromiter((c.get("custo_terreno_m2", 2500.0) for c in custos), dtype=np.float64, count=n)
+
+    areas = calcular_lote(PavimentosLote.from_listas([p.get("pavimentos", []) for p in projetos], custo_m2))
+
+    unidades, offsets = _colunas([p.get("unidades", []) for p in projetos],
+                                 lambda u: u.get("quantidade", 0) * u.get("area_privativa", 0.0))
+    area_privativa = somar_segmentos(unidades, offsets)
+    vgv = area_privativa * preco_m2
+
+    percentuais, offsets = _colunas([list(p.get("custos_indiretos_percentuais", {}).values()) for p in projetos], _percentual)
+    custo_indireto = somar_segmentos(vgv[_projeto_de_cada_linha(offsets)] * (percentuais / 100), offsets)
+
+    mensais, offsets = _colunas([list(p.get("custos_indiretos_obra", DEFAULT_CUSTOS_INDIRETOS_OBRA).values()) for p in projetos], float)
+    custo_indireto_obra = somar_segmentos(mensais, offsets) * coluna(lambda p: p.get("duracao_obra", DEFAULT_DURACAO_OBRA))
+
+    custo_terreno = coluna(lambda p: p.get("area_terreno", 0)) * terreno_m2
+    custo_total = areas.custo_direto_total + custo_indireto + custo_terreno + custo_indireto_obra
+    lucro = vgv - custo_total
+    margem = np.divide(lucro, vgv, out=np.zeros(n), where=vgv > 0) * 100
+
+    return ResultadoPortfolio(
+        id=np.fromiter((p["id"] for p in projetos), dtype=np.int64, count=n),
+        nome=[p.get("nome", "") for p in projetos],
+        area_privativa=area_privativa,
+        area_construida=areas.area_construida_total,
+        vgv=vgv,
+        custo_direto=areas.custo_direto_total,
+        custo_indireto=custo_indireto,
+        custo_indireto_obra=custo_indireto_obra,
+        custo_terreno=custo_terreno,
+        custo_total=custo_total,
+        lucro=lucro,
+        margem=margem,
+    )
@@ -0,0 +1,126 @@
+"""
+Busca de metas (goal seek): o valor de uma premissa que leva o projeto a uma
+margem (%) ou lucro (R$) desejado, mantidas as demais premissas.
+
+Com as demais premissas fixas, o lucro é linear em cada premissa de
+cenarios.EIXOS e a margem é linear em todas exceto o preço de venda (em que
+vale margem = (1 - i) - K / VGV); todas têm solução em forma fechada.
+resolver_numericamente (bisseção vetorizada sobre um intervalo) atende as
+premissas sem forma fechada registrada (p. ex. o custo mensal total de
+administração) e serve para conferir as demais.
+
+As soluções são memorizadas por estado do projeto (Premissas.chave()).
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from .cenarios import EIXOS, Premissas, avaliar
+
+
+def _componentes(p):
+    vgv = p.area_privativa * p.preco_venda_m2
+    return {
+        "vgv": vgv,
+        "i": p.percentual_indireto / 100,
+        "direto": p.area_equivalente * p.custo_m2,
+        "terreno": p.area_terreno * p.custo_terreno_m2,
+        "obra": p.custo_mensal_obra * p.duracao_obra,
+    }
+
+
+def _lucro_alvo(c, metas, metrica):
+    """Lucro (R$) que corresponde às metas, com o VGV atual."""
+    return metas / 100 * c["vgv"] if metrica == "margem" else metas
+
+
+def _preco(p, metas, metrica):
+    c = _componentes(p)
+    fixos = c["direto"] + c["terreno"] + c["obra"]
+    if metrica == "margem":
+        # m = (1 - i) - fixos / (A·P)  =>  P = fixos / (A·((1 - i) - m))
+        return fixos / (p.area_privativa * ((1 - c["i"]) - metas / 100))
+    # L = A·P·(1 - i) - fixos
+    return (metas + fixos) / (p.area_privativa * (1 - c["i"]))
+
+
+def _linear(parcela, divisor):
+    """Premissa que entra só na parcela de custo 'parcela' = divisor × premissa."""
+    def resolver(p, metas, metrica):
+        c = _componentes(p)
+        outros = c["direto"] + c["terreno"] + c["obra"] - c[parcela]
+        return (c["vgv"] * (1 - c["i"]) - outros - _lucro_alvo(c, metas, metrica)) / divisor(p)
+    return resolver
+
+
+def _percentual_indireto(p, metas, metrica):
+    c = _componentes(p)
+    fixos = c["direto"] + c["terreno"] + c["obra"]
+    return (1 - (fixos + _lucro_alvo(c, metas, metrica)) / c["vgv"]) * 100
+
+
+FORMAS_FECHADAS = {
+    "preco_venda_m2": _preco,
+    "custo_m2": _linear("direto", lambda p: p.area_equivalente),
+    "custo_terreno_m2": _linear("terreno", lambda p: p.area_terreno),
+    "duracao_obra": _linear("obra", lambda p: p.custo_mensal_obra),
+    "percentual_indireto": _percentual_indireto,
+}
+
+
+def resolver_numericamente(premissas, variavel, metas, intervalo, metrica="margem", tolerancia=1e-9, max_iter=200):
+    """
+    Raiz de avaliar(...)[metrica] = meta para cada meta, por bisseção
+    vetorizada em 'intervalo' (a, b). Metas sem mudança de sinal no intervalo
+    resultam em NaN.
+    """
+    metas = np.asarray(metas, dtype=np.float64)
+    a = np.full(metas.shape, float(intervalo[0]))
+    b = np.full(metas.shape, float(intervalo[1]))
+
+    def f(x):
+        return getattr(avaliar(premissas, **{variavel: x}), metrica) - metas
+
+    fa = f(a)
+    sem_raiz = np.sign(fa) == np.sign(f(b))
+    for _ in range(max_iter):
+        meio = (a + b) / 2
+        fm = f(meio)
+        mesmo_lado = np.sign(fm) == np.sign(fa)
+        a, fa = np.where(mesmo_lado, meio, a), np.where(mesmo_lado, fm, fa)
+        b = np.where(mesmo_lado, b, meio)
+        if np.all(np.abs(b - a) <= tolerancia * np.maximum(1.0, np.abs(a))):
+            break
+    return np.where(sem_raiz, np.nan, (a + b) / 2)
+
+
+# Premissas que podem ser resolvidas: as de forma fechada e as demais
+# grandezas aceitas por cenarios.avaliar
+VARIAVEIS = (*EIXOS, "custo_mensal_obra")
+
+
+@lru_cache(maxsize=256)
+def _resolver(chave, variavel, metas, metrica):
+    premissas = Premissas.from_chave(chave)
+    metas = np.asarray(metas, dtype=np.float64)
+    if variavel in FORMAS_FECHADAS:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            valores = FORMAS_FECHADAS[variavel](premissas, metas, metrica)
+    else:
+        base = getattr(premissas, variavel)
+        valores = resolver_numericamente(premissas, variavel, metas, (0.0, max(abs(base), 1.0) * 1e3), metrica)
+    # Soluções sem sentido físico (negativas, infinitas) não são metas atingíveis
+    valores = np.where(np.isfinite(valores) & (valores >= 0), valores, np.nan)
+    valores.flags.writeable = False
+    return valores
+
+
+def resolver_metas(premissas, variavel, metas, metrica="margem"):
+    """
+    Valor de 'variavel' (uma das VARIAVEIS) necessário para
+    atingir cada meta de 'metrica' ('margem' em % ou 'lucro' em R$). Devolve
+    um array com uma solução por meta (NaN quando a meta não é atingível).
+    """
+    if variavel not in VARIAVEIS:
+        raise ValueError(f"Premissa desconhecida: {variavel}")
+    return _resolver(premissas.chave(), variavel, tuple(float(m) for m in np.atleast_1d(metas)), metrica)
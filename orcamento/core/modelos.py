@@ -0,0 +1,124 @@
+"""
+Objetos de domínio do estudo de viabilidade.
+
+São dataclasses com __slots__, construídas a partir do dicionário do projeto
+gravado (from_dict) e usadas pelas funções de cálculo de calculos.py.
+"""
+from dataclasses import dataclass, field
+
+from .constantes import DEFAULT_CUSTOS_INDIRETOS_OBRA, DEFAULT_DURACAO_OBRA, DEFAULT_MESES_VENDA, JANELAS_ETAPAS
+
+
+def _percentual(valor):
+    """Aceita tanto {'percentual': x, 'fonte': ...} quanto o valor puro."""
+    return float(valor.get("percentual", 0) if isinstance(valor, dict) else valor)
+
+
+def _janela(valor):
+    """Aceita tanto {'inicio': a, 'fim': b} quanto o par (a, b), em % da duração."""
+    if isinstance(valor, dict):
+        return float(valor.get("inicio", 0)), float(valor.get("fim", 100))
+    return float(valor[0]), float(valor[1])
+
+
+@dataclass(slots=True)
+class Pavimento:
+    nome: str
+    tipo: str
+    rep: int
+    coef: float
+    area: float
+    constr: bool = True
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d.get("nome", ""), d.get("tipo", ""), d["rep"], d["coef"], d["area"], d.get("constr", True))
+
+    @property
+    def area_total(self):
+        return self.area * self.rep
+
+    @property
+    def area_eq(self):
+        return self.area_total * self.coef
+
+    @property
+    def area_constr(self):
+        """Área que entra na área construída (zero se o pavimento não é construído)."""
+        return self.area_total if self.constr else 0.0
+
+
+@dataclass(slots=True)
+class Unidade:
+    nome: str
+    quantidade: int
+    area_privativa: float
+    # Premissas de vendas (ver vendas.py): unidades vendidas por mês (None
+    # usa DEFAULT_MESES_VENDA), desconto no lançamento e reajuste mensal, em %
+    velocidade_vendas: float = None
+    desconto_lancamento: float = 0.0
+    reajuste_mensal: float = 0.0
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d.get("nome", ""), d.get("quantidade", 0), d.get("area_privativa", 0.0),
+                   d.get("velocidade_vendas"), d.get("desconto_lancamento", 0.0), d.get("reajuste_mensal", 0.0))
+
+    @property
+    def area_privativa_total(self):
+        return self.quantidade * self.area_privativa
+
+    @property
+    def velocidade(self):
+        return self.quantidade / DEFAULT_MESES_VENDA if self.velocidade_vendas is None else self.velocidade_vendas
+
+
+@dataclass(slots=True)
+class CustosConfig:
+    custo_terreno_m2: float = 2500.0
+    custo_area_privativa: float = 4500.0
+    preco_medio_venda_m2: float = 10000.0
+
+    @classmethod
+    def from_dict(cls, d):
+        d = d or {}
+        return cls(
+            d.get("custo_terreno_m2", 2500.0),
+            d.get("custo_area_privativa", 4500.0),
+            d.get("preco_medio_venda_m2", 10000.0),
+        )
+
+
+@dataclass(slots=True)
+class Projeto:
+    nome: str = ""
+    area_terreno: float = 0.0
+    custos: CustosConfig = field(default_factory=CustosConfig)
+    pavimentos: list = field(default_factory=list)
+    unidades: list = field(default_factory=list)
+    # Percentuais por item (valores puros, sem a 'fonte')
+    etapas_percentuais: dict = field(default_factory=dict)
+    custos_indiretos_percentuais: dict = field(default_factory=dict)
+    # Custos mensais de administração da obra (R$/mês)
+    custos_indiretos_obra: dict = field(default_factory=dict)
+    duracao_obra: int = DEFAULT_DURACAO_OBRA
+    # Cronograma: janela (início, fim) de cada etapa em % da duração e a
+    # curva de desembolso dentro da janela (ver cronograma.CURVAS)
+    janelas_etapas: dict = field(default_factory=lambda: dict(JANELAS_ETAPAS))
+    curva_cronograma: str = "s"
+
+    @classmethod
+    def from_dict(cls, info):
+        return cls(
+            nome=info.get("nome", ""),
+            area_terreno=info.get("area_terreno", 0),
+            custos=CustosConfig.from_dict(info.get("custos_config")),
+            pavimentos=[Pavimento.from_dict(p) for p in info.get("pavimentos", [])],
+            unidades=[Unidade.from_dict(u) for u in info.get("unidades", [])],
+            etapas_percentuais={k: _percentual(v) for k, v in info.get("etapas_percentuais", {}).items()},
+            custos_indiretos_percentuais={k: _percentual(v) for k, v in info.get("custos_indiretos_percentuais", {}).items()},
+            custos_indiretos_obra=dict(info.get("custos_indiretos_obra", DEFAULT_CUSTOS_INDIRETOS_OBRA)),
+            duracao_obra=info.get("duracao_obra", DEFAULT_DURACAO_OBRA),
+            janelas_etapas={**JANELAS_ETAPAS, **{k: _janela(v) for k, v in info.get("cronograma", {}).get("janelas", {}).items()}},
+            curva_cronograma=info.get("cronograma", {}).get("curva", "s"),
+        )
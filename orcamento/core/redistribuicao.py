@@ -0,0 +1,97 @@
+"""
+Redistribuição de percentuais com limites (etapas da obra, por exemplo).
+
+Quando o usuário altera um ou mais percentuais, os demais são ajustados
+para que o total volte a ser 100, respeitando a faixa (mínimo, máximo) de
+cada item. O ajuste é a projeção do vetor de percentuais sobre o simplex
+limitado {x : soma(x) = total, mínimo <= x <= máximo}: cada item livre
+recebe x = clip(valor - λ × peso, mínimo, máximo), com um único λ para
+todos. Com pesos proporcionais aos valores atuais, enquanto nenhum limite é
+atingido, é a mesma divisão proporcional da diferença feita até aqui; os
+itens que batem no limite ficam nele e o restante é absorvido pelos outros,
+tudo em uma passada, sem ajustes sucessivos.
+
+A soma dos itens em função de λ é linear por partes e não crescente, com
+quebras onde cada item atinge um limite; λ é obtido exatamente ordenando as
+quebras e interpolando no trecho que contém o total.
+"""
+import math
+
+
+def _soma(valores, pesos, limites, lam):
+    return sum(min(max(v - lam * w, lo), hi) for v, w, (lo, hi) in zip(valores, pesos, limites))
+
+
+def projetar(valores, limites, total, pesos=None):
+    """
+    Projeta 'valores' (lista) sobre {soma = total, limites[i][0] <= x[i] <=
+    limites[i][1]}. Se o total estiver fora do alcance dos limites, devolve
+    todos os itens no limite mais próximo.
+    """
+    if not valores:
+        return []
+    pesos = list(pesos) if pesos is not None else [1.0] * len(valores)
+    # Itens sem peso não se moveriam; passam a ter peso uniforme
+    if not any(w > 0 for w in pesos):
+        pesos = [1.0] * len(valores)
+    pesos = [w if w > 0 else 0.0 for w in pesos]
+    minimo, maximo = math.fsum(lo for lo, _ in limites), math.fsum(hi for _, hi in limites)
+    if total <= minimo:
+        return [lo for lo, _ in limites]
+    if total >= maximo:
+        return [hi for _, hi in limites]
+
+    # Quebras: valores de λ em que cada item atinge o máximo ou o mínimo
+    quebras = sorted({(v - lim) / w for v, w, par in zip(valores, pesos, limites) if w > 0 for lim in par})
+    lam_a = quebras[0]
+    soma_a = _soma(valores, pesos, limites, lam_a)
+    lam = lam_a if soma_a <= total else quebras[-1]
+    for lam_b in quebras[1:] if soma_a > total else ():
+        soma_b = _soma(valores, pesos, limites, lam_b)
+        if soma_b <= total:
+            # Soma linear entre lam_a e lam_b
+            lam = lam_a + (soma_a - total) * (lam_b - lam_a) / (soma_a - soma_b) if soma_a != soma_b else lam_b
+            break
+        lam_a, soma_a = lam_b, soma_b
+    x = [min(max(v - lam * w, lo), hi) for v, w, (lo, hi) in zip(valores, pesos, limites)]
+
+    # Resíduo de arredondamento: vai para o item com mais folga na direção necessária
+    residuo = total - math.fsum(x)
+    if residuo:
+        folgas = [(hi - xi) if residuo > 0 else (xi - lo) for xi, (lo, hi) in zip(x, limites)]
+        i = max(range(len(x)), key=folgas.__getitem__)
+        x[i] += residuo
+    return x
+
+
+def redistribuir(percentuais, limites, editados=(), anteriores=None, total=100.0):
+    """
+    Novos percentuais ({item: valor}) após a edição dos itens 'editados',
+    que mantêm o valor editado (limitado à sua faixa) sempre que os demais
+    conseguem absorver a diferença; caso contrário, são aproximados do
+    valor editado o quanto os limites permitem. Os demais itens são
+    ajustados em proporção aos valores 'anteriores' (padrão: os atuais).
+    'limites' é {item: (mínimo, máximo)}; itens sem limite vão de 0 a
+    'total'.
+    """
+    itens = list(percentuais)
+    anteriores = anteriores or percentuais
+    faixa = {k: tuple(limites.get(k, (0.0, total))) for k in itens}
+    editados = [k for k in itens if k in set(editados)]
+    livres = [k for k in itens if k not in set(editados)]
+
+    fixados = {k: min(max(float(percentuais[k]), faixa[k][0]), faixa[k][1]) for k in editados}
+    # Parte do total que cabe aos itens livres, dentro do que os limites deles permitem
+    restante = total - math.fsum(fixados.values())
+    minimo_livres = math.fsum(faixa[k][0] for k in livres)
+    maximo_livres = math.fsum(faixa[k][1] for k in livres)
+    parte_livres = min(max(restante, minimo_livres), maximo_livres)
+    if parte_livres != restante and editados:
+        # Os editados cedem o excedente, o mais perto possível do valor editado
+        fixados = dict(zip(editados, projetar([fixados[k] for k in editados], [faixa[k] for k in editados],
+                                              total - parte_livres, [fixados[k] for k in editados])))
+
+    novos = dict(fixados)
+    novos.update(zip(livres, projetar([float(percentuais[k]) for k in livres], [faixa[k] for k in livres], parte_livres,
+                                      [float(anteriores.get(k, percentuais[k])) for k in livres])))
+    return {k: novos[k] for k in itens}
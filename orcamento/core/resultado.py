@@ -0,0 +1,155 @@
+"""
+Resultado do projeto calculado sobre um grafo de dependências (ver
+grafo.py), compartilhado por todas as páginas.
+
+As fontes são os dados editáveis do projeto (pavimentos, unidades, preços e
+custos por m², percentuais indiretos, administração da obra) e cada métrica
+derivada é um nó memoizado. Mudar um percentual indireto, por exemplo,
+recalcula só o custo indireto de venda e o resultado financeiro; áreas, VGV
+e custo direto vêm do cache.
+
+ResultadoProjeto avalia os nós sob demanda: uma página que só mostra o VGV
+não calcula as áreas dos pavimentos.
+"""
+from dataclasses import dataclass, field
+
+from .constantes import DEFAULT_CUSTOS_INDIRETOS_OBRA, DEFAULT_DURACAO_OBRA
+from .modelos import Pavimento, Unidade, CustosConfig, _percentual
+from .grafo import GrafoCalculo
+from . import calculos
+
+GRAFO_PROJETO = GrafoCalculo()
+
+
+@GRAFO_PROJETO.no("lista_pavimentos", "pavimentos")
+def _lista_pavimentos(pavimentos):
+    return [Pavimento.from_dict(p) for p in pavimentos]
+
+
+@GRAFO_PROJETO.no("areas", "lista_pavimentos")
+def _areas(pavimentos):
+    return calculos.calcular_areas(pavimentos)
+
+
+@GRAFO_PROJETO.no("custo_direto", "areas", "custo_m2")
+def _custo_direto(areas, custo_m2):
+    return calculos.custo_direto(areas.area_equivalente, custo_m2)
+
+
+@GRAFO_PROJETO.no("custo_direto_por_tipo", "lista_pavimentos", "custo_m2")
+def _custo_direto_por_tipo(pavimentos, custo_m2):
+    """{tipo de pavimento: custo direto}, na ordem em que os tipos aparecem."""
+    por_tipo = {}
+    for pav in pavimentos:
+        por_tipo[pav.tipo] = por_tipo.get(pav.tipo, 0.0) + calculos.custo_direto(pav.area_eq, custo_m2)
+    return por_tipo
+
+
+@GRAFO_PROJETO.no("area_privativa", "unidades")
+def _area_privativa(unidades):
+    return calculos.area_privativa_total([Unidade.from_dict(u) for u in unidades])
+
+
+@GRAFO_PROJETO.no("vgv", "area_privativa", "preco_venda_m2")
+def _vgv(area_privativa, preco_venda_m2):
+    return calculos.calcular_vgv(area_privativa, preco_venda_m2)
+
+
+@GRAFO_PROJETO.no("custo_indireto_venda", "vgv", "percentuais_indiretos")
+def _custo_indireto_venda(vgv, percentuais):
+    return calculos.custo_indireto_venda(vgv, {k: _percentual(v) for k, v in percentuais.items()})
+
+
+@GRAFO_PROJETO.no("custo_indireto_obra", "custos_mensais_obra", "duracao_obra")
+def _custo_indireto_obra(custos_mensais, duracao_obra):
+    return calculos.custo_indireto_obra(custos_mensais, duracao_obra)
+
+
+@GRAFO_PROJETO.no("custo_terreno", "area_terreno", "custo_terreno_m2")
+def _custo_terreno(area_terreno, custo_terreno_m2):
+    return calculos.custo_terreno(area_terreno, custo_terreno_m2)
+
+
+@GRAFO_PROJETO.no("financeiro", "vgv", "custo_direto", "custo_indireto_venda", "custo_terreno", "custo_indireto_obra",
+                  "area_privativa", "areas")
+def _financeiro(vgv, custo_direto, custo_indireto, custo_terreno, custo_obra, area_privativa, areas):
+    return calculos.resultado_financeiro(
+        vgv, custo_direto, custo_indireto, custo_terreno, custo_obra,
+        area_privativa=area_privativa, area_construida=areas.area_construida, area_equivalente=areas.area_equivalente,
+    )
+
+
+def fontes_do_projeto(info):
+    """Fontes do grafo a partir do dicionário do projeto (como gravado)."""
+    custos = CustosConfig.from_dict(info.get("custos_config"))
+    return {
+        "pavimentos": info.get("pavimentos", []),
+        "unidades": info.get("unidades", []),
+        "custo_m2": custos.custo_area_privativa,
+        "preco_venda_m2": custos.preco_medio_venda_m2,
+        "custo_terreno_m2": custos.custo_terreno_m2,
+        "area_terreno": info.get("area_terreno", 0),
+        "percentuais_indiretos": info.get("custos_indiretos_percentuais", {}),
+        "custos_mensais_obra": info.get("custos_indiretos_obra", DEFAULT_CUSTOS_INDIRETOS_OBRA),
+        "duracao_obra": info.get("duracao_obra", DEFAULT_DURACAO_OBRA),
+    }
+
+
+@dataclass(slots=True)
+class ResultadoProjeto:
+    fontes: dict
+    grafo: GrafoCalculo = GRAFO_PROJETO
+    # Chaves de cache já calculadas para estas fontes
+    _chaves: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_projeto(cls, info, grafo=GRAFO_PROJETO):
+        return cls(fontes_do_projeto(info), grafo)
+
+    def valor(self, nome):
+        return self.grafo.avaliar(nome, self.fontes, self._chaves)
+
+    @property
+    def areas(self):
+        return self.valor("areas")
+
+    @property
+    def area_construida(self):
+        return self.areas.area_construida
+
+    @property
+    def area_equivalente(self):
+        return self.areas.area_equivalente
+
+    @property
+    def custo_direto(self):
+        return self.valor("custo_direto")
+
+    @property
+    def custo_direto_por_tipo(self):
+        return self.valor("custo_direto_por_tipo")
+
+    @property
+    def area_privativa(self):
+        return self.valor("area_privativa")
+
+    @property
+    def vgv(self):
+        return self.valor("vgv")
+
+    @property
+    def custo_indireto_venda(self):
+        return self.valor("custo_indireto_venda")
+
+    @property
+    def custo_indireto_obra(self):
+        return self.valor("custo_indireto_obra")
+
+    @property
+    def custo_terreno(self):
+        return self.valor("custo_terreno")
+
+    @property
+    def financeiro(self):
+        """ResultadoFinanceiro completo (despesas totais, lucro e margem)."""
+        return self.valor("financeiro")
@@ -0,0 +1,107 @@
+"""
+Análise de sensibilidade (tornado) do lucro e da margem.
+
+Cada premissa é levada ao valor baixo e ao alto da sua faixa, uma de cada
+vez, com as demais no valor do projeto. Todos esses cenários (dois por
+premissa) são montados como linhas de arrays e avaliados de uma só vez por
+cenarios.avaliar.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .cenarios import avaliar
+from .constantes import DEFAULT_CUSTOS_INDIRETOS
+
+
+@dataclass(slots=True)
+class ItemSensibilidade:
+    nome: str
+    grupo: str
+    valor_base: float
+    valor_baixo: float
+    valor_alto: float
+    lucro_baixo: float
+    lucro_alto: float
+    margem_baixo: float
+    margem_alto: float
+
+    @property
+    def amplitude_lucro(self):
+        return abs(self.lucro_alto - self.lucro_baixo)
+
+    @property
+    def amplitude_margem(self):
+        return abs(self.margem_alto - self.margem_baixo)
+
+
+@dataclass(slots=True)
+class ResultadoSensibilidade:
+    lucro_base: float
+    margem_base: float
+    # Ordenados do maior para o menor efeito sobre o lucro
+    itens: list
+
+
+def _entradas(premissas, variacao, usar_faixas):
+    """(nome, grupo, argumento de avaliar, valor base, baixo, alto) de cada premissa."""
+    def faixa(valor):
+        return valor * (1 - variacao), valor * (1 + variacao)
+
+    p = premissas
+    entradas = [
+        ("Preço de Venda / m²", "Receita", "preco_venda_m2", p.preco_venda_m2, *faixa(p.preco_venda_m2)),
+        ("Custo de Construção / m²", "Custo Direto", "custo_m2", p.custo_m2, *faixa(p.custo_m2)),
+        ("Custo do Terreno / m²", "Terreno", "custo_terreno_m2", p.custo_terreno_m2, *faixa(p.custo_terreno_m2)),
+        ("Duração da Obra (meses)", "Administração da Obra", "duracao_obra", p.duracao_obra, *faixa(p.duracao_obra)),
+    ]
+    for item, pct in p.percentuais_indiretos.items():
+        if usar_faixas and item in DEFAULT_CUSTOS_INDIRETOS:
+            baixo, _, alto = DEFAULT_CUSTOS_INDIRETOS[item]
+        else:
+            baixo, alto = faixa(pct)
+        entradas.append((item, "Custos Indiretos (%)", ("percentual_indireto", item), pct, baixo, alto))
+    for item, valor in p.custos_mensais.items():
+        entradas.append((item, "Administração da Obra (R$/mês)", ("custo_mensal_obra", item), valor, *faixa(valor)))
+    return entradas
+
+
+def analisar_sensibilidade(premissas, variacao=0.10, usar_faixas=True):
+    """
+    Efeito de cada premissa sobre o lucro e a margem.
+
+    variacao:    fração usada como faixa (± variacao) das premissas sem faixa
+                 de referência.
+    usar_faixas: usa o mínimo e o máximo de DEFAULT_CUSTOS_INDIRETOS para
+                 os custos indiretos, em vez de ± variacao.
+    """
+    entradas = _entradas(premissas, variacao, usar_faixas)
+    n = 2 * len(entradas)
+    colunas = {
+        "preco_venda_m2": np.full(n, float(premissas.preco_venda_m2)),
+        "custo_m2": np.full(n, float(premissas.custo_m2)),
+        "custo_terreno_m2": np.full(n, float(premissas.custo_terreno_m2)),
+        "duracao_obra": np.full(n, float(premissas.duracao_obra)),
+        "percentual_indireto": np.full(n, float(premissas.percentual_indireto)),
+        "custo_mensal_obra": np.full(n, float(premissas.custo_mensal_obra)),
+    }
+    for i, (_, _, argumento, base, baixo, alto) in enumerate(entradas):
+        linhas = slice(2 * i, 2 * i + 2)
+        if isinstance(argumento, tuple):
+            # Item de uma soma: troca a parcela do item no total
+            colunas[argumento[0]][linhas] += np.array([baixo, alto]) - base
+        else:
+            colunas[argumento][linhas] = (baixo, alto)
+
+    cenarios = avaliar(premissas, **colunas)
+    base = avaliar(premissas)
+    itens = [
+        ItemSensibilidade(
+            nome=nome, grupo=grupo, valor_base=base_valor, valor_baixo=baixo, valor_alto=alto,
+            lucro_baixo=float(cenarios.lucro[2 * i]), lucro_alto=float(cenarios.lucro[2 * i + 1]),
+            margem_baixo=float(cenarios.margem[2 * i]), margem_alto=float(cenarios.margem[2 * i + 1]),
+        )
+        for i, (nome, grupo, _, base_valor, baixo, alto) in enumerate(entradas)
+    ]
+    itens.sort(key=lambda item: item.amplitude_lucro, reverse=True)
+    return ResultadoSensibilidade(lucro_base=float(base.lucro), margem_base=float(base.margem), itens=itens)
@@ -0,0 +1,96 @@
+"""
+Simulação de Monte Carlo da margem do empreendimento.
+
+Cada sorteio combina:
+  - os percentuais de cada custo indireto, sorteados em distribuições
+    triangulares (mínimo, valor do projeto, máximo) com as faixas de
+    DEFAULT_CUSTOS_INDIRETOS;
+  - o preço de venda, o custo de construção e o custo do terreno por m²,
+    sorteados em triangulares de ± 'spread' em torno do valor do projeto.
+
+As etapas da obra não entram no sorteio: seus percentuais só repartem o
+custo direto, cuja incerteza vem do 'spread' do custo de construção.
+
+Os sorteios são feitos em blocos, cada um com sua semente derivada (via
+SeedSequence) da semente principal, de modo que o resultado é o mesmo com
+qualquer número de processos.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from .cenarios import avaliar
+from .constantes import DEFAULT_CUSTOS_INDIRETOS
+
+TAMANHO_BLOCO = 100_000
+
+
+@dataclass(slots=True)
+class ResultadoSimulacao:
+    margens: np.ndarray
+    seed: int
+
+    @property
+    def media(self):
+        return float(self.margens.mean())
+
+    @property
+    def desvio(self):
+        return float(self.margens.std())
+
+    def percentis(self, qs=(5, 25, 50, 75, 95)):
+        return dict(zip(qs, np.percentile(self.margens, qs).tolist()))
+
+    def prob_abaixo(self, meta):
+        """Probabilidade de a margem ficar abaixo de 'meta' (%)."""
+        return float(np.count_nonzero(self.margens < meta)) / len(self.margens)
+
+
+def _triangular(rng, minimo, moda, maximo, n):
+    moda = min(max(moda, minimo), maximo)
+    if minimo == maximo:
+        return np.full(n, float(minimo))
+    return rng.triangular(minimo, moda, maximo, n)
+
+
+def _simular_bloco(premissas, spreads, seed_seq, n):
+    rng = np.random.default_rng(seed_seq)
+
+    def faixa(valor, spread):
+        return _triangular(rng, valor * (1 - spread), valor, valor * (1 + spread), n) if spread else valor
+
+    percentual_indireto = np.zeros(n)
+    for item, pct in premissas.percentuais_indiretos.items():
+        minimo, _, maximo = DEFAULT_CUSTOS_INDIRETOS.get(item, (pct, pct, pct))
+        percentual_indireto += _triangular(rng, minimo, pct, maximo, n)
+
+
+    return avaliar(
+        premissas,
+        preco_venda_m2=faixa(premissas.preco_venda_m2, spreads.get("preco_venda_m2", 0)),
+        custo_m2=faixa(premissas.custo_m2, spreads.get("custo_m2", 0)),
+        custo_terreno_m2=faixa(premissas.custo_terreno_m2, spreads.get("custo_terreno_m2", 0)),
+        percentual_indireto=percentual_indireto,
+    ).margem
+
+
+def simular_margem(premissas, n=1_000_000, spreads=None, seed=None, processos=1):
+    """
+    Sorteia 'n' cenários e devolve a distribuição da margem (%).
+
+    spreads: {'preco_venda_m2' | 'custo_m2' | 'custo_terreno_m2': fração},
+             p. ex. {'preco_venda_m2': 0.10} para ± 10%.
+    seed:    semente (None sorteia uma; a usada fica no resultado).
+    processos: > 1 distribui os blocos entre processos.
+    """
+    spreads = spreads or {}
+    seed_seq = np.random.SeedSequence(seed)
+    tamanhos = [min(TAMANHO_BLOCO, n - inicio) for inicio in range(0, n, TAMANHO_BLOCO)]
+    sementes = seed_seq.spawn(len(tamanhos))
+    if processos > 1 and len(tamanhos) > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            blocos = list(executor.map(_simular_bloco, [premissas] * len(tamanhos), [spreads] * len(tamanhos), sementes, tamanhos))
+    else:
+        blocos = [_simular_bloco(premissas, spreads, s, t) for s, t in zip(sementes, tamanhos)]
+    return ResultadoSimulacao(margens=np.concatenate(blocos) if blocos else np.zeros(0), seed=seed_seq.entropy)
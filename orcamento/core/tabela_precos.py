@@ -0,0 +1,176 @@
+"""
+Tabela de preços: cada tipo de unidade é desdobrado em unidades individuais,
+com andar e posição, e cada unidade recebe o seu preço.
+
+Os tipos ocupam posições vizinhas em cada andar (o primeiro tipo as
+primeiras posições, e assim por diante) e são distribuídos pelos andares a
+partir de 'andar_inicial'; o código da unidade é o andar seguido da
+posição (1201 = 12º andar, posição 1). O preço é área × preço por m² ×
+fator do andar × fator da posição:
+
+  - andar: 'premio_andar' % por andar acima do inicial, somado ('linear')
+    ou composto ('composta'), e 'premio_cobertura' % no último andar de
+    cada tipo;
+  - posição (orientação/vista): 'premios_posicao' % por posição.
+
+A tabela é então reconciliada com o VGV alvo: todos os preços são
+multiplicados pelo mesmo fator e arredondados ao múltiplo de
+'arredondamento', distribuindo as sobras pelos maiores restos, de modo que
+o total fica a menos de meio arredondamento do alvo. Tudo é feito com
+arrays, sem laço por unidade.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .modelos import Unidade
+
+CURVAS_ANDAR = ("linear", "composta")
+
+
+@dataclass(slots=True)
+class ConfigTabela:
+    andar_inicial: int = 1
+    andares: int = 10
+    premio_andar: float = 1.0
+    curva_andar: str = "linear"
+    premio_cobertura: float = 0.0
+    # {posição (1, 2, ...): prêmio em %}
+    premios_posicao: dict = field(default_factory=dict)
+    arredondamento: float = 1000.0
+
+    @classmethod
+    def from_dict(cls, d):
+        d = d or {}
+        return cls(
+            andar_inicial=int(d.get("andar_inicial", 1)),
+            andares=int(d.get("andares", 10)),
+            premio_andar=float(d.get("premio_andar", 1.0)),
+            curva_andar=d.get("curva_andar", "linear"),
+            premio_cobertura=float(d.get("premio_cobertura", 0.0)),
+            premios_posicao={int(k): float(v) for k, v in d.get("premios_posicao", {}).items()},
+            arredondamento=float(d.get("arredondamento", 1000.0)),
+        )
+
+
+@dataclass(slots=True)
+class TabelaPrecos:
+    nomes_tipos: list
+    # Uma posição por unidade
+    tipo: np.ndarray
+    andar: np.ndarray
+    posicao: np.ndarray
+    area: np.ndarray
+    fator: np.ndarray
+    preco: np.ndarray
+    vgv_alvo: float
+
+    @property
+    def codigo(self):
+        """Andar seguido da posição com dois dígitos (ou mais, se houver mais de 99 posições)."""
+        casas = max(2, len(str(int(self.posicao.max())))) if len(self.posicao) else 2
+        return self.andar * 10 ** casas + self.posicao
+
+    @property
+    def preco_m2(self):
+        return np.divide(self.preco, self.area, out=np.zeros_like(self.preco), where=self.area > 0)
+
+    @property
+    def vgv(self):
+        return float(self.preco.sum())
+
+    def as_columns(self):
+        """Colunas da tabela (para montar um DataFrame ou exportar)."""
+        return {
+            "Unidade": self.codigo,
+            "Tipo": np.asarray(self.nomes_tipos, dtype=object)[self.tipo] if len(self.tipo) else np.array([], dtype=object),
+            "Andar": self.andar,
+            "Posição": self.posicao,
+            "Área Privativa (m²)": self.area,
+            "Fator": self.fator,
+            "Preço / m²": self.preco_m2,
+            "Preço": self.preco,
+        }
+
+
+def expandir(quantidades, andares, andar_inicial=1):
+    """
+    Tipo, andar e posição de cada unidade. Cada tipo ocupa
+    ceil(quantidade / andares) posições por andar, depois das posições dos
+    tipos anteriores.
+    """
+    quantidades = np.asarray(quantidades, dtype=np.int64)
+    posicoes = np.maximum(-(-quantidades // max(int(andares), 1)), 1)
+    primeira_posicao = np.concatenate(([0], np.cumsum(posicoes)[:-1]))
+    inicio = np.concatenate(([0], np.cumsum(quantidades)[:-1]))
+
+    tipo = np.repeat(np.arange(len(quantidades)), quantidades)
+    ordem = np.arange(len(tipo)) - inicio[tipo]
+    andar = andar_inicial + ordem // posicoes[tipo]
+    posicao = primeira_posicao[tipo] + ordem % posicoes[tipo] + 1
+    return tipo, andar, posicao
+
+
+def fatores(tipo, andar, posicao, config):
+    """Fator de preço de cada unidade (andar × posição)."""
+    acima = (andar - config.andar_inicial).astype(np.float64)
+    if config.curva_andar == "composta":
+        fator_andar = (1 + config.premio_andar / 100) ** acima
+    else:
+        fator_andar = 1 + config.premio_andar / 100 * acima
+    if config.premio_cobertura and len(tipo):
+        ultimo_andar = np.zeros(tipo.max() + 1, dtype=andar.dtype)
+        np.maximum.at(ultimo_andar, tipo, andar)
+        fator_andar = fator_andar * np.where(andar == ultimo_andar[tipo], 1 + config.premio_cobertura / 100, 1.0)
+
+    premios = np.zeros(int(posicao.max()) + 1 if len(posicao) else 1)
+    for pos, premio in config.premios_posicao.items():
+        if 0 < pos < len(premios):
+            premios[pos] = premio
+    return fator_andar * (1 + premios[posicao] / 100)
+
+
+def reconciliar(precos, vgv_alvo, arredondamento=0.0):
+    """
+    Ajusta os preços ao VGV alvo: escala proporcional e, se 'arredondamento'
+    > 0, arredondamento a múltiplos dele pelo método dos maiores restos.
+    """
+    precos = np.asarray(precos, dtype=np.float64)
+    total = precos.sum()
+    if total <= 0:
+        return precos.copy()
+    ajustados = precos * (vgv_alvo / total)
+    if arredondamento <= 0:
+        return ajustados
+    passos = ajustados / arredondamento
+    inteiros = np.floor(passos)
+    faltam = int(np.clip(np.rint(vgv_alvo / arredondamento - inteiros.sum()), 0, len(precos)))
+    if faltam:
+        # Um passo a mais para as unidades com os maiores restos
+        maiores = np.argpartition(inteiros - passos, faltam - 1)[:faltam]
+        inteiros[maiores] += 1
+    return inteiros * arredondamento
+
+
+def gerar_tabela(unidades, preco_m2, config=None, vgv_alvo=None):
+    """
+    Tabela de preços dos tipos de 'unidades' (dicts como gravados) ao preço
+    de referência 'preco_m2', reconciliada com 'vgv_alvo' (padrão: o VGV do
+    projeto, área privativa total × preço por m²).
+    """
+    config = config or ConfigTabela()
+    tipos = [Unidade.from_dict(u) for u in unidades]
+    quantidades = np.fromiter((max(int(u.quantidade), 0) for u in tipos), dtype=np.int64, count=len(tipos))
+    areas_tipo = np.fromiter((u.area_privativa for u in tipos), dtype=np.float64, count=len(tipos))
+
+    tipo, andar, posicao = expandir(quantidades, config.andares, config.andar_inicial)
+    area = areas_tipo[tipo]
+    fator = fatores(tipo, andar, posicao, config)
+    if vgv_alvo is None:
+        vgv_alvo = float((quantidades * areas_tipo).sum() * preco_m2)
+    return TabelaPrecos(
+        nomes_tipos=[u.nome for u in tipos],
+        tipo=tipo, andar=andar, posicao=posicao, area=area, fator=fator,
+        preco=reconciliar(area * preco_m2 * fator, vgv_alvo, config.arredondamento),
+        vgv_alvo=vgv_alvo,
+    )
@@ -0,0 +1,196 @@
+"""
+Modelo de absorção de vendas por tipo de unidade.
+
+Cada tipo é vendido a uma velocidade constante (unidades por mês) a partir
+do lançamento (mês 1) até acabar o estoque. O preço por m² do mês m é o
+preço de tabela com o desconto de lançamento, reajustado mês a mês:
+preço × (1 - desconto) × (1 + reajuste)^(m - 1). Sem desconto nem reajuste,
+a receita total é o VGV de calculos.calcular_vgv.
+
+Os tipos de unidade de um ou de vários projetos ficam em colunas
+(TiposUnidade); a velocidade pode ser multiplicada por um array de fatores,
+e todos os cenários são calculados de uma vez: mês a mês em arrays
+(cenários × meses × tipos) por simular, ou só o prazo e a receita total,
+em forma fechada (cenários × tipos), por resumir, que dispensa o eixo dos
+meses e comporta portfólios inteiros.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .modelos import Unidade
+
+# Horizonte máximo da simulação; o que não for vendido até lá fica em estoque
+MESES_MAXIMOS_VENDA = 240
+
+
+@dataclass(slots=True)
+class TiposUnidade:
+    nome: list
+    quantidade: np.ndarray
+    area_privativa: np.ndarray
+    preco_m2: np.ndarray
+    velocidade: np.ndarray
+    desconto_lancamento: np.ndarray
+    reajuste_mensal: np.ndarray
+    # Projeto (índice) de cada tipo
+    projeto: np.ndarray
+    num_projetos: int
+
+    @classmethod
+    def from_projetos(cls, projetos):
+        """Tipos de unidade de vários projetos (dicts como gravados), em ordem."""
+        tipos, projeto, precos = [], [], []
+        for i, info in enumerate(projetos):
+            preco = (info.get("custos_config") or {}).get("preco_medio_venda_m2", 10000.0)
+            for u in info.get("unidades", []):
+                tipos.append(Unidade.from_dict(u))
+                projeto.append(i)
+                precos.append(preco)
+
+        def coluna(valores):
+            return np.fromiter(valores, dtype=np.float64, count=len(tipos))
+
+        return cls(
+            nome=[u.nome for u in tipos],
+            quantidade=coluna(u.quantidade for u in tipos),
+            area_privativa=coluna(u.area_privativa for u in tipos),
+            preco_m2=np.asarray(precos, dtype=np.float64),
+            velocidade=coluna(u.velocidade for u in tipos),
+            desconto_lancamento=coluna(u.desconto_lancamento for u in tipos),
+            reajuste_mensal=coluna(u.reajuste_mensal for u in tipos),
+            projeto=np.asarray(projeto, dtype=np.int64),
+            num_projetos=len(projetos),
+        )
+
+    @classmethod
+    def from_unidades(cls, unidades, preco_m2):
+        """Tipos de unidade de um só projeto."""
+        return cls.from_projetos([{"unidades": unidades, "custos_config": {"preco_medio_venda_m2": preco_m2}}])
+
+    def simular(self, fatores_velocidade=1.0, meses=None):
+        """
+        Vendas com a velocidade de cada tipo multiplicada por cada fator de
+        'fatores_velocidade' (escalar ou array de cenários). O horizonte é o
+        necessário para vender tudo no cenário mais lento, limitado a 'meses'
+        (padrão MESES_MAXIMOS_VENDA).
+        """
+        fatores = np.asarray(fatores_velocidade, dtype=np.float64)[..., np.newaxis]
+        velocidade = self.velocidade * fatores
+        if meses is None:
+            # Tipos sem velocidade nunca se esgotam (prazo infinito)
+            sem_velocidade = np.broadcast_to(np.where(self.quantidade > 0, np.inf, 0.0), velocidade.shape)
+            prazos = np.divide(self.quantidade, velocidade, out=sem_velocidade.copy(), where=velocidade > 0)
+            meses = int(min(np.ceil(prazos.max()), MESES_MAXIMOS_VENDA)) if prazos.size else 1
+        meses = max(meses, 1)
+
+        # Vendas acumuladas ao fim de cada mês: (..., meses + 1, tipos)
+        limites = np.arange(meses + 1, dtype=np.float64)[:, np.newaxis]
+        acumuladas = np.minimum(velocidade[..., np.newaxis, :] * limites, self.quantidade)
+        vendidas = np.diff(acumuladas, axis=-2)
+        preco = (self.preco_m2 * (1 - self.desconto_lancamento / 100)
+                 * (1 + self.reajuste_mensal / 100) ** np.arange(meses, dtype=np.float64)[:, np.newaxis])
+        return ResultadoVendas(
+            vendidas=vendidas,
+            receita=vendidas * self.area_privativa * preco,
+            estoque=self.quantidade - acumuladas[..., 1:, :],
+            projeto=self.projeto,
+            num_projetos=self.num_projetos,
+        )
+
+    def resumir(self, fatores_velocidade=1.0):
+        """
+        Prazo de vendas (meses) e receita total de cada tipo e de cada projeto
+        com a velocidade multiplicada por 'fatores_velocidade', sem simular
+        mês a mês: com velocidade v, o tipo vende v unidades em cada um dos
+        primeiros k - 1 meses e o restante no mês k = ceil(quantidade / v), e
+        a receita é uma soma geométrica no reajuste. Sem limite de horizonte;
+        tipos sem velocidade têm prazo infinito e receita zero.
+        """
+        fatores = np.asarray(fatores_velocidade, dtype=np.float64)[..., np.newaxis]
+        velocidade = self.velocidade * fatores
+        com_venda = (velocidade > 0) & (self.quantidade > 0)
+        razao = np.divide(self.quantidade, velocidade, out=np.zeros(velocidade.shape), where=com_venda)
+        prazo = np.where(com_venda, np.ceil(razao - 1e-9), np.where(self.quantidade > 0, np.inf, 0.0))
+        cheios = np.where(com_venda, prazo - 1, 0.0)
+        fator_mes = 1 + self.reajuste_mensal / 100
+        with np.errstate(divide="ignore", invalid="ignore"):
+            soma = np.where(fator_mes == 1, cheios, (fator_mes ** cheios - 1) / (fator_mes - 1))
+        unidades = velocidade * soma + (self.quantidade - velocidade * cheios) * fator_mes ** cheios
+        receita = np.where(com_venda, self.area_privativa * self.preco_m2 * (1 - self.desconto_lancamento / 100) * unidades, 0.0)
+
+        prazo_projetos = np.zeros((self.num_projetos, *prazo.shape[:-1]))
+        np.maximum.at(prazo_projetos, self.projeto, np.moveaxis(prazo, -1, 0))
+        receita_projetos = np.zeros_like(prazo_projetos)
+        np.add.at(receita_projetos, self.projeto, np.moveaxis(receita, -1, 0))
+        return ResumoVendas(
+            meses_para_vender=prazo,
+            receita=receita,
+            meses_para_vender_projetos=np.moveaxis(prazo_projetos, 0, -1),
+            receita_projetos=np.moveaxis(receita_projetos, 0, -1),
+        )
+
+    def velocidade_necessaria(self, prazo_meses):
+        """
+        Menor fator sobre a velocidade de cada projeto para vender todas as
+        suas unidades em 'prazo_meses' (o tipo mais lento define o fator).
+        """
+        exigido = np.divide(self.quantidade, self.velocidade * prazo_meses, out=np.zeros(len(self.quantidade)),
+                            where=self.velocidade > 0)
+        exigido = np.where((self.velocidade <= 0) & (self.quantidade > 0), np.inf, exigido)
+        fatores = np.zeros(self.num_projetos)
+        np.maximum.at(fatores, self.projeto, exigido)
+        return fatores
+
+
+@dataclass(slots=True)
+class ResumoVendas:
+    # (..., tipos) e (..., projetos)
+    meses_para_vender: np.ndarray
+    receita: np.ndarray
+    meses_para_vender_projetos: np.ndarray
+    receita_projetos: np.ndarray
+
+
+@dataclass(slots=True)
+class ResultadoVendas:
+    # (..., meses, tipos)
+    vendidas: np.ndarray
+    receita: np.ndarray
+    estoque: np.ndarray
+    projeto: np.ndarray
+    num_projetos: int
+
+    def por_projeto(self, valores):
+        """Soma os tipos de cada projeto: (..., tipos) -> (..., projetos)."""
+        membros = np.zeros((len(self.projeto), self.num_projetos))
+        membros[np.arange(len(self.projeto)), self.projeto] = 1.0
+        return valores @ membros
+
+    @property
+    def receita_mensal(self):
+        return self.receita.sum(axis=-1)
+
+    @property
+    def estoque_total(self):
+        return self.estoque.sum(axis=-1)
+
+    @property
+    def vgv_realizado(self):
+        return self.receita.sum(axis=(-2, -1))
+
+    @staticmethod
+    def _meses_para_zerar(estoque):
+        """Meses até o estoque zerar (NaN se sobrar estoque no horizonte)."""
+        restante = estoque > 1e-9
+        return np.where(restante[..., -1, :], np.nan, restante.sum(axis=-2) + 1.0)
+
+    @property
+    def meses_para_vender(self):
+        """Meses para vender todas as unidades de cada tipo."""
+        return self._meses_para_zerar(self.estoque)
+
+    @property
+    def meses_para_vender_projetos(self):
+        """Meses para vender todas as unidades de cada projeto."""
+        return self._meses_para_zerar(self.por_projeto(self.estoque))
@@ -4,9 +4,11 @@ import urllib.parse
 from utils import (
     fmt_br, render_metric_card, render_sidebar,
     DEFAULT_PAVIMENTO, TIPOS_PAVIMENTO,
-    init_session_state_vars, calcular_areas_e_custos,
-    ProjectManager
+    init_session_state_vars, resultado_da_sessao, render_estatisticas_calculo,
+    tabela_pavimentos, normalizar_pavimentos, tabela_unidades, normalizar_unidades,
+    get_project_manager, ConflictError
 )
+from orcamento.core import importar_planilha
 
 st.set_page_config(page_title="Dados do Projeto", layout="wide")
 
@@ -27,11 +29,6 @@ st.markdown("""
     .stCheckbox > label {
         font-size: 14px;
     }
-    /* Adiciona barra de rolagem vertical para a seção de pavimentos */
-    .pavimentos-scrollable-container {
-        max-height: 400px;
-        overflow-y: auto;
-    }
     .total-row {
         background-color: #f0f2f6;
         padding: 10px 0;
@@ -61,36 +58,12 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Verifica e inicializa o ProjectManager se ele não estiver no estado da sessão
-if 'project_manager' not in st.session_state:
-    st.session_state.project_manager = ProjectManager("projects.json")
-
 if "projeto_info" not in st.session_state:
     st.error("Nenhum projeto carregado. Por favor, selecione um projeto na página inicial.")
     if st.button("Voltar para a seleção de projetos"):
         st.switch_page("Início.py")
     st.stop()
     
-# Dialog de confirmação de exclusão
-@st.dialog("Confirmar Exclusão")
-def confirm_delete_dialog():
-    index_to_delete = st.session_state.deleting_pav_index
-    if index_to_delete is not None:
-        pav_name = st.session_state.pavimentos[index_to_delete]['nome']
-        st.write(f"Tem certeza que deseja excluir o pavimento **{pav_name}**?")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("Sim, Excluir", use_container_width=True, type="primary"):
-                del st.session_state.pavimentos[index_to_delete]
-                st.session_state.deleting_pav_index = None
-                st.success(f"Pavimento '{pav_name}' excluído com sucesso!")
-                st.rerun()
-        with col2:
-            if st.button("Cancelar", use_container_width=True):
-                st.session_state.deleting_pav_index = None
-                st.rerun()
-
 # Inicializa as variáveis de estado
 init_session_state_vars(st.session_state.projeto_info)
 
@@ -103,12 +76,10 @@ st.subheader("Configuração e Detalhamento do Empreendimento")
 
 # --- Exibição e Edição dos dados gerais ---
 with st.expander("📝 Dados Gerais do Projeto", expanded=True):
-    # Chamando a função centralizada de cálculo
-    area_construida_total, area_equivalente_total, _, _ = calcular_areas_e_custos(st.session_state.pavimentos, info.get('custos_config', {}))
-    
-    # Calcular a área privativa total e o número de unidades a partir dos dados de unidades
-    total_area_privativa_unidades = sum(unidade['area_privativa_total'] for unidade in st.session_state.unidades)
-    total_unidades = sum(unidade['quantidade'] for unidade in st.session_state.unidades)
+    # Resultado compartilhado entre as páginas (grafo de cálculo memoizado)
+    resultado = resultado_da_sessao(info)
+    area_construida_total, area_equivalente_total = resultado.area_construida, resultado.area_equivalente
+    total_area_privativa_unidades = resultado.area_privativa
 
     # Use um formulário para atualizar os dados do projeto
     with st.form(key="dados_gerais_form"):
@@ -136,7 +107,7 @@ with st.expander("📝 Dados Gerais do Projeto", expanded=True):
         
         # Agrupa os quatro campos de custos em uma única linha
         col_custos_1, col_custos_2, col_custos_3, col_custos_4 = st.columns(4)
-        info['area_terreno'] = col_custos_1.number_input("Área Terreno (m²)", value=info['area_terreno'], format="%.2f")
+        info['area_terreno'] = col_custos_1.number_input("Área Terreno (m²)", value=info.get('area_terreno', 0.0), format="%.2f")
         info['custos_config']['custo_terreno_m2'] = col_custos_2.number_input("Custo do Terreno por m² (R$)", value=info['custos_config'].get('custo_terreno_m2', 0.0), format="%.2f")
         info['custos_config']['custo_area_privativa'] = col_custos_3.number_input("Custo de Construção (R$/m² privativo)", value=info['custos_config'].get('custo_area_privativa', 0.0), format="%.2f", step=100.0)
         info['custos_config']['preco_medio_venda_m2'] = col_custos_4.number_input("Preço Médio de Venda (R$/m² privativo)", value=info['custos_config'].get('preco_medio_venda_m2', 10000.0), format="%.2f")
@@ -155,131 +126,109 @@ with st.expander("📝 Dados Gerais do Projeto", expanded=True):
 
 
 # --- Detalhamento dos Pavimentos ---
-with st.expander("🏢 Dados dos Pavimentos", expanded=True):
-    # Ajuste na largura do botão e posicionamento
-    b1, _ = st.columns([0.2, 0.8])
-    if b1.button("➕ Pavimento"):
-        st.session_state.pavimentos.append(DEFAULT_PAVIMENTO.copy())
-        st.rerun()
-
-    # Larguras das colunas ajustadas, ajustando o último valor para o botão de exclusão
-    col_widths = [2.5, 4, 1, 1, 1.5, 1.5, 1.5, 0.8, 0.8]
-    headers = ["Nome", "Tipo", "Rep.", "Coef.", "Área (m²)", "Área Eq. Total", "Área Constr.", "A.C?", "Ação"]
-    header_cols = st.columns(col_widths)
-    for hc, title in zip(header_cols, headers):
-        hc.markdown(f'<p style="text-align:center; font-size:14px;"><b>{title}</b></p>', unsafe_allow_html=True)
-    
-    total_area_pav = 0
-    total_area_eq_pav = 0
-    total_area_constr_pav = 0
-
-    with st.container():
-        st.markdown('<div class="pavimentos-scrollable-container">', unsafe_allow_html=True)
-        for i, pav in enumerate(st.session_state.pavimentos):
-            cols = st.columns(col_widths)
-            pav['nome'] = cols[0].text_input("nome", pav['nome'], key=f"nome_{i}", label_visibility="collapsed")
-            pav['tipo'] = cols[1].selectbox("tipo", list(TIPOS_PAVIMENTO.keys()), list(TIPOS_PAVIMENTO.keys()).index(pav.get('tipo', next(iter(TIPOS_PAVIMENTO)))), key=f"tipo_{i}", label_visibility="collapsed")
-            pav['rep'] = cols[2].number_input("rep", min_value=1, value=pav['rep'], step=1, key=f"rep_{i}", label_visibility="collapsed")
-            
-            min_c, max_c = TIPOS_PAVIMENTO[pav['tipo']]
-            help_text = f"Intervalo: {min_c:.2f} - {max_c:.2f}"
-            
-            if float(pav.get('coef', min_c)) > max_c:
-                pav['coef'] = max_c
-            elif float(pav.get('coef', min_c)) < min_c:
-                pav['coef'] = min_c
-
-            if min_c == max_c:
-                cols[3].markdown(f"<div style='text-align:center; padding-top: 8px;'>{pav['coef']:.2f}</div>", unsafe_allow_html=True)
+# Os pavimentos e as unidades são editados em grades (st.data_editor), um
+# widget por tabela em vez de um por célula, dentro de formulários: as
+# alterações são aplicadas de uma vez ao clicar em "Aplicar". A chave do
+# editor muda a cada aplicação, para que a grade recomece dos dados gravados.
+st.session_state.setdefault("versao_grades", 0)
+
+# --- Importação de planilha (quadro de áreas) ---
+with st.expander("📥 Importar Pavimentos e Unidades de Planilha", expanded="resumo_importacao" in st.session_state):
+    st.caption(
+        "CSV ou XLSX com uma tabela de pavimentos (Nome, Tipo, Rep., Coef., Área, A.C?) e/ou de unidades "
+        "(Tipo de Unidade, Quantidade, Área Privativa); no XLSX, uma tabela por aba. Os tipos são associados "
+        "aos tipos de pavimento pelo nome ou por um trecho dele, e os coeficientes devem estar na faixa do tipo."
+    )
+    with st.form("form_importacao", border=False):
+        planilha = st.file_uploader("Planilha", type=["csv", "xlsx"], key=f"planilha_{st.session_state.versao_grades}")
+        substituir = st.radio("Linhas importadas", ["Acrescentar aos dados atuais", "Substituir os dados atuais"], horizontal=True) != "Acrescentar aos dados atuais"
+        if st.form_submit_button("Importar", type="primary") and planilha is not None:
+            try:
+                with st.spinner("Importando..."):
+                    importado = importar_planilha(planilha, planilha.name)
+            except (ValueError, ImportError) as e:
+                st.error(f"Não foi possível ler a planilha: {e}")
             else:
-                pav['coef'] = cols[3].number_input("coef", min_value=min_c, max_value=max_c, value=float(pav.get('coef', min_c)), step=0.01, format="%.2f", key=f"coef_{i}", label_visibility="collapsed", help=help_text)
-
-            pav['area'] = cols[4].number_input("area", min_value=0.0, value=float(pav['area']), step=10.0, format="%.2f", key=f"area_{i}", label_visibility="collapsed")
-            
-            pav['constr'] = cols[7].checkbox(" ", value=pav.get('constr', True), key=f"constr_{i}", label_visibility="collapsed")
-            
-            area_total_i, area_eq_i = pav['area'] * pav['rep'], (pav['area'] * pav['rep']) * pav['coef']
-            area_constr_i = area_total_i if pav.get('constr', True) else 0.0
-
-            cols[5].markdown(f"<div style='text-align:center; padding-top: 8px;'>{fmt_br(area_eq_i)}</div>", unsafe_allow_html=True)
-            cols[6].markdown(f"<div style='text-align:center; padding-top: 8px;'>{fmt_br(area_constr_i)}</div>", unsafe_allow_html=True)
-
-            # Botão de exclusão agora dentro do loop
-            if cols[8].button("🗑️", key=f"del_{i}", use_container_width=True):
-                st.session_state.deleting_pav_index = i
+                for chave, linhas in (("pavimentos", importado.pavimentos), ("unidades", importado.unidades)):
+                    if substituir and linhas:
+                        st.session_state[chave][:] = linhas
+                    else:
+                        st.session_state[chave].extend(linhas)
+                st.session_state.resumo_importacao = {
+                    "pavimentos": len(importado.pavimentos), "unidades": len(importado.unidades),
+                    "total_erros": importado.total_erros, "erros": [e.to_dict() for e in importado.erros],
+                }
+                st.session_state.versao_grades += 1
                 st.rerun()
 
-            total_area_pav += area_total_i
-            total_area_eq_pav += area_eq_i
-            if pav.get('constr', True):
-                total_area_constr_pav += area_total_i
-
-        st.markdown('</div>', unsafe_allow_html=True)
+    resumo = st.session_state.pop("resumo_importacao", None)
+    if resumo:
+        st.success(f"Importados {resumo['pavimentos']} pavimentos e {resumo['unidades']} tipos de unidade.")
+        if resumo["total_erros"]:
+            st.warning(f"{resumo['total_erros']} linhas ignoradas" + (f" (mostrando as {len(resumo['erros'])} primeiras)" if resumo["total_erros"] > len(resumo["erros"]) else "") + ":")
+            st.dataframe(pd.DataFrame(resumo["erros"]), hide_index=True, use_container_width=True,
+                         column_config={"aba": "Aba", "linha": "Linha", "mensagem": "Motivo"})
 
-        if st.session_state.pavimentos:
-            total_pav_cols = st.columns(col_widths)
-            total_pav_cols[0].markdown(f"<div style='font-weight: bold; text-align: center;'>Total</div>", unsafe_allow_html=True)
-            total_pav_cols[1].empty()
-            total_pav_cols[2].empty()
-            total_pav_cols[3].empty()
-            total_pav_cols[4].markdown(f"<div style='font-weight: bold; text-align: center;'>{fmt_br(total_area_pav)}</div>", unsafe_allow_html=True)
-            total_pav_cols[5].markdown(f"<div style='font-weight: bold; text-align: center;'>{fmt_br(total_area_eq_pav)}</div>", unsafe_allow_html=True)
-            total_pav_cols[6].markdown(f"<div style='font-weight: bold; text-align: center;'>{fmt_br(total_area_constr_pav)}</div>", unsafe_allow_html=True)
-            total_pav_cols[7].empty()
-            total_pav_cols[8].empty()
-
-
-    if st.session_state.deleting_pav_index is not None:
-        confirm_delete_dialog()
+with st.expander("🏢 Dados dos Pavimentos", expanded=True):
+    pavimentos_df = tabela_pavimentos(st.session_state.pavimentos)
+    with st.form("form_pavimentos", border=False):
+        editado = st.data_editor(
+            pavimentos_df,
+            key=f"grade_pavimentos_{st.session_state.versao_grades}",
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            column_order=["nome", "tipo", "rep", "coef", "area", "area_eq", "area_constr", "constr"],
+            column_config={
+                "nome": st.column_config.TextColumn("Nome", default=DEFAULT_PAVIMENTO["nome"], required=True),
+                "tipo": st.column_config.SelectboxColumn("Tipo", options=list(TIPOS_PAVIMENTO), default=DEFAULT_PAVIMENTO["tipo"], required=True, width="large"),
+                "rep": st.column_config.NumberColumn("Rep.", min_value=1, step=1, default=DEFAULT_PAVIMENTO["rep"]),
+                "coef": st.column_config.NumberColumn("Coef.", min_value=0.0, step=0.01, format="%.2f", default=DEFAULT_PAVIMENTO["coef"],
+                                                      help="Ajustado à faixa do tipo de pavimento ao aplicar"),
+                "area": st.column_config.NumberColumn("Área (m²)", min_value=0.0, step=10.0, format="%.2f", default=DEFAULT_PAVIMENTO["area"]),
+                "area_eq": st.column_config.NumberColumn("Área Eq. Total", format="%.2f", disabled=True),
+                "area_constr": st.column_config.NumberColumn("Área Constr.", format="%.2f", disabled=True),
+                "constr": st.column_config.CheckboxColumn("A.C?", default=DEFAULT_PAVIMENTO["constr"]),
+            },
+        )
+        if st.form_submit_button("Aplicar Pavimentos", type="primary"):
+            st.session_state.pavimentos[:] = normalizar_pavimentos(editado)
+            st.session_state.versao_grades += 1
+            st.rerun()
+
+    if not pavimentos_df.empty:
+        totais = pavimentos_df[["area_total", "area_eq", "area_constr"]].sum()
+        st.markdown(
+            f"**Total** — {len(pavimentos_df)} pavimentos · Área: {fmt_br(totais['area_total'])} m² · "
+            f"Área Eq.: {fmt_br(totais['area_eq'])} m² · Área Constr.: {fmt_br(totais['area_constr'])} m²"
+        )
 
 # --- Nova Tabela de Dados de Unidades ---
 with st.expander("📝 Dados de Unidades", expanded=True):
-    b1_un, _ = st.columns([0.2, 0.8])
-    if b1_un.button("➕ Unidade"):
-        # Adiciona uma nova unidade ao estado da sessão
-        # Inclui a chave 'area_privativa_total' para evitar o KeyError
-        new_unit = {"nome": f"Unidade {len(st.session_state.unidades) + 1}", "quantidade": 1, "area_privativa": 100.0}
-        new_unit['area_privativa_total'] = new_unit['quantidade'] * new_unit['area_privativa']
-        st.session_state.unidades.append(new_unit)
-        st.rerun()
-
-    # Definir as colunas da tabela
-    col_widths = [3, 1.5, 2, 2.5, 0.8]
-    headers = ["Tipo de Unidade", "Quantidade", "Área Privativa (m²)", "Área Privativa Total (m²)", "Ação"]
-    header_cols = st.columns(col_widths)
-    for hc, title in zip(header_cols, headers):
-        hc.markdown(f'<p style="text-align:center; font-size:14px;"><b>{title}</b></p>', unsafe_allow_html=True)
-
-    # Exibir a tabela com campos editáveis
-    total_quantidade = 0
-    total_area_privativa_total = 0
-    if st.session_state.unidades:
-        for i, unidade in enumerate(st.session_state.unidades):
-            cols = st.columns(col_widths)
-            
-            unidade['nome'] = cols[0].text_input("nome", unidade['nome'], key=f"unid_nome_{i}", label_visibility="collapsed")
-            unidade['quantidade'] = cols[1].number_input("quantidade", min_value=1, value=unidade['quantidade'], step=1, key=f"unid_qtd_{i}", label_visibility="collapsed")
-            unidade['area_privativa'] = cols[2].number_input("area_priv", min_value=0.0, value=unidade['area_privativa'], step=1.0, format="%.2f", key=f"unid_area_{i}", label_visibility="collapsed")
-            
-            unidade['area_privativa_total'] = unidade['quantidade'] * unidade['area_privativa']
-            cols[3].markdown(f"<div style='text-align:center; padding-top: 8px;'>{fmt_br(unidade['area_privativa_total'])}</div>", unsafe_allow_html=True)
-
-            if cols[4].button("🗑️", key=f"del_unid_{i}", use_container_width=True):
-                del st.session_state.unidades[i]
-                st.rerun()
-
-            total_quantidade += unidade['quantidade']
-            total_area_privativa_total += unidade['area_privativa_total']
-
-    # Linha de totais com melhorias de estilo
-    if st.session_state.unidades:
-        st.markdown("<div class='total-row'>", unsafe_allow_html=True)
-        total_cols = st.columns(col_widths)
-        total_cols[0].markdown(f"<div style='font-weight: bold; text-align:center;'>Total</div>", unsafe_allow_html=True)
-        total_cols[1].markdown(f"<div style='font-weight: bold; text-align:center; '>{total_quantidade}</div>", unsafe_allow_html=True)
-        total_cols[2].empty()
-        total_cols[3].markdown(f"<div style='font-weight: bold; text-align:center;'>{fmt_br(total_area_privativa_total)}</div>", unsafe_allow_html=True)
-        st.markdown("</div>", unsafe_allow_html=True)
+    unidades_df = tabela_unidades(st.session_state.unidades)
+    with st.form("form_unidades", border=False):
+        editado = st.data_editor(
+            unidades_df,
+            key=f"grade_unidades_{st.session_state.versao_grades}",
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            column_order=["nome", "quantidade", "area_privativa", "area_privativa_total"],
+            column_config={
+                "nome": st.column_config.TextColumn("Tipo de Unidade"),
+                "quantidade": st.column_config.NumberColumn("Quantidade", min_value=1, step=1, default=1),
+                "area_privativa": st.column_config.NumberColumn("Área Privativa (m²)", min_value=0.0, step=1.0, format="%.2f", default=100.0),
+                "area_privativa_total": st.column_config.NumberColumn("Área Privativa Total (m²)", format="%.2f", disabled=True),
+            },
+        )
+        if st.form_submit_button("Aplicar Unidades", type="primary"):
+            st.session_state.unidades[:] = normalizar_unidades(editado)
+            st.session_state.versao_grades += 1
+            st.rerun()
+
+    total_quantidade = int(unidades_df["quantidade"].sum()) if not unidades_df.empty else 0
+    if not unidades_df.empty:
+        st.markdown(f"**Total** — {total_quantidade} unidades · Área Privativa Total: {fmt_br(unidades_df['area_privativa_total'].sum())} m²")
 
     # Sincroniza o número total de unidades com o estado da sessão
     info['num_unidades'] = total_quantidade
@@ -289,9 +238,18 @@ info['pavimentos'] = st.session_state.pavimentos
 info['unidades'] = st.session_state.unidades
 
 if submitted:
-    st.session_state.project_manager.save_project(info)
-    st.success("Dados do projeto atualizados com sucesso!")
+    try:
+        get_project_manager().save_project(info)
+        st.success("Dados do projeto atualizados com sucesso!")
+    except ConflictError:
+        st.error("O projeto foi alterado em outra sessão. Recarregue-o antes de salvar para não sobrescrever essas alterações.")
 
 if st.button("Salvar Dados do Projeto", type="primary"):
-    st.session_state.project_manager.save_project(info)
-    st.success("Dados do projeto salvos com sucesso!")
+    try:
+        get_project_manager().save_project(info)
+        st.success("Dados do projeto salvos com sucesso!")
+    except ConflictError:
+        st.error("O projeto foi alterado em outra sessão. Recarregue-o antes de salvar para não sobrescrever essas alterações.")
+
+# Desempenho do grafo de cálculo compartilhado, na barra lateral
+render_estatisticas_calculo()
@@ -4,7 +4,8 @@ import plotly.express as px
 from utils import (
     fmt_br, render_metric_card, render_sidebar, handle_percentage_redistribution,
     ETAPAS_OBRA,
-    load_json, save_to_historico, init_session_state_vars, calcular_areas_e_custos, ProjectManager
+    save_to_historico, init_session_state_vars, get_project_manager, resultado_da_sessao, render_estatisticas_calculo,
+    medir_execucao
 )
 
 st.set_page_config(page_title="Custos Diretos", layout="wide")
@@ -24,17 +25,98 @@ info = st.session_state.projeto_info
 st.title("🏗️ Custos Diretos")
 st.subheader("Análise e Detalhamento de Custos da Obra")
 
-# Chamando a função centralizada de cálculo
-area_construida_total, _, custo_direto_total, pavimentos_df = calcular_areas_e_custos(st.session_state.pavimentos, info.get('custos_config', {}))
-
-custo_indireto_obra_total = 0
-if 'custos_indiretos_obra' in st.session_state and 'duracao_obra' in st.session_state:
-    for item, valor_mensal in st.session_state.custos_indiretos_obra.items():
-        custo_indireto_obra_total += valor_mensal * st.session_state.duracao_obra
-
-custo_direto_total_final = custo_direto_total
-
-if not pavimentos_df.empty:
+# Resultado compartilhado entre as páginas (grafo de cálculo memoizado)
+resultado = resultado_da_sessao(info)
+area_construida_total = resultado.area_construida
+custo_direto_total_final = resultado.custo_direto
+
+@st.fragment
+@medir_execucao("etapas_obra")
+def editor_etapas(custo_direto_total_final):
+    """
+    Tabela de percentuais por etapa e gráfico da composição. Como fragmento,
+    mover um slider ou aplicar uma referência reexecuta só esta parte da
+    página, sem os cards, o gráfico por tipo de pavimento e a barra lateral.
+    """
+    st.markdown("##### Comparativo com Histórico de Obras")
+    obras_historicas = get_project_manager().list_historico('direto')
+    obra_ref_selecionada = st.selectbox("Usar como Referência:", ["Nenhuma"] + [f"{o['id']} – {o['nome']}" for o in obras_historicas], index=0, key="ref_direto")
+
+    ref_percentuais, ref_nome = {}, None
+    if obra_ref_selecionada != "Nenhuma":
+        ref_id = int(obra_ref_selecionada.split("–")[0].strip())
+        ref_nome = obra_ref_selecionada.split("–")[1].strip()
+        obra_ref_data = next((o for o in obras_historicas if o['id'] == ref_id), None)
+        if obra_ref_data: ref_percentuais = obra_ref_data['percentuais']
+
+    # Edições desta execução (sliders, campos e botões de referência), lidas
+    # do estado dos widgets e redistribuídas de uma só vez antes de desenhá-los,
+    # para que a tabela já saia com os valores finais, sem st.rerun
+    editados = {}
+    for etapa in ETAPAS_OBRA:
+        atual = st.session_state.etapas_percentuais[etapa]['percentual']
+        slider_val = st.session_state.get(f"slider_etapa_{etapa}", atual)
+        input_val = st.session_state.get(f"input_etapa_{etapa}", atual)
+        if st.session_state.get(f"apply_{etapa}") and ref_nome:
+            editados[etapa] = (ref_percentuais.get(etapa, 0), ref_nome)
+        elif slider_val != atual:
+            editados[etapa] = (slider_val, "Manual")
+        elif input_val != atual:
+            editados[etapa] = (input_val, "Manual")
+    if editados:
+        for etapa, (_, fonte) in editados.items():
+            st.session_state.etapas_percentuais[etapa]['fonte'] = fonte
+        handle_percentage_redistribution('etapas_percentuais', ETAPAS_OBRA, {etapa: v for etapa, (v, _) in editados.items()})
+    for etapa in ETAPAS_OBRA:
+        st.session_state[f"slider_etapa_{etapa}"] = st.session_state[f"input_etapa_{etapa}"] = float(st.session_state.etapas_percentuais[etapa]['percentual'])
+
+    st.divider()
+    cols = st.columns([2.5, 1.5, 1, 1.5, 1, 1.5, 1])
+    cols[0].markdown("**Etapa**"); cols[1].markdown("**Fonte**"); cols[2].markdown("**Ref. (%)**")
+    cols[3].markdown("**Seu Projeto (%)**"); cols[5].markdown("<p style='text-align: center;'>Custo (R$)</p>", unsafe_allow_html=True); cols[6].markdown("<p style='text-align: center;'>Ação</p>", unsafe_allow_html=True)
+
+    for etapa, (min_val, _, max_val) in ETAPAS_OBRA.items():
+        c = st.columns([2.5, 1.5, 1, 1.5, 1, 1.5, 1])
+        c[0].container(height=38, border=False).write(etapa)
+        etapa_info = st.session_state.etapas_percentuais[etapa]
+        c[1].container(height=38, border=False).write(etapa_info['fonte'])
+        ref_val = ref_percentuais.get(etapa, 0)
+        c[2].container(height=38, border=False).write(f"{ref_val:.2f}%" if obra_ref_selecionada != "Nenhuma" else "-")
+
+        # Os valores vêm do estado dos widgets, já redistribuído acima
+        c[3].slider("slider", min_val, max_val, step=0.1, key=f"slider_etapa_{etapa}", label_visibility="collapsed")
+        c[4].number_input("input", min_val, max_val, step=0.1, key=f"input_etapa_{etapa}", label_visibility="collapsed")
+
+        custo_etapa = custo_direto_total_final * (etapa_info['percentual'] / 100)
+        c[5].markdown(f"<p style='text-align: center;'>R$ {fmt_br(custo_etapa)}</p>", unsafe_allow_html=True)
+
+        c[6].button("⬅️", key=f"apply_{etapa}", help=f"Aplicar percentual de referência ({ref_val:.2f}%)", use_container_width=True)
+
+    # Adicionando a nova seção de visualização
+    st.divider()
+    st.markdown("##### Visualização da Composição do Custo por Etapa")
+
+    # Cria um DataFrame a partir dos dados do estado da sessão
+    df_etapas = pd.DataFrame(st.session_state.etapas_percentuais).T
+    df_etapas['percentual'] = df_etapas['percentual'].astype(float)
+
+    # Cria o gráfico de pizza
+    fig_pie = px.pie(
+        df_etapas,
+        values='percentual',
+        names=df_etapas.index,
+        title='Distribuição Percentual do Custo Direto',
+        hole=0.4 # Cria um "donut chart" para melhor visualização
+    )
+
+    # Ajustes de layout para o gráfico de pizza
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label', marker=dict(line=dict(color='#000000', width=1)))
+    fig_pie.update_layout(showlegend=False)
+
+    st.plotly_chart(fig_pie, use_container_width=True)
+
+
+if st.session_state.pavimentos:
     with st.expander("📊 Análise e Resumo Financeiro", expanded=True):
         total_constr = area_construida_total
         custo_por_ac = custo_direto_total_final / total_constr if total_constr > 0 else 0.0
@@ -46,77 +128,13 @@ if not pavimentos_df.empty:
         card_cols[2].markdown(render_metric_card("Custo / m² (Área Constr.)", f"R$ {fmt_br(custo_por_ac)}", cores[1]), unsafe_allow_html=True)
         card_cols[3].markdown(render_metric_card("Área Construída Total", f"{fmt_br(total_constr)} m²", cores[2]), unsafe_allow_html=True)
         
-        custo_por_tipo = pavimentos_df.groupby("tipo")["custo_direto"].sum().reset_index()
+        custo_por_tipo = pd.DataFrame(list(resultado.custo_direto_por_tipo.items()), columns=["tipo", "custo_direto"])
         fig = px.bar(custo_por_tipo, x='tipo', y='custo_direto', text_auto='.2s', title="Custo Direto por Tipo de Pavimento")
         fig.update_traces(textfont_size=12, textangle=0, textposition="outside", cliponaxis=False); fig.update_layout(xaxis_title=None, yaxis_title="Custo (R$)")
         st.plotly_chart(fig, use_container_width=True)
 
     with st.expander("💸 Custo Direto por Etapa da Obra", expanded=True):
-        st.markdown("##### Comparativo com Histórico de Obras")
-        obras_historicas = st.session_state.project_manager.load_json(st.session_state.project_manager.HISTORICO_DIRETO_PATH)
-        obra_ref_selecionada = st.selectbox("Usar como Referência:", ["Nenhuma"] + [f"{o['id']} – {o['nome']}" for o in obras_historicas], index=0, key="ref_direto")
-        
-        ref_percentuais, ref_nome = {}, None
-        if obra_ref_selecionada != "Nenhuma":
-            ref_id = int(obra_ref_selecionada.split("–")[0].strip())
-            ref_nome = obra_ref_selecionada.split("–")[1].strip()
-            obra_ref_data = next((o for o in obras_historicas if o['id'] == ref_id), None)
-            if obra_ref_data: ref_percentuais = obra_ref_data['percentuais']
-        
-        st.divider()
-        cols = st.columns([2.5, 1.5, 1, 1.5, 1, 1.5, 1])
-        cols[0].markdown("**Etapa**"); cols[1].markdown("**Fonte**"); cols[2].markdown("**Ref. (%)**")
-        cols[3].markdown("**Seu Projeto (%)**"); cols[5].markdown("<p style='text-align: center;'>Custo (R$)</p>", unsafe_allow_html=True); cols[6].markdown("<p style='text-align: center;'>Ação</p>", unsafe_allow_html=True)
-
-        for etapa, (min_val, default_val, max_val) in ETAPAS_OBRA.items():
-            c = st.columns([2.5, 1.5, 1, 1.5, 1, 1.5, 1])
-            c[0].container(height=38, border=False).write(etapa)
-            etapa_info = st.session_state.etapas_percentuais.get(etapa, {"percentual": default_val, "fonte": "Manual"})
-            c[1].container(height=38, border=False).write(etapa_info['fonte'])
-            ref_val = ref_percentuais.get(etapa, 0)
-            c[2].container(height=38, border=False).write(f"{ref_val:.2f}%" if obra_ref_selecionada != "Nenhuma" else "-")
-            
-            slider_col, input_col = c[3], c[4]
-            current_percent = etapa_info['percentual']
-            
-            percent_slider = slider_col.slider("slider", min_val, max_val, float(current_percent), 0.1, key=f"slider_etapa_{etapa}", label_visibility="collapsed")
-            percent_input = input_col.number_input("input", min_val, max_val, percent_slider, 0.1, key=f"input_etapa_{etapa}", label_visibility="collapsed")
-
-            if percent_input != current_percent:
-                st.session_state.etapas_percentuais[etapa]['percentual'] = percent_input
-                st.session_state.etapas_percentuais[etapa]['fonte'] = "Manual"
-                handle_percentage_redistribution('etapas_percentuais', ETAPAS_OBRA)
-                st.rerun()
-
-            custo_etapa = custo_direto_total_final * (percent_input / 100)
-            c[5].markdown(f"<p style='text-align: center;'>R$ {fmt_br(custo_etapa)}</p>", unsafe_allow_html=True)
-            
-            if c[6].button("⬅️", key=f"apply_{etapa}", help=f"Aplicar percentual de referência ({ref_val:.2f}%)", use_container_width=True):
-                if ref_nome:
-                    st.session_state.etapas_percentuais[etapa]['percentual'] = ref_val
-                    st.session_state.etapas_percentuais[etapa]['fonte'] = ref_nome
-                    handle_percentage_redistribution('etapas_percentuais', ETAPAS_OBRA)
-                    st.rerun()
-
-        # Adicionando a nova seção de visualização
-        st.divider()
-        st.markdown("##### Visualização da Composição do Custo por Etapa")
-
-        # Cria um DataFrame a partir dos dados do estado da sessão
-        df_etapas = pd.DataFrame(st.session_state.etapas_percentuais).T
-        df_etapas['percentual'] = df_etapas['percentual'].astype(float)
-
-        # Cria o gráfico de pizza
-        fig_pie = px.pie(
-            df_etapas,
-            values='percentual',
-            names=df_etapas.index,
-            title='Distribuição Percentual do Custo Direto',
-            hole=0.4 # Cria um "donut chart" para melhor visualização
-        )
-
-        # Ajustes de layout para o gráfico de pizza
-        fig_pie.update_traces(textposition='inside', textinfo='percent+label', marker=dict(line=dict(color='#000000', width=1)))
-        fig_pie.update_layout(showlegend=False)
-
-        st.plotly_chart(fig_pie, use_container_width=True)
+        editor_etapas(custo_direto_total_final)
+
+# Desempenho do grafo de cálculo compartilhado, na barra lateral
+render_estatisticas_calculo()
@@ -3,8 +3,9 @@ import streamlit as st
 import pandas as pd
 from utils import (
     fmt_br, render_metric_card, render_sidebar, DEFAULT_CUSTOS_INDIRETOS_OBRA,
-    init_session_state_vars
+    init_session_state_vars, resultado_da_sessao, render_estatisticas_calculo, medir_execucao, safe_float
 )
+from orcamento.core import DEFAULT_DURACAO_OBRA
 
 st.set_page_config(page_title="Administração da Obra", layout="wide", page_icon="📝")
 
@@ -100,77 +101,83 @@ st.subheader("Custos Mensais e Duração do Projeto")
 if 'custos_indiretos_obra' not in st.session_state:
     st.session_state.custos_indiretos_obra = info.get('custos_indiretos_obra', {k: v for k, v in DEFAULT_CUSTOS_INDIRETOS_OBRA.items()})
 if 'duracao_obra' not in st.session_state:
-    st.session_state.duracao_obra = info.get('duracao_obra', 12)
-
-# Colocando os cards no topo, alinhados horizontalmente
-with st.container(border=True):
-    total_mensal = sum(st.session_state.custos_indiretos_obra.values())
-    custo_indireto_obra_total_recalculado = total_mensal * st.session_state.duracao_obra
-
-    card_cols = st.columns(3)
-    
-    card_cols[0].markdown(render_metric_card(
-        "Custo Mensal Total",
-        f"R$ {fmt_br(total_mensal)}",
-        "#007bff"
-    ), unsafe_allow_html=True)
-
-    card_cols[1].markdown(render_metric_card(
-        "Duração da Obra (meses)",
-        f"{st.session_state.duracao_obra}",
-        "#28a745"
-    ), unsafe_allow_html=True)
-
-    card_cols[2].markdown(render_metric_card(
-        "Custo Indireto de Obra Total",
-        f"R$ {fmt_br(custo_indireto_obra_total_recalculado)}",
-        "#ff7f00"
-    ), unsafe_allow_html=True)
-
-
-with st.expander("💸 Custos Indiretos de Obra (por Período)", expanded=True):
-    st.session_state.duracao_obra = st.slider(
-        "Duração da Obra (meses):",
-        min_value=1,
-        max_value=60,
-        value=st.session_state.duracao_obra
-    )
-
-    st.write("### Ajuste os Custos Mensais")
-
-    # Definindo as colunas da tabela manual
-    col_widths = [5, 1.5, 1.5]
-    headers = ["Item", "Custo Mensal (R$)", "Custo Total (R$)"]
-    header_cols = st.columns(col_widths)
-    for hc, title in zip(header_cols, headers):
-        hc.markdown(f'<p style="text-align:center; font-size:16px;"><b>{title}</b></p>', unsafe_allow_html=True)
-    
+    st.session_state.duracao_obra = info.get('duracao_obra', DEFAULT_DURACAO_OBRA)
+
+@st.fragment
+@medir_execucao("administracao_obra")
+def editor_administracao_obra():
+    """
+    Cards, duração e tabela de custos mensais. Como fragmento, mudar a
+    duração ou aplicar a tabela reexecuta só esta parte da página; o
+    formulário envia todas as linhas editadas de uma vez.
+    """
+    # Aplica a duração e os valores enviados pelo formulário antes de desenhar
+    # os cards, para que os totais já saiam atualizados
+    if "duracao_obra_slider" in st.session_state:
+        st.session_state.duracao_obra = st.session_state.duracao_obra_slider
+    st.session_state.duracao_obra_slider = st.session_state.duracao_obra
     for item, valor_mensal in st.session_state.custos_indiretos_obra.items():
-        cols = st.columns(col_widths)
-        
-        cols[0].markdown(f"<div style='padding-top: 8px;'>{item}</div>", unsafe_allow_html=True)
-        
-        novo_valor_mensal_str = cols[1].text_input(
-            "Custo Mensal (R$)",
-            value=f"{valor_mensal:.2f}".replace('.',','),
-            key=f"custo_mensal_{item}",
-            label_visibility="collapsed"
-        )
-        
-        novo_valor_mensal_float = valor_mensal
-        try:
-            # Substitui a vírgula por ponto para a conversão
-            novo_valor_mensal_float = float(novo_valor_mensal_str.replace(',', '.'))
-        except ValueError:
-            # Se a conversão falhar, usa o valor original e não atualiza
-            pass
-        
-        custo_total_item = novo_valor_mensal_float * st.session_state.duracao_obra
-        cols[2].markdown(f"<div style='text-align:center; padding-top: 8px;'>R$ {fmt_br(custo_total_item)}</div>", unsafe_allow_html=True)
-        
-        if novo_valor_mensal_float != valor_mensal:
-            st.session_state.custos_indiretos_obra[item] = novo_valor_mensal_float
-            st.rerun()
+        key = f"custo_mensal_{item}"
+        if key in st.session_state:
+            # Substitui a vírgula por ponto para a conversão; se falhar, mantém o valor original
+            st.session_state.custos_indiretos_obra[item] = safe_float(st.session_state[key], valor_mensal)
+        st.session_state[key] = f"{st.session_state.custos_indiretos_obra[item]:.2f}".replace('.', ',')
+
+    # Colocando os cards no topo, alinhados horizontalmente
+    with st.container(border=True):
+        total_mensal = sum(st.session_state.custos_indiretos_obra.values())
+        custo_indireto_obra_total_recalculado = resultado_da_sessao(info).custo_indireto_obra
+
+        card_cols = st.columns(3)
+
+        card_cols[0].markdown(render_metric_card(
+            "Custo Mensal Total",
+            f"R$ {fmt_br(total_mensal)}",
+            "#007bff"
+        ), unsafe_allow_html=True)
+
+        card_cols[1].markdown(render_metric_card(
+            "Duração da Obra (meses)",
+            f"{st.session_state.duracao_obra}",
+            "#28a745"
+        ), unsafe_allow_html=True)
+
+        card_cols[2].markdown(render_metric_card(
+            "Custo Indireto de Obra Total",
+            f"R$ {fmt_br(custo_indireto_obra_total_recalculado)}",
+            "#ff7f00"
+        ), unsafe_allow_html=True)
+
+    with st.expander("💸 Custos Indiretos de Obra (por Período)", expanded=True):
+        st.slider("Duração da Obra (meses):", min_value=1, max_value=60, key="duracao_obra_slider")
+
+        st.write("### Ajuste os Custos Mensais")
+
+        # Definindo as colunas da tabela manual
+        col_widths = [5, 1.5, 1.5]
+        headers = ["Item", "Custo Mensal (R$)", "Custo Total (R$)"]
+        header_cols = st.columns(col_widths)
+        for hc, title in zip(header_cols, headers):
+            hc.markdown(f'<p style="text-align:center; font-size:16px;"><b>{title}</b></p>', unsafe_allow_html=True)
+
+        with st.form("form_administracao_obra", border=False):
+            for item, valor_mensal in st.session_state.custos_indiretos_obra.items():
+                cols = st.columns(col_widths)
+
+                cols[0].markdown(f"<div style='padding-top: 8px;'>{item}</div>", unsafe_allow_html=True)
+
+                cols[1].text_input("Custo Mensal (R$)", key=f"custo_mensal_{item}", label_visibility="collapsed")
+
+                custo_total_item = valor_mensal * st.session_state.duracao_obra
+                cols[2].markdown(f"<div style='text-align:center; padding-top: 8px;'>R$ {fmt_br(custo_total_item)}</div>", unsafe_allow_html=True)
+
+            st.form_submit_button("Aplicar Custos", type="primary")
 
     info['custos_indiretos_obra'] = st.session_state.custos_indiretos_obra
     info['duracao_obra'] = st.session_state.duracao_obra
+
+
+editor_administracao_obra()
+
+# Desempenho do grafo de cálculo compartilhado, na barra lateral
+render_estatisticas_calculo()
@@ -1,13 +1,18 @@
 # pages/3_Resultados_e_Indicadores.py
 import streamlit as st
-import pandas as pd
 from utils import (
     fmt_br, render_metric_card, render_sidebar,
-    calculate_financial_metrics, calcular_areas_e_custos,
-    generate_pdf_report
+    calcular_areas_e_custos, resultado_da_sessao, render_estatisticas_calculo,
+    generate_pdf_report, premissas_da_sessao, safe_float, cronograma_da_sessao, init_session_state_vars
 )
+from orcamento.core import JANELAS_ETAPAS, Unidade
+from orcamento.core.simulacao import simular_margem
+from orcamento.core.cenarios import EIXOS, avaliar, grade
+from orcamento.core.metas import resolver_metas
+from orcamento.core.fluxo_caixa import CondicoesFluxo, fluxos, indicadores
+from orcamento.core.vendas import TiposUnidade
 import json
-import requests
+import os
 import time
 
 st.set_page_config(page_title="Resultados e Indicadores", layout="wide")
@@ -30,6 +35,9 @@ if "projeto_info" not in st.session_state:
         st.switch_page("Início.py")
     st.stop()
 
+# Inicializa as variáveis de estado
+init_session_state_vars(st.session_state.projeto_info)
+
 # Passamos uma chave única para a sidebar para evitar erros de chave duplicada
 render_sidebar(form_key="sidebar_resultados")
 
@@ -37,25 +45,19 @@ info = st.session_state.projeto_info
 st.title("📈 Resultados e Indicadores Chave")
 
 # --- CÁLCULOS GERAIS (agora usando as funções de utils) ---
-pavimentos_df = pd.DataFrame(info.get('pavimentos', []))
 custos_config = info.get('custos_config', {})
-area_construida_total, _, custo_direto_total, pavimentos_df = calcular_areas_e_custos(st.session_state.pavimentos, custos_config)
-
-# Obter o custo indireto de obra da session_state de forma segura
-custo_indireto_obra_total = 0
-if 'custos_indiretos_obra' in st.session_state and 'duracao_obra' in st.session_state:
-    total_mensal = sum(st.session_state.custos_indiretos_obra.values())
-    custo_indireto_obra_total = total_mensal * st.session_state.duracao_obra
-
-# Calculando todas as métricas financeiras de uma só vez
-finance_metrics = calculate_financial_metrics(info, pavimentos_df, custo_direto_total, custo_indireto_obra_total)
-vgv_total = finance_metrics['vgv_total']
-valor_total_despesas = finance_metrics['valor_total_despesas']
-lucratividade_valor = finance_metrics['lucratividade_valor']
-lucratividade_percentual = finance_metrics['lucratividade_percentual']
-custo_indireto_calculado = finance_metrics['custo_indireto_calculado']
-custo_terreno_total = finance_metrics['custo_terreno_total']
-total_area_privativa = finance_metrics['area_privativa_total']
+# Resultado compartilhado entre as páginas (grafo de cálculo memoizado)
+financeiro = resultado_da_sessao(info).financeiro
+area_construida_total = financeiro.area_construida_total
+custo_direto_total = financeiro.custo_direto_total
+custo_indireto_obra_total = financeiro.custo_indireto_obra_total
+vgv_total = financeiro.vgv_total
+valor_total_despesas = financeiro.valor_total_despesas
+lucratividade_valor = financeiro.lucratividade_valor
+lucratividade_percentual = financeiro.lucratividade_percentual
+custo_indireto_calculado = financeiro.custo_indireto_calculado
+custo_terreno_total = financeiro.custo_terreno_total
+total_area_privativa = financeiro.area_privativa_total
 
 # --- APRESENTAÇÃO DOS RESULTADOS ---
 
@@ -102,11 +104,288 @@ with st.container(border=True):
     ind_cols[2].markdown(render_metric_card("Custo Indireto / m²", f"R$ {fmt_br((custo_indireto_calculado + custo_indireto_obra_total) / area_construida_total if area_construida_total > 0 else 0)}", cores[6], icon="bi-person-gear"), unsafe_allow_html=True)
     ind_cols[3].markdown(render_metric_card("Custo Total / m²", f"R$ {fmt_br(valor_total_despesas / area_construida_total if area_construida_total > 0 else 0)}", cores[7], icon="bi-clipboard-data"), unsafe_allow_html=True)
 
+# --- CRONOGRAMA FÍSICO-FINANCEIRO ---
+@st.fragment
+def render_cronograma():
+    """Desembolso mês a mês por etapa, com as janelas das etapas editáveis."""
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    config = info.setdefault('cronograma', {})
+    janelas = config.setdefault('janelas', {})
+    curvas = {"s": "Curva S", "linear": "Linear"}
+    ctrl_cols = st.columns([1, 3])
+    config['curva'] = ctrl_cols[0].radio("Desembolso em cada etapa", list(curvas), index=list(curvas).index(config.get('curva', 's')),
+                                         format_func=curvas.get, key="cronograma_curva")
+    with ctrl_cols[1].popover("Janelas das etapas (% da duração)"):
+        etapas = list(st.session_state.etapas_percentuais)
+        atuais = {e: janelas.get(e, JANELAS_ETAPAS.get(e, (0.0, 100.0))) for e in etapas}
+        tabela_janelas = pd.DataFrame({
+            "Início (%)": [a["inicio"] if isinstance(a, dict) else a[0] for a in atuais.values()],
+            "Fim (%)": [a["fim"] if isinstance(a, dict) else a[1] for a in atuais.values()],
+        }, index=etapas)
+        editadas = st.data_editor(tabela_janelas, use_container_width=True, key="cronograma_janelas", column_config={
+            "Início (%)": st.column_config.NumberColumn(min_value=0.0, max_value=100.0, step=5.0),
+            "Fim (%)": st.column_config.NumberColumn(min_value=0.0, max_value=100.0, step=5.0),
+        })
+        config['janelas'] = {e: {"inicio": float(linha["Início (%)"]), "fim": float(linha["Fim (%)"])} for e, linha in editadas.iterrows()}
+
+    cronograma = cronograma_da_sessao(info)
+    meses = list(range(1, cronograma.meses + 1))
+    fig = go.Figure()
+    for j, etapa in enumerate(cronograma.etapas):
+        fig.add_trace(go.Bar(x=meses, y=cronograma.custos[:, j], name=etapa))
+    fig.add_trace(go.Bar(x=meses, y=cronograma.administracao, name="Administração da Obra", marker_color="#5c5c5c"))
+    fig.add_trace(go.Scatter(x=meses, y=cronograma.percentual_acumulado, name="% Acumulado", yaxis="y2", mode="lines+markers",
+                             line=dict(color="black", width=2)))
+    fig.update_layout(barmode="stack", height=500, xaxis_title="Mês", yaxis_title="Desembolso (R$)",
+                      yaxis2=dict(title="% Acumulado", overlaying="y", side="right", range=[0, 105]),
+                      legend=dict(orientation="h", yanchor="top", y=-0.2))
+    st.plotly_chart(fig, use_container_width=True)
+
+    tabela = pd.DataFrame(cronograma.as_columns()).set_index("Mês")
+    st.dataframe(tabela, use_container_width=True, column_config={
+        coluna: st.column_config.NumberColumn(format="%.1f%%" if coluna == "% Acumulado" else "R$ %.2f") for coluna in tabela.columns
+    })
+
+with st.expander("📅 Cronograma Físico-Financeiro"):
+    render_cronograma()
+
+# --- VENDAS ---
+@st.fragment
+def render_vendas():
+    """Absorção das vendas por tipo de unidade e a velocidade necessária para vender tudo em um prazo."""
+    import numpy as np
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    unidades = st.session_state.unidades
+    if not unidades:
+        st.info("Cadastre os tipos de unidade em Dados do Projeto para simular as vendas.")
+        return
+
+    colunas_editaveis = {"velocidade_vendas": "Velocidade (un/mês)", "desconto_lancamento": "Desconto de Lançamento (%)", "reajuste_mensal": "Reajuste Mensal (%)"}
+    tipos_atuais = [Unidade.from_dict(u) for u in unidades]
+    tabela = pd.DataFrame({
+        "Tipo": [u.nome for u in tipos_atuais],
+        "Unidades": [u.quantidade for u in tipos_atuais],
+        "Área (m²)": [u.area_privativa for u in tipos_atuais],
+        colunas_editaveis["velocidade_vendas"]: [u.velocidade for u in tipos_atuais],
+        colunas_editaveis["desconto_lancamento"]: [u.desconto_lancamento for u in tipos_atuais],
+        colunas_editaveis["reajuste_mensal"]: [u.reajuste_mensal for u in tipos_atuais],
+    })
+    editada = st.data_editor(tabela, hide_index=True, use_container_width=True, disabled=["Tipo", "Unidades", "Área (m²)"], key="vendas_tipos", column_config={
+        colunas_editaveis["velocidade_vendas"]: st.column_config.NumberColumn(min_value=0.0, step=0.5, format="%.2f"),
+        colunas_editaveis["desconto_lancamento"]: st.column_config.NumberColumn(min_value=0.0, max_value=100.0, step=1.0, format="%.1f"),
+        colunas_editaveis["reajuste_mensal"]: st.column_config.NumberColumn(min_value=-10.0, max_value=10.0, step=0.1, format="%.2f"),
+    })
+    for unidade, atual, (_, linha) in zip(unidades, tipos_atuais, editada.iterrows()):
+        # A velocidade só é gravada quando difere da padrão, que acompanha a quantidade
+        if float(linha[colunas_editaveis["velocidade_vendas"]]) != atual.velocidade:
+            unidade["velocidade_vendas"] = float(linha[colunas_editaveis["velocidade_vendas"]])
+        unidade["desconto_lancamento"] = float(linha[colunas_editaveis["desconto_lancamento"]])
+        unidade["reajuste_mensal"] = float(linha[colunas_editaveis["reajuste_mensal"]])
+    info['unidades'] = unidades
+
+    tipos = TiposUnidade.from_unidades(unidades, custos_config.get('preco_medio_venda_m2', 10000.0))
+    vendas = tipos.simular()
+    vgv_vendas = float(vendas.vgv_realizado)
+    prazo = vendas.meses_para_vender_projetos[0]
+    res_cols = st.columns(3)
+    res_cols[0].markdown(render_metric_card("Receita de Vendas", f"R$ {fmt_br(vgv_vendas)}", "#00829d", icon="bi-cash-stack"), unsafe_allow_html=True)
+    res_cols[1].markdown(render_metric_card("Diferença para o VGV", f"R$ {fmt_br(vgv_vendas - vgv_total)}", "#8a6d3b", icon="bi-arrow-left-right"), unsafe_allow_html=True)
+    res_cols[2].markdown(render_metric_card("Prazo de Vendas", f"{prazo:.0f} meses" if prazo == prazo else f"Mais de {vendas.receita.shape[0]} meses", "#6a42c1", icon="bi-calendar3"), unsafe_allow_html=True)
+
+    meses = list(range(1, vendas.receita.shape[0] + 1))
+    fig = go.Figure()
+    for j, nome in enumerate(tipos.nome):
+        fig.add_trace(go.Bar(x=meses, y=vendas.receita[:, j], name=nome))
+    fig.add_trace(go.Scatter(x=meses, y=vendas.estoque_total, name="Estoque (unidades)", yaxis="y2", mode="lines", line=dict(color="black", width=2)))
+    fig.update_layout(barmode="stack", height=420, xaxis_title="Mês desde o lançamento", yaxis_title="Receita (R$)",
+                      yaxis2=dict(title="Estoque (unidades)", overlaying="y", side="right", rangemode="tozero"),
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02))
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("**Quão rápido é preciso vender?**")
+    prazo_desejado = st.slider("Prazo desejado para vender tudo (meses)", 1, 120, 24, key="vendas_prazo")
+    # Todos os cenários de velocidade de uma vez, em forma fechada
+    fatores = np.linspace(0.2, 4.0, 200)
+    resumo = tipos.resumir(fatores)
+    receita = resumo.receita_projetos[:, 0]
+    margens = avaliar(premissas_da_sessao(info), preco_venda_m2=receita / total_area_privativa if total_area_privativa > 0 else 0.0).margem
+    velocidade_total = tipos.velocidade.sum() * fatores
+    necessaria = float(tipos.velocidade_necessaria(prazo_desejado)[0]) * tipos.velocidade.sum()
+    st.caption(f"Para vender tudo em {prazo_desejado} meses são necessárias {necessaria:.2f} unidades/mês no total "
+               f"(hoje: {tipos.velocidade.sum():.2f} unidades/mês).")
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=velocidade_total, y=resumo.meses_para_vender_projetos[:, 0], name="Prazo de vendas (meses)", mode="lines"))
+    fig.add_trace(go.Scatter(x=velocidade_total, y=margens, name="Margem (%)", yaxis="y2", mode="lines", line=dict(dash="dash")))
+    fig.add_vline(x=necessaria, line_color="#a94442", annotation_text=f"{prazo_desejado} meses")
+    fig.update_layout(height=380, xaxis_title="Velocidade total (unidades/mês)", yaxis_title="Prazo de vendas (meses)",
+                      yaxis2=dict(title="Margem (%)", overlaying="y", side="right"), legend=dict(orientation="h", yanchor="bottom", y=1.02))
+    st.plotly_chart(fig, use_container_width=True)
+
+with st.expander("🏷️ Vendas: Absorção por Tipo de Unidade"):
+    render_vendas()
+
+# --- FLUXO DE CAIXA ---
+@st.fragment
+def render_fluxo_caixa():
+    """Fluxo de caixa mensal (lançamento, obra e chaves) com VPL, TIR, payback e exposição máxima."""
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    config = info.setdefault('fluxo_caixa', {})
+    padrao = CondicoesFluxo()
+    ctrl_cols = st.columns(3)
+    config['taxa_desconto_anual'] = ctrl_cols[0].number_input("Taxa de desconto (% a.a.)", 0.0, 100.0, float(config.get('taxa_desconto_anual', padrao.taxa_desconto_anual)), 0.5, key="fluxo_taxa")
+    config['entrada'] = ctrl_cols[1].number_input("Recebido no lançamento (% do VGV)", 0.0, 100.0, float(config.get('entrada', padrao.entrada)), 1.0, key="fluxo_entrada")
+    config['parcelas_obra'] = ctrl_cols[2].number_input("Recebido durante a obra (% do VGV)", 0.0, 100.0 - config['entrada'],
+                                                        min(float(config.get('parcelas_obra', padrao.parcelas_obra)), 100.0 - config['entrada']), 1.0, key="fluxo_parcelas")
+    st.caption(f"O saldo de {100 - config['entrada'] - config['parcelas_obra']:.0f}% do VGV é recebido no mês seguinte ao fim da obra. "
+               "O terreno é pago no lançamento e os custos indiretos de venda acompanham cada recebimento.")
+
+    fluxo = fluxos(premissas_da_sessao(info), cronograma_da_sessao(info), CondicoesFluxo(**config))
+    ind = indicadores(fluxo, config['taxa_desconto_anual'])
+
+    def meses(valor):
+        return "Não se paga" if valor != valor else f"{valor:.0f} meses"
+
+    res_cols = st.columns(5)
+    res_cols[0].markdown(render_metric_card("VPL", f"R$ {fmt_br(ind.vpl)}", "#00829d", icon="bi-cash-coin"), unsafe_allow_html=True)
+    res_cols[1].markdown(render_metric_card("TIR", "-" if ind.tir_mensal != ind.tir_mensal else f"{ind.tir_anual:.2f}% a.a.", "#3c763d", icon="bi-graph-up-arrow"), unsafe_allow_html=True)
+    res_cols[2].markdown(render_metric_card("Payback", meses(ind.payback), "#8a6d3b", icon="bi-hourglass-split"), unsafe_allow_html=True)
+    res_cols[3].markdown(render_metric_card("Payback Descontado", meses(ind.payback_descontado), "#6a42c1", icon="bi-hourglass-bottom"), unsafe_allow_html=True)
+    res_cols[4].markdown(render_metric_card(f"Exposição Máxima (mês {ind.mes_exposicao_maxima})", f"R$ {fmt_br(ind.exposicao_maxima)}", "#a94442", icon="bi-exclamation-triangle"), unsafe_allow_html=True)
+
+    acumulado = fluxo.cumsum()
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=list(range(len(fluxo))), y=fluxo, name="Fluxo do Mês", marker_color=["#3c763d" if v >= 0 else "#a94442" for v in fluxo]))
+    fig.add_trace(go.Scatter(x=list(range(len(fluxo))), y=acumulado, name="Saldo Acumulado", mode="lines+markers", line=dict(color="black", width=2)))
+    fig.update_layout(height=450, xaxis_title="Mês", yaxis_title="R$", legend=dict(orientation="h", yanchor="bottom", y=1.02))
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(pd.DataFrame({"Fluxo do Mês": fluxo, "Saldo Acumulado": acumulado}).rename_axis("Mês"), use_container_width=True,
+                 column_config={c: st.column_config.NumberColumn(format="R$ %.2f") for c in ("Fluxo do Mês", "Saldo Acumulado")})
+
+with st.expander("💰 Fluxo de Caixa: VPL, TIR e Exposição Máxima"):
+    render_fluxo_caixa()
+
+# --- GRADE DE CENÁRIOS (WHAT-IF) ---
+@st.fragment
+def render_grade_cenarios():
+    """Mapa da margem sobre duas premissas. Roda como fragmento: mudar os controles não reexecuta a página."""
+    import numpy as np
+    import plotly.graph_objects as go
+
+    premissas = premissas_da_sessao(info)
+    ctrl_cols = st.columns([2, 2, 1, 1])
+    eixos = list(EIXOS)
+    eixo_x = ctrl_cols[0].selectbox("Eixo horizontal", eixos, index=0, format_func=EIXOS.get, key="grade_eixo_x")
+    eixo_y = ctrl_cols[1].selectbox("Eixo vertical", [e for e in eixos if e != eixo_x], index=0, format_func=EIXOS.get, key="grade_eixo_y")
+    variacao = ctrl_cols[2].slider("Faixa (± %)", 5, 80, 30, 5, key="grade_variacao") / 100
+    resolucao = ctrl_cols[3].select_slider("Resolução", [50, 100, 200, 300], value=200, key="grade_resolucao")
+
+    base_x, base_y = getattr(premissas, eixo_x), getattr(premissas, eixo_y)
+    valores_x = np.linspace(base_x * (1 - variacao), base_x * (1 + variacao), resolucao)
+    valores_y = np.linspace(base_y * (1 - variacao), base_y * (1 + variacao), resolucao)
+    margem = np.round(grade(premissas, eixo_x, valores_x, eixo_y, valores_y).margem, 2)
+
+    fig = go.Figure(go.Heatmap(x=valores_x, y=valores_y, z=margem, colorscale="RdYlGn", zmid=0, colorbar=dict(title="Margem (%)"),
+                               hovertemplate="x: %{x:,.2f}<br>y: %{y:,.2f}<br>Margem: %{z:.2f}%<extra></extra>"))
+    # Linha de equilíbrio (margem = 0)
+    fig.add_trace(go.Contour(x=valores_x, y=valores_y, z=margem, contours=dict(start=0, end=0, coloring="lines", showlabels=True),
+                             line=dict(color="black", width=2), showscale=False, hoverinfo="skip", name="Equilíbrio"))
+    fig.add_trace(go.Scatter(x=[base_x], y=[base_y], mode="markers", marker=dict(symbol="x", size=12, color="black"), name="Projeto"))
+    fig.update_layout(xaxis_title=EIXOS[eixo_x], yaxis_title=EIXOS[eixo_y], height=550, showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
+
+with st.expander("🗺️ Cenários: Margem em Função de Duas Premissas"):
+    render_grade_cenarios()
+
+# --- BUSCA DE METAS ---
+@st.fragment
+def render_metas():
+    """Valor de cada premissa que atinge as metas de margem ou lucro, com as demais mantidas."""
+    import pandas as pd
+
+    premissas = premissas_da_sessao(info)
+    ctrl_cols = st.columns([3, 1])
+    metrica = ctrl_cols[1].radio("Meta de", ["margem", "lucro"], format_func={"margem": "Margem (%)", "lucro": "Lucro (R$)"}.get, key="metas_metrica")
+    padrao = "0; 10; 15; 20" if metrica == "margem" else "0; 1000000; 5000000"
+    texto = ctrl_cols[0].text_input("Metas (separadas por ponto e vírgula)", padrao, key=f"metas_valores_{metrica}")
+    metas = [m for m in (safe_float(t.strip(), None) for t in texto.split(";")) if m is not None]
+    if not metas:
+        st.warning("Informe ao menos uma meta numérica.")
+        return
+
+    rotulo = (lambda m: f"{m:.2f}%") if metrica == "margem" else (lambda m: f"R$ {fmt_br(m)}")
+    linhas = {"Atual": {EIXOS[v]: getattr(premissas, v) for v in EIXOS}}
+    solucoes = {v: resolver_metas(premissas, v, metas, metrica) for v in EIXOS}
+    for i, meta in enumerate(metas):
+        linhas[f"Meta {rotulo(meta)}"] = {EIXOS[v]: solucoes[v][i] for v in EIXOS}
+    st.dataframe(
+        pd.DataFrame(linhas).T, use_container_width=True,
+        column_config={EIXOS[v]: st.column_config.NumberColumn(format="%.2f") for v in EIXOS},
+    )
+    st.caption("Preço de venda: mínimo necessário. Demais premissas: máximo admissível. Células vazias indicam metas que não são atingíveis só com aquela premissa.")
+
+with st.expander("🎯 Metas: Quanto Cada Premissa Pode Variar"):
+    render_metas()
+
+# --- SIMULAÇÃO DE MONTE CARLO ---
+with st.expander("🎲 Simulação de Monte Carlo da Margem"):
+    st.caption(
+        "Sorteia os percentuais de cada custo indireto entre o mínimo e o máximo de referência "
+        "(distribuição triangular com moda no valor do projeto) e varia o preço de venda e os custos por m² "
+        "dentro das faixas abaixo. As etapas da obra só repartem o custo direto e não entram no sorteio."
+    )
+    with st.form("form_simulacao"):
+        sim_cols = st.columns(3)
+        spread_preco = sim_cols[0].number_input("Preço de venda/m² (± %)", 0.0, 50.0, 10.0, 1.0)
+        spread_custo = sim_cols[1].number_input("Custo de construção/m² (± %)", 0.0, 50.0, 10.0, 1.0)
+        spread_terreno = sim_cols[2].number_input("Custo do terreno/m² (± %)", 0.0, 50.0, 5.0, 1.0)
+        sim_cols = st.columns(4)
+        n_sorteios = sim_cols[0].number_input("Nº de sorteios", 10_000, 5_000_000, 1_000_000, 100_000)
+        margem_meta = sim_cols[1].number_input("Margem mínima desejada (%)", -100.0, 100.0, 15.0, 1.0)
+        semente = sim_cols[2].number_input("Semente", 0, 2**31 - 1, 42, 1)
+        multiprocesso = sim_cols[3].checkbox("Usar vários núcleos", value=False)
+        if st.form_submit_button("Simular", type="primary"):
+            with st.spinner("Simulando..."):
+                st.session_state.simulacao = simular_margem(
+                    premissas_da_sessao(info), n=int(n_sorteios), seed=int(semente),
+                    spreads={"preco_venda_m2": spread_preco / 100, "custo_m2": spread_custo / 100, "custo_terreno_m2": spread_terreno / 100},
+                    processos=os.cpu_count() if multiprocesso else 1,
+                )
+
+    simulacao = st.session_state.get("simulacao")
+    if simulacao is not None:
+        import numpy as np
+        import plotly.graph_objects as go
+
+        percentis = simulacao.percentis()
+        res_cols = st.columns(5)
+        res_cols[0].markdown(render_metric_card(f"P(margem < {margem_meta:.1f}%)", f"{simulacao.prob_abaixo(margem_meta) * 100:.1f}%", "#a94442", icon="bi-exclamation-triangle"), unsafe_allow_html=True)
+        res_cols[1].markdown(render_metric_card("Margem Média", f"{simulacao.media:.2f}%", "#31708f", icon="bi-percent"), unsafe_allow_html=True)
+        res_cols[2].markdown(render_metric_card("P5", f"{percentis[5]:.2f}%", "#8a6d3b", icon="bi-arrow-down"), unsafe_allow_html=True)
+        res_cols[3].markdown(render_metric_card("P50", f"{percentis[50]:.2f}%", "#3c763d", icon="bi-dash"), unsafe_allow_html=True)
+        res_cols[4].markdown(render_metric_card("P95", f"{percentis[95]:.2f}%", "#6a42c1", icon="bi-arrow-up"), unsafe_allow_html=True)
+
+        # Histograma pré-agregado: enviar um milhão de pontos ao navegador seria inviável
+        contagens, bordas = np.histogram(simulacao.margens, bins=80)
+        fig = go.Figure(go.Bar(x=(bordas[:-1] + bordas[1:]) / 2, y=contagens / len(simulacao.margens) * 100, width=bordas[1] - bordas[0]))
+        fig.add_vline(x=margem_meta, line_dash="dash", line_color="#a94442", annotation_text="Meta")
+        fig.add_vline(x=lucratividade_percentual, line_color="#3c763d", annotation_text="Projeto")
+        fig.update_layout(xaxis_title="Margem de Lucro (%)", yaxis_title="Frequência (%)", bargap=0, title=f"{len(simulacao.margens):,} sorteios (semente {simulacao.seed})".replace(",", "."))
+        st.plotly_chart(fig, use_container_width=True)
+
 st.divider()
 
 # --- DEFINIÇÃO DA LÓGICA DE GERAÇÃO DA ANÁLISE ---
 def generate_ai_analysis():
     """Gera a análise de viabilidade com IA e exibe o resultado."""
+    # Importado só quando o botão é usado, para não pesar no carregamento da página
+    import requests
+
     # Prepara o prompt com os dados mais importantes
     prompt_data = {
         "nome_projeto": info.get('nome', 'Projeto Sem Nome'),
@@ -276,10 +555,13 @@ if "ai_analysis" in st.session_state and st.session_state.ai_analysis:
 # Botão de download do relatório PDF
 if st.button("Gerar e Baixar Relatório PDF", type="primary"):
     with st.spinner("Gerando seu relatório..."):
+        # A tabela por pavimento só é necessária para o relatório
+        _, _, _, pavimentos_df = calcular_areas_e_custos(st.session_state.pavimentos, custos_config)
         pdf_data = generate_pdf_report(
             info, vgv_total, valor_total_despesas, lucratividade_valor, lucratividade_percentual,
             custo_direto_total, custo_indireto_calculado, custo_terreno_total, area_construida_total,
-            custos_config, st.session_state.custos_indiretos_percentuais, pavimentos_df, custo_indireto_obra_total
+            custos_config, st.session_state.custos_indiretos_percentuais, pavimentos_df, custo_indireto_obra_total,
+            cronograma=cronograma_da_sessao(info)
         )
         st.download_button(
             label="Relatório Concluído! Clique aqui para baixar.",
@@ -287,3 +569,6 @@ if st.button("Gerar e Baixar Relatório PDF", type="primary"):
             file_name=f"Relatorio_{info['nome']}.pdf",
             mime="application/pdf"
         )
+
+# Desempenho do grafo de cálculo compartilhado, na barra lateral
+render_estatisticas_calculo()
@@ -0,0 +1,117 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from utils import fmt_br, render_metric_card, get_project_manager
+from orcamento.core.vendas import TiposUnidade
+
+st.set_page_config(page_title="Portfólio", layout="wide", page_icon="🗂️")
+
+project_manager = get_project_manager()
+
+st.title("🗂️ Portfólio de Projetos")
+st.subheader("Resultado Financeiro de Todos os Projetos")
+
+# Calculado em lote e reaproveitado enquanto nenhum projeto for alterado
+portfolio_df = project_manager.portfolio()
+
+if portfolio_df.empty:
+    st.info("Nenhum projeto encontrado.")
+    st.stop()
+
+COLUNAS = {
+    "id": "ID", "nome": "Projeto", "vgv": "VGV", "custo_total": "Custo Total", "lucro": "Lucro", "margem": "Margem (%)",
+    "custo_direto": "Custo Direto", "custo_indireto": "Custo Indireto", "custo_indireto_obra": "Adm. da Obra",
+    "custo_terreno": "Terreno", "area_privativa": "Área Privativa (m²)", "area_construida": "Área Construída (m²)",
+}
+
+# --- FILTROS E ORDENAÇÃO ---
+with st.container(border=True):
+    filtro_cols = st.columns([3, 3, 2, 1])
+    busca = filtro_cols[0].text_input("Buscar pelo nome", placeholder="Parte do nome do projeto")
+    margem_min, margem_max = float(portfolio_df["margem"].min()), float(portfolio_df["margem"].max())
+    if margem_min < margem_max:
+        faixa_margem = filtro_cols[1].slider("Margem (%)", min_value=margem_min, max_value=margem_max, value=(margem_min, margem_max), format="%.1f")
+    else:
+        faixa_margem = (margem_min, margem_max)
+    ordenar_por = filtro_cols[2].selectbox("Ordenar por", list(COLUNAS), index=list(COLUNAS).index("margem"), format_func=COLUNAS.get)
+    decrescente = filtro_cols[3].toggle("Decrescente", value=True)
+
+mascara = portfolio_df["margem"].between(*faixa_margem)
+if busca:
+    mascara &= portfolio_df["nome"].str.contains(busca, case=False, regex=False)
+selecionados = portfolio_df[mascara].sort_values(ordenar_por, ascending=not decrescente)
+
+# --- INDICADORES CONSOLIDADOS ---
+vgv_total = selecionados["vgv"].sum()
+lucro_total = selecionados["lucro"].sum()
+card_cols = st.columns(4)
+card_cols[0].markdown(render_metric_card("Projetos", f"{len(selecionados)} de {len(portfolio_df)}", "#31708f", icon="bi-folder2-open"), unsafe_allow_html=True)
+card_cols[1].markdown(render_metric_card("VGV Total", f"R$ {fmt_br(vgv_total)}", "#007bff"), unsafe_allow_html=True)
+card_cols[2].markdown(render_metric_card("Lucro Total", f"R$ {fmt_br(lucro_total)}", "#28a745", icon="bi-graph-up-arrow"), unsafe_allow_html=True)
+card_cols[3].markdown(render_metric_card("Margem Consolidada", f"{(lucro_total / vgv_total * 100) if vgv_total > 0 else 0:.2f}%", "#ff7f00", icon="bi-percent"), unsafe_allow_html=True)
+
+st.divider()
+
+# --- TABELA ---
+moeda = st.column_config.NumberColumn(format="R$ %.2f")
+area = st.column_config.NumberColumn(format="%.2f")
+st.dataframe(
+    selecionados[list(COLUNAS)].rename(columns=COLUNAS),
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        **{COLUNAS[c]: moeda for c in ("vgv", "custo_total", "lucro", "custo_direto", "custo_indireto", "custo_indireto_obra", "custo_terreno")},
+        COLUNAS["margem"]: st.column_config.NumberColumn(format="%.2f%%"),
+        COLUNAS["area_privativa"]: area,
+        COLUNAS["area_construida"]: area,
+    },
+)
+
+# --- VELOCIDADE DE VENDAS ---
+with st.expander("🏷️ Velocidade de Vendas: Quão Rápido o Portfólio Precisa Vender"):
+    prazo = st.slider("Prazo para vender todas as unidades (meses)", 1, 120, 24)
+    ids = set(selecionados["id"])
+    projetos = [p for p in project_manager.list_projects() if p["id"] in ids]
+    tipos = TiposUnidade.from_projetos(projetos)
+    if not len(tipos.quantidade):
+        st.info("Nenhum dos projetos selecionados tem tipos de unidade cadastrados.")
+    else:
+        num = len(projetos)
+        velocidade_atual = np.bincount(tipos.projeto, weights=tipos.velocidade, minlength=num)
+        velocidade_necessaria = tipos.velocidade_necessaria(prazo) * velocidade_atual
+        prazo_atual = tipos.resumir(1.0).meses_para_vender_projetos
+        card_cols = st.columns(3)
+        card_cols[0].markdown(render_metric_card("Velocidade Atual", f"{fmt_br(velocidade_atual.sum())} un/mês", "#31708f", icon="bi-speedometer"), unsafe_allow_html=True)
+        card_cols[1].markdown(render_metric_card(f"Necessária para {prazo} meses", f"{fmt_br(velocidade_necessaria.sum())} un/mês", "#a94442", icon="bi-speedometer2"), unsafe_allow_html=True)
+        card_cols[2].markdown(render_metric_card("Projetos já no prazo", f"{int((prazo_atual <= prazo).sum())} de {num}", "#3c763d", icon="bi-check2-circle"), unsafe_allow_html=True)
+
+        # Todos os cenários de velocidade para todos os projetos em um só cálculo
+        fatores = np.linspace(0.2, 4.0, 200)
+        no_prazo = (tipos.resumir(fatores).meses_para_vender_projetos <= prazo).mean(axis=-1) * 100
+        fig = go.Figure(go.Scatter(x=fatores * 100, y=no_prazo, mode="lines"))
+        fig.add_vline(x=100, line_dash="dash", line_color="#5c5c5c", annotation_text="Velocidade atual")
+        fig.update_layout(height=350, xaxis_title="Velocidade de vendas (% da atual)", yaxis_title=f"Projetos vendidos em até {prazo} meses (%)")
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.dataframe(pd.DataFrame({
+            "Projeto": [p.get("nome", "") for p in projetos],
+            "Unidades": np.bincount(tipos.projeto, weights=tipos.quantidade, minlength=num),
+            "Velocidade Atual (un/mês)": velocidade_atual,
+            "Prazo Atual (meses)": prazo_atual,
+            "Velocidade Necessária (un/mês)": velocidade_necessaria,
+        }), hide_index=True, use_container_width=True, column_config={
+            c: st.column_config.NumberColumn(format="%.2f") for c in ("Velocidade Atual (un/mês)", "Velocidade Necessária (un/mês)")
+        })
+
+# --- ABRIR UM PROJETO ---
+if not selecionados.empty:
+    abrir_cols = st.columns([4, 1])
+    nomes = dict(zip(selecionados["id"], selecionados["nome"]))
+    pid = abrir_cols[0].selectbox("Abrir projeto", list(nomes), format_func=lambda i: f"{i} – {nomes[i]}")
+    if abrir_cols[1].button("Carregar", use_container_width=True):
+        # Descarta o estado de sessão do projeto aberto anteriormente
+        for key in list(st.session_state.keys()):
+            del st.session_state[key]
+        st.session_state.projeto_info = project_manager.load_project(pid)
+        st.switch_page("pages/1_Dados_do_Projeto.py")
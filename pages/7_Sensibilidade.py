@@ -0,0 +1,72 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from utils import (
+    fmt_br, render_metric_card, render_sidebar, init_session_state_vars,
+    premissas_da_sessao, analise_de_sensibilidade
+)
+
+st.set_page_config(page_title="Sensibilidade", layout="wide", page_icon="🌪️")
+
+if "projeto_info" not in st.session_state:
+    st.error("Nenhum projeto carregado. Por favor, selecione um projeto na página inicial.")
+    if st.button("Voltar para a seleção de projetos"):
+        st.switch_page("Início.py")
+    st.stop()
+
+# Inicializa as variáveis de estado
+init_session_state_vars(st.session_state.projeto_info)
+
+render_sidebar(form_key="sidebar_sensibilidade")
+
+info = st.session_state.projeto_info
+st.title("🌪️ Análise de Sensibilidade")
+st.subheader("Quais premissas mais afetam o resultado do empreendimento")
+
+with st.container(border=True):
+    ctrl_cols = st.columns([2, 2, 1])
+    variacao = ctrl_cols[0].slider("Variação das premissas (± %)", 1, 50, 10, 1, help="Faixa aplicada às premissas sem faixa de referência.")
+    metrica = ctrl_cols[1].radio("Medir o efeito sobre", ["Lucro", "Margem"], horizontal=True)
+    usar_faixas = ctrl_cols[2].toggle("Faixas de referência", value=True, help="Usa o mínimo e o máximo de referência de cada custo indireto em vez de ± variação.")
+    num_itens = st.slider("Premissas exibidas", 5, 40, 15)
+
+# Todos os cenários são avaliados em lote; o resultado fica em cache pelas premissas
+premissas = premissas_da_sessao(info)
+resultado = analise_de_sensibilidade(premissas.chave(), variacao / 100, usar_faixas, premissas)
+
+card_cols = st.columns(2)
+card_cols[0].markdown(render_metric_card("Lucro Bruto (base)", f"R$ {fmt_br(resultado.lucro_base)}", "#3c763d", icon="bi-piggy-bank"), unsafe_allow_html=True)
+card_cols[1].markdown(render_metric_card("Margem de Lucro (base)", f"{resultado.margem_base:.2f}%", "#a94442", icon="bi-percent"), unsafe_allow_html=True)
+
+if metrica == "Lucro":
+    base, chave_baixo, chave_alto, chave_amplitude = resultado.lucro_base, "lucro_baixo", "lucro_alto", "amplitude_lucro"
+else:
+    base, chave_baixo, chave_alto, chave_amplitude = resultado.margem_base, "margem_baixo", "margem_alto", "amplitude_margem"
+itens = sorted(resultado.itens, key=lambda item: getattr(item, chave_amplitude), reverse=True)[:num_itens]
+
+# --- GRÁFICO DE TORNADO ---
+nomes = [item.nome for item in reversed(itens)]
+fig = go.Figure()
+fig.add_trace(go.Bar(y=nomes, x=[getattr(item, chave_baixo) - base for item in reversed(itens)], base=base, orientation="h",
+                     name="Premissa no valor baixo", marker_color="#31708f"))
+fig.add_trace(go.Bar(y=nomes, x=[getattr(item, chave_alto) - base for item in reversed(itens)], base=base, orientation="h",
+                     name="Premissa no valor alto", marker_color="#fd7e14"))
+fig.add_vline(x=base, line_color="#5c5c5c")
+fig.update_layout(barmode="overlay", height=max(400, 28 * len(itens)), xaxis_title="Lucro (R$)" if metrica == "Lucro" else "Margem (%)",
+                  legend=dict(orientation="h", yanchor="bottom", y=1.02))
+st.plotly_chart(fig, use_container_width=True)
+
+# --- TABELA ---
+tabela = pd.DataFrame([{
+    "Premissa": item.nome, "Grupo": item.grupo, "Base": item.valor_base, "Baixo": item.valor_baixo, "Alto": item.valor_alto,
+    f"{metrica} (baixo)": getattr(item, chave_baixo), f"{metrica} (alto)": getattr(item, chave_alto), "Amplitude": getattr(item, chave_amplitude),
+} for item in itens])
+formato = "R$ %.2f" if metrica == "Lucro" else "%.2f%%"
+st.dataframe(tabela, hide_index=True, use_container_width=True, column_config={
+    "Base": st.column_config.NumberColumn(format="%.2f"),
+    "Baixo": st.column_config.NumberColumn(format="%.2f"),
+    "Alto": st.column_config.NumberColumn(format="%.2f"),
+    f"{metrica} (baixo)": st.column_config.NumberColumn(format=formato),
+    f"{metrica} (alto)": st.column_config.NumberColumn(format=formato),
+    "Amplitude": st.column_config.NumberColumn(format=formato),
+})
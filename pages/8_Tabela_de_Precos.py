@@ -0,0 +1,97 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from utils import fmt_br, render_metric_card, render_sidebar, init_session_state_vars, safe_float
+from orcamento.core import DEFAULT_PAVIMENTO
+from orcamento.core.tabela_precos import CURVAS_ANDAR, ConfigTabela, gerar_tabela
+
+st.set_page_config(page_title="Tabela de Preços", layout="wide", page_icon="🏷️")
+
+if "projeto_info" not in st.session_state:
+    st.error("Nenhum projeto carregado. Por favor, selecione um projeto na página inicial.")
+    if st.button("Voltar para a seleção de projetos"):
+        st.switch_page("Início.py")
+    st.stop()
+
+# Inicializa as variáveis de estado
+init_session_state_vars(st.session_state.projeto_info)
+
+render_sidebar(form_key="sidebar_tabela_precos")
+
+info = st.session_state.projeto_info
+st.title("🏷️ Tabela de Preços")
+st.subheader("Preço de cada unidade por andar e posição, reconciliado com o VGV")
+
+if not st.session_state.unidades:
+    st.info("Cadastre os tipos de unidade em Dados do Projeto para gerar a tabela de preços.")
+    st.stop()
+
+# Andares-tipo: repetições dos pavimentos de área privativa
+andares_tipo = sum(int(p.get("rep", 1)) for p in st.session_state.pavimentos if p.get("tipo") == DEFAULT_PAVIMENTO["tipo"])
+config = ConfigTabela.from_dict({"andares": max(andares_tipo, 1), **info.get("tabela_precos", {})})
+preco_m2 = info["custos_config"].get("preco_medio_venda_m2", 10000.0)
+vgv_projeto = sum(u["quantidade"] * u["area_privativa"] for u in st.session_state.unidades) * preco_m2
+
+with st.form("form_tabela_precos"):
+    cols = st.columns(4)
+    andar_inicial = cols[0].number_input("Primeiro andar", -5, 200, config.andar_inicial, 1)
+    andares = cols[1].number_input("Andares com unidades", 1, 300, config.andares, 1)
+    vgv_alvo = cols[2].number_input("VGV alvo (R$)", 0.0, value=float(info.get("tabela_precos", {}).get("vgv_alvo", vgv_projeto)), step=100000.0, format="%.2f")
+    arredondamento = cols[3].number_input("Arredondar preços a (R$)", 0.0, 100000.0, config.arredondamento, 100.0)
+    cols = st.columns(3)
+    premio_andar = cols[0].number_input("Prêmio por andar (%)", -10.0, 20.0, config.premio_andar, 0.1)
+    curva_andar = cols[1].selectbox("Curva do prêmio por andar", CURVAS_ANDAR, index=CURVAS_ANDAR.index(config.curva_andar),
+                                    format_func={"linear": "Linear (soma)", "composta": "Composta (juros sobre juros)"}.get)
+    premio_cobertura = cols[2].number_input("Prêmio do último andar (%)", -50.0, 100.0, config.premio_cobertura, 1.0)
+    texto_posicoes = st.text_input("Prêmio por posição (posição: %; ...)", "; ".join(f"{k}: {v:g}" for k, v in sorted(config.premios_posicao.items())),
+                                   help="Ex.: 1: 3; 2: 3; 4: -2 — posições de frente ou com melhor orientação valem mais.")
+    if st.form_submit_button("Gerar Tabela", type="primary"):
+        premios_posicao = {}
+        for item in texto_posicoes.split(";"):
+            posicao, _, premio = item.partition(":")
+            posicao, premio = safe_float(posicao.strip(), None), safe_float(premio.strip(), None)
+            if posicao is not None and premio is not None and posicao >= 1:
+                premios_posicao[str(int(posicao))] = premio
+            elif item.strip():
+                st.warning(f"Prêmio ignorado: '{item.strip()}'")
+        info["tabela_precos"] = {
+            "andar_inicial": int(andar_inicial), "andares": int(andares), "vgv_alvo": vgv_alvo, "arredondamento": arredondamento,
+            "premio_andar": premio_andar, "curva_andar": curva_andar, "premio_cobertura": premio_cobertura, "premios_posicao": premios_posicao,
+        }
+        config = ConfigTabela.from_dict(info["tabela_precos"])
+
+tabela = gerar_tabela(st.session_state.unidades, preco_m2, config, info.get("tabela_precos", {}).get("vgv_alvo", vgv_projeto))
+df = pd.DataFrame(tabela.as_columns())
+if df.empty:
+    st.info("Os tipos de unidade cadastrados não têm unidades.")
+    st.stop()
+
+card_cols = st.columns(4)
+card_cols[0].markdown(render_metric_card("Unidades", f"{len(df)}", "#31708f", icon="bi-building"), unsafe_allow_html=True)
+card_cols[1].markdown(render_metric_card("VGV da Tabela", f"R$ {fmt_br(tabela.vgv)}", "#00829d", icon="bi-cash-stack"), unsafe_allow_html=True)
+card_cols[2].markdown(render_metric_card("Diferença para o Alvo", f"R$ {fmt_br(tabela.vgv - tabela.vgv_alvo)}", "#8a6d3b", icon="bi-arrow-left-right"), unsafe_allow_html=True)
+card_cols[3].markdown(render_metric_card("Preço / m² (mín – máx)", f"R$ {fmt_br(tabela.preco_m2.min())} – {fmt_br(tabela.preco_m2.max())}", "#6a42c1", icon="bi-rulers"), unsafe_allow_html=True)
+
+# --- MAPA DE PREÇOS (andar × posição) ---
+mapa = np.full((tabela.andar.max() - tabela.andar.min() + 1, tabela.posicao.max()), np.nan)
+mapa[tabela.andar - tabela.andar.min(), tabela.posicao - 1] = tabela.preco_m2
+fig = go.Figure(go.Heatmap(z=mapa, x=np.arange(1, mapa.shape[1] + 1), y=np.arange(tabela.andar.min(), tabela.andar.max() + 1),
+                           colorscale="Viridis", colorbar=dict(title="R$/m²"),
+                           hovertemplate="Andar %{y}, posição %{x}<br>R$ %{z:,.2f}/m²<extra></extra>"))
+fig.update_layout(height=max(350, 14 * mapa.shape[0]), xaxis_title="Posição", yaxis_title="Andar")
+st.plotly_chart(fig, use_container_width=True)
+
+# --- TABELA E EXPORTAÇÃO ---
+st.dataframe(df, hide_index=True, use_container_width=True, column_config={
+    "Área Privativa (m²)": st.column_config.NumberColumn(format="%.2f"),
+    "Fator": st.column_config.NumberColumn(format="%.4f"),
+    "Preço / m²": st.column_config.NumberColumn(format="R$ %.2f"),
+    "Preço": st.column_config.NumberColumn(format="R$ %.2f"),
+})
+st.download_button(
+    "Exportar Tabela (CSV)",
+    data=df.to_csv(index=False, sep=";", decimal=",").encode("utf-8-sig"),
+    file_name=f"Tabela_de_Precos_{info['nome']}.csv",
+    mime="text/csv",
+)
@@ -0,0 +1,313 @@
+"""
+Relatório PDF do projeto: HTML montado a partir de um modelo fixo e
+renderizado pelo WeasyPrint, sem acesso à rede e com cache dos PDFs.
+
+  - O modelo (string.Template) é compilado uma vez, na importação, e as
+    tabelas são montadas com ''.join sobre as colunas, sem iterrows nem
+    concatenação repetida de strings.
+  - A folha de estilo não depende do projeto (o nome do projeto chega ao
+    cabeçalho das páginas por string-set), de modo que o WeasyPrint a
+    interpreta uma vez por processo e a reaproveita, com a configuração de
+    fontes.
+  - Nada é buscado na rede: as fontes são as instaladas no sistema (Roboto,
+    com DejaVu Sans como alternativa; ver packages.txt), declaradas com
+    local(), e o url_fetcher recusa qualquer endereço que não seja um
+    arquivo local.
+  - Os PDFs ficam em um cache LRU em memória, com chave no hash SHA-256 do
+    HTML sem a data de geração: gerar de novo um relatório sem alterações
+    devolve os mesmos bytes na hora.
+"""
+import functools
+import hashlib
+import html
+import string
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from orcamento.core import ETAPAS_OBRA
+
+ESTILO = """
+@font-face { font-family: 'Roboto'; font-weight: 400; src: local('Roboto'), local('Roboto-Regular'), local('Roboto Regular'); }
+@font-face { font-family: 'Roboto'; font-weight: 700; src: local('Roboto Bold'), local('Roboto-Bold'); }
+@page {
+    size: A4;
+    margin: 1.5cm;
+    @top-center {
+        content: "Relatório de Viabilidade - " string(projeto);
+        font-family: 'Roboto', 'DejaVu Sans', sans-serif;
+        font-size: 14px;
+        color: #888;
+    }
+    @bottom-right {
+        content: "Página " counter(page) " de " counter(pages);
+        font-family: 'Roboto', 'DejaVu Sans', sans-serif;
+        font-size: 10px;
+        color: #888;
+    }
+}
+body { font-family: 'Roboto', 'DejaVu Sans', sans-serif; color: #333; }
+.cover-page {
+    height: 100%;
+    display: flex;
+    flex-direction: column;
+    justify-content: center;
+    align-items: center;
+    text-align: center;
+    page-break-after: always;
+}
+.cover-page h1 { font-size: 36px; color: #1a5276; margin-bottom: 20px; }
+.cover-page h2 { font-size: 28px; color: #1f618d; margin-bottom: 40px; string-set: projeto content(); }
+.cover-page p { font-size: 16px; color: #555; }
+.page-break { page-break-before: always; }
+h2.section-title {
+    color: #1f618d;
+    border-bottom: 2px solid #aed6f1;
+    padding-bottom: 5px;
+    margin-top: 30px;
+    margin-bottom: 20px;
+}
+table.card-container { width: 100%; border-spacing: 10px; margin-bottom: 20px; }
+td.card { color: white; border-radius: 8px; padding: 15px; text-align: center; width: 25%; }
+td.card div { font-size: 16px; font-weight: bold; }
+td.card div.card-title { margin-bottom: 5px; }
+table.data-table { width: 100%; border-collapse: collapse; margin-top: 20px; }
+table.data-table th, table.data-table td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+table.data-table th { background-color: #f2f2f2; font-weight: bold; font-size: 11px; }
+table.data-table td { font-size: 10px; }
+table.data-table tbody tr:nth-child(odd) { background-color: #f9f9f9; }
+table.data-table tr.total { font-weight: bold; background-color: #f2f2f2; }
+table.data-table .c { text-align: center; }
+table.data-table .r { text-align: right; }
+"""
+
+MODELO = string.Template("""<html>
+<head><meta charset="UTF-8"></head>
+<body>
+    <div class="cover-page">
+        <h1>Relatório de Viabilidade de Empreendimento</h1>
+        <h2>$nome</h2>
+        <p>Gerado em: $gerado_em</p>
+    </div>
+
+    <h2 class="section-title">Resumo Financeiro e de Área</h2>
+    <table class="card-container"><tr>$cards_resumo</tr></table>
+
+    <h2 class="section-title">Dados de Área e Venda</h2>
+    <table class="card-container"><tr>$cards_areas</tr></table>
+
+    <h2 class="section-title">Composição do Custo Total</h2>
+    <table class="card-container"><tr>$cards_composicao</tr></table>
+
+    <div class="page-break"></div>
+    <h2 class="section-title">Detalhamento dos Pavimentos</h2>
+    <table class="data-table">
+        <thead><tr>
+            <th style="width: 10%;">Nome</th>
+            <th style="width: 32.50%;">Tipo</th>
+            <th class="c" style="width: 4%;">Rep.</th>
+            <th class="r" style="width: 4%;">Coef.</th>
+            <th class="r" style="width: 14.75%;">Área (m²)</th>
+            <th class="r" style="width: 18.00%;">Área Eq. Total (m²)</th>
+            <th class="r" style="width: 16.75%;">Área Constr. (m²)</th>
+        </tr></thead>
+        <tbody>$linhas_pavimentos</tbody>
+    </table>
+
+    <div class="page-break"></div>
+    <h2 class="section-title">Custo Direto por Etapa da Obra</h2>
+    <table class="data-table">
+        <thead><tr><th>Etapa</th><th class="r">Percentual (%)</th><th class="r">Custo (R$)</th></tr></thead>
+        <tbody>$linhas_etapas</tbody>
+    </table>
+
+    <div class="page-break"></div>
+    <h2 class="section-title">Detalhamento dos Custos Indiretos</h2>
+    <table class="data-table">
+        <thead><tr><th>Item</th><th class="r">Percentual (%)</th><th class="r">Custo (R$)</th></tr></thead>
+        <tbody>$linhas_indiretos</tbody>
+    </table>
+    $secao_cronograma
+</body>
+</html>
+""")
+
+SECAO_CRONOGRAMA = string.Template("""
+    <div class="page-break"></div>
+    <h2 class="section-title">Cronograma Físico-Financeiro</h2>
+    <table class="data-table">
+        <thead><tr>
+            <th class="c">Mês</th>
+            <th class="r">Custo Direto (R$)</th>
+            <th class="r">Administração (R$)</th>
+            <th class="r">Total do Mês (R$)</th>
+            <th class="r">Acumulado (R$)</th>
+            <th class="r">% Acumulado</th>
+        </tr></thead>
+        <tbody>$linhas</tbody>
+    </table>
+""")
+
+# Nenhum texto do projeto produz o marcador: todos passam por html.escape
+DATA_PENDENTE = "<!--gerado_em-->"
+
+_CARD = '<td class="card" style="background-color: {};"><div class="card-title">{}</div><div>{}</div></td>'.format
+_LINHA_PAVIMENTO = ('<tr><td>{}</td><td>{}</td><td class="c">{}</td><td class="r">{:.2f}</td>'
+                    '<td class="r">{} m²</td><td class="r">{} m²</td><td class="r">{} m²</td></tr>').format
+_TOTAL_PAVIMENTOS = ('<tr class="total"><td colspan="4">Total</td><td class="r">{} m²</td>'
+                     '<td class="r">{} m²</td><td class="r">{} m²</td></tr>').format
+_LINHA_PERCENTUAL = '<tr><td>{}</td><td class="r">{:.2f}%</td><td class="r">R$ {}</td></tr>'.format
+_TOTAL_PERCENTUAL = '<tr class="total"><td>Total</td><td class="r">{:.2f}%</td><td class="r">R$ {}</td></tr>'.format
+_LINHA_CRONOGRAMA = ('<tr><td class="c">{}</td><td class="r">R$ {}</td><td class="r">R$ {}</td>'
+                     '<td class="r">R$ {}</td><td class="r">R$ {}</td><td class="r">{:.1f}%</td></tr>').format
+
+_SEPARADORES_BR = str.maketrans(",.", ".,")
+
+
+def _br(valor):
+    """Número com duas casas no formato brasileiro (1.234,56), como utils.fmt_br."""
+    return "0,00" if valor is None or valor != valor else f"{valor:,.2f}".translate(_SEPARADORES_BR)
+
+
+def _linhas_pavimentos(pavimentos_df):
+    if pavimentos_df is None or pavimentos_df.empty:
+        return ""
+    colunas = [pavimentos_df[c] for c in ("area", "area_eq", "area_constr")]
+    linhas = map(_LINHA_PAVIMENTO,
+                 map(html.escape, pavimentos_df["nome"].astype(str)), map(html.escape, pavimentos_df["tipo"].astype(str)),
+                 pavimentos_df["rep"], pavimentos_df["coef"], *(map(_br, c) for c in colunas))
+    return "".join(linhas) + _TOTAL_PAVIMENTOS(*(_br(c.sum()) for c in colunas))
+
+
+def _linhas_percentuais(percentuais, base):
+    """Linhas (item, %, custo = base × %) e a de total; 'percentuais' é {item: %}."""
+    custos = [base * (float(p) / 100) for p in percentuais.values()]
+    linhas = map(_LINHA_PERCENTUAL, map(html.escape, percentuais), percentuais.values(), map(_br, custos))
+    return "".join(linhas) + _TOTAL_PERCENTUAL(sum(percentuais.values()), _br(sum(custos)))
+
+
+def _secao_cronograma(cronograma):
+    if cronograma is None or not cronograma.meses:
+        return ""
+    linhas = map(_LINHA_CRONOGRAMA, range(1, cronograma.meses + 1), map(_br, cronograma.custo_direto_mensal),
+                 map(_br, cronograma.administracao), map(_br, cronograma.total_mensal), map(_br, cronograma.acumulado),
+                 cronograma.percentual_acumulado)
+    return SECAO_CRONOGRAMA.safe_substitute(linhas="".join(linhas))
+
+
+def montar_html(info, vgv_total, valor_total_despesas, lucratividade_valor, lucratividade_percentual,
+                custo_direto_total, custo_indireto_calculado, custo_terreno_total, area_construida_total,
+                custos_config, custos_indiretos_percentuais, pavimentos_df, custo_indireto_obra_total, cronograma=None):
+    """
+    HTML do relatório com a data de geração ainda por preencher (o marcador
+    DATA_PENDENTE, ver gerar_pdf), para que a chave do cache não dependa da
+    hora.
+    """
+    def participacao(valor):
+        return valor / valor_total_despesas * 100 if valor_total_despesas > 0 else 0
+
+    area_privativa = info.get('area_privativa', 1)
+    relacao_ac_priv = area_construida_total / area_privativa if area_privativa > 0 else 0
+    etapas = info.get('etapas_percentuais') or {}
+    return MODELO.safe_substitute(
+        nome=html.escape(str(info.get('nome', 'N/A'))),
+        gerado_em=DATA_PENDENTE,
+        cards_resumo="".join((
+            _CARD("#00829d", "VGV Total", f"R$ {_br(vgv_total)}"),
+            _CARD("#6a42c1", "Custo Total", f"R$ {_br(valor_total_despesas)}"),
+            _CARD("#3c763d", "Lucro Bruto", f"R$ {_br(lucratividade_valor)}"),
+            _CARD("#a94442", "Margem de Lucro", f"{lucratividade_percentual:.2f}%"),
+        )),
+        cards_areas="".join((
+            _CARD("#1f77b4", "Área Privativa", f"{_br(info.get('area_privativa', 0))} m²"),
+            _CARD("#ff7f0e", "Área Construída", f"{_br(area_construida_total)} m²"),
+            _CARD("#2ca02c", "Preço Venda / m²", f"R$ {_br(custos_config.get('preco_medio_venda_m2', 0))}"),
+            _CARD("#d62728", "Relação AC/AP", f"{relacao_ac_priv:.2f}"),
+        )),
+        cards_composicao="".join((
+            _CARD("#31708f", f"Custo Direto ({participacao(custo_direto_total):.2f}%)", f"R$ {_br(custo_direto_total)}"),
+            _CARD("#8a6d3b", f"Indiretos Venda ({participacao(custo_indireto_calculado):.2f}%)", f"R$ {_br(custo_indireto_calculado)}"),
+            _CARD("#6f42c1", f"Indiretos Obra ({participacao(custo_indireto_obra_total):.2f}%)", f"R$ {_br(custo_indireto_obra_total)}"),
+            _CARD("#ff7f0e", f"Custo do Terreno ({participacao(custo_terreno_total):.2f}%)", f"R$ {_br(custo_terreno_total)}"),
+        )),
+        linhas_pavimentos=_linhas_pavimentos(pavimentos_df),
+        linhas_etapas=_linhas_percentuais(
+            {etapa: etapas.get(etapa, {}).get('percentual', 0) for etapa in ETAPAS_OBRA}, custo_direto_total) if etapas else "",
+        linhas_indiretos=_linhas_percentuais(
+            {item: v.get('percentual', 0) for item, v in custos_indiretos_percentuais.items()}, vgv_total) if custos_indiretos_percentuais else "",
+        secao_cronograma=_secao_cronograma(cronograma),
+    )
+
+
+def _sem_rede(url, *args, **kwargs):
+    """url_fetcher do WeasyPrint que só lê arquivos locais."""
+    from weasyprint import default_url_fetcher
+    if not url.startswith(("file:", "data:")):
+        raise ValueError(f"Relatório gerado sem acesso à rede; recurso ignorado: {url}")
+    return default_url_fetcher(url, *args, **kwargs)
+
+
+@functools.lru_cache(maxsize=1)
+def _estilo_compilado():
+    """Folha de estilo e configuração de fontes do WeasyPrint, criadas no primeiro PDF e reaproveitadas."""
+    # O WeasyPrint (e suas bibliotecas nativas) só é carregado ao gerar o primeiro PDF
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
+    fontes = FontConfiguration()
+    return CSS(string=ESTILO, font_config=fontes, url_fetcher=_sem_rede), fontes
+
+
+def renderizar_pdf(html_relatorio):
+    """Bytes do PDF do HTML dado, com a folha de estilo do relatório."""
+    from weasyprint import HTML
+    estilo, fontes = _estilo_compilado()
+    return HTML(string=html_relatorio, url_fetcher=_sem_rede).write_pdf(stylesheets=[estilo], font_config=fontes)
+
+
+class CacheRelatorios:
+    """
+    PDFs gerados, por hash do HTML, guardando os 'max_entradas' usados mais
+    recentemente. Compartilhado entre sessões: a chave depende só do
+    conteúdo do relatório.
+    """
+    def __init__(self, max_entradas=16):
+        self.max_entradas = max_entradas
+        self._pdfs = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave, gerar):
+        """PDF da chave, chamando gerar() só se ele não estiver no cache."""
+        with self._lock:
+            if chave in self._pdfs:
+                self._pdfs.move_to_end(chave)
+                self.acertos += 1
+                return self._pdfs[chave]
+            self.faltas += 1
+        pdf = gerar()
+        with self._lock:
+            self._pdfs[chave] = pdf
+            if len(self._pdfs) > self.max_entradas:
+                self._pdfs.popitem(last=False)
+        return pdf
+
+    def limpar(self):
+        with self._lock:
+            self._pdfs.clear()
+            self.acertos = self.faltas = 0
+
+
+CACHE_PDF = CacheRelatorios()
+
+
+def gerar_pdf(*args, cache=CACHE_PDF, **kwargs):
+    """
+    PDF do relatório (argumentos de montar_html). Um relatório com o mesmo
+    conteúdo de um já gerado é servido do cache, com a data da geração
+    original.
+    """
+    html_relatorio = montar_html(*args, **kwargs)
+    chave = hashlib.sha256(html_relatorio.encode("utf-8")).hexdigest()
+    gerado_em = datetime.now().strftime('%d/%m/%Y %H:%M')
+    return cache.obter(chave, lambda: renderizar_pdf(html_relatorio.replace(DATA_PENDENTE, gerado_em, 1)))
@@ -0,0 +1,187 @@
+"""
+Versão do esquema dos projetos gravados e cadeia de migrações.
+
+Cada projeto guarda 'schema_version'. Projetos antigos (sem o campo) estão
+na versão 0 e são atualizados de uma vez, em lote, por migrate_store; na
+leitura, upgrade_project só compara a versão, e converte apenas um registro
+que a migração em lote não tenha conseguido atualizar.
+"""
+from numbers import Real
+
+SCHEMA_VERSION = 1
+
+
+# --- CADEIA DE MIGRAÇÕES (versão de origem -> função) ---
+
+def _percentuais_para_dict(valores):
+    """Converte {'item': 5.0} (formato antigo) para {'item': {'percentual': 5.0, 'fonte': 'Manual'}}."""
+    return {k: v if isinstance(v, dict) else {"percentual": v, "fonte": "Manual"} for k, v in valores.items()}
+
+
+def _upgrade_0_para_1(info):
+    for key in ("etapas_percentuais", "custos_indiretos_percentuais"):
+        if isinstance(info.get(key), dict):
+            info[key] = _percentuais_para_dict(info[key])
+    info.setdefault("unidades", [])
+    info.setdefault("custos_config", {})
+    return info
+
+
+MIGRATIONS = {
+    0: _upgrade_0_para_1,
+}
+
+
+def upgrade_project(info):
+    """Aplica em sequência as migrações pendentes de um projeto."""
+    version = info.get("schema_version", 0)
+    while version < SCHEMA_VERSION:
+        info = MIGRATIONS[version](info)
+        version += 1
+        info["schema_version"] = version
+    return info
+
+
+# --- VALIDAÇÃO ---
+# O esquema é descrito com tipos, dicionários (campos obrigatórios),
+# ListOf e MapOf, e compilado uma única vez em uma função de validação.
+
+class ListOf:
+    def __init__(self, item):
+        self.item = item
+
+
+class MapOf:
+    def __init__(self, value):
+        self.value = value
+
+
+class Optional:
+    """Campo que pode faltar; se presente, é validado por 'spec'."""
+    def __init__(self, spec):
+        self.spec = spec
+
+
+NUMBER = Real
+
+# Só o que o aplicativo exige: os demais campos são lidos com valores padrão
+# (ver init_session_state_vars e os from_dict de orcamento.core.modelos).
+PROJECT_SCHEMA = {
+    "id": int,
+    "nome": str,
+    "area_terreno": Optional(NUMBER),
+    "custos_config": {"custo_terreno_m2": Optional(NUMBER), "custo_area_privativa": Optional(NUMBER),
+                      "preco_medio_venda_m2": Optional(NUMBER)},
+    "etapas_percentuais": Optional(MapOf({"percentual": NUMBER, "fonte": str})),
+    "custos_indiretos_percentuais": Optional(MapOf({"percentual": NUMBER, "fonte": str})),
+    "pavimentos": Optional(ListOf({"nome": Optional(str), "tipo": Optional(str), "rep": NUMBER, "coef": NUMBER,
+                                   "area": NUMBER, "constr": Optional(bool)})),
+    "unidades": Optional(ListOf({"nome": Optional(str), "quantidade": Optional(NUMBER), "area_privativa": Optional(NUMBER)})),
+}
+
+
+def compile_schema(spec):
+    """
+    Transforma a descrição do esquema em uma função validate(value, path)
+    que devolve a lista de erros encontrados (vazia se o valor for válido).
+    """
+    if isinstance(spec, dict):
+        fields = [(name, compile_schema(sub.spec if isinstance(sub, Optional) else sub)) for name, sub in spec.items()]
+        optional = {name for name, sub in spec.items() if isinstance(sub, Optional)}
+
+        def validate(value, path):
+            if not isinstance(value, dict):
+                return [f"{path}: esperado objeto"]
+            errors = []
+            for name, check in fields:
+                if name not in value:
+                    if name not in optional:
+                        errors.append(f"{path}.{name}: campo ausente")
+                else:
+                    errors.extend(check(value[name], f"{path}.{name}"))
+            return errors
+    elif isinstance(spec, ListOf):
+        check_item = compile_schema(spec.item)
+
+        def validate(value, path):
+            if not isinstance(value, list):
+                return [f"{path}: esperada lista"]
+            return [e for i, item in enumerate(value) for e in check_item(item, f"{path}[{i}]")]
+    elif isinstance(spec, MapOf):
+        check_value = compile_schema(spec.value)
+
+        def validate(value, path):
+            if not isinstance(value, dict):
+                return [f"{path}: esperado objeto"]
+            return [e for k, v in value.items() for e in check_value(v, f"{path}[{k!r}]")]
+    else:
+        def validate(value, path):
+            # bool é subclasse de int, mas não é um número válido aqui.
+            if not isinstance(value, spec) or (spec is not bool and isinstance(value, bool)):
+                return [f"{path}: esperado {getattr(spec, '__name__', spec)}"]
+            return []
+    return validate
+
+
+_validate_project = compile_schema(PROJECT_SCHEMA)
+
+
+def validate_project(info):
+    """Lista os problemas de formato de um projeto (vazia se estiver válido)."""
+    return _validate_project(info, "projeto")
+
+
+def migrate_store(storage):
+    """
+    Atualiza em lote todos os projetos do armazenamento para SCHEMA_VERSION.
+    Problemas não interrompem a migração e são listados no resumo devolvido:
+    um registro atualizado é sempre gravado, mesmo que a validação aponte
+    erros ('invalidos'); um cuja atualização falha fica como está
+    ('pendentes') e, enquanto houver algum, o armazenamento não é marcado
+    como migrado, para que a migração seja tentada de novo.
+    """
+    resumo = {"total": 0, "atualizados": 0, "invalidos": [], "pendentes": []}
+    atualizados = []
+    for info in storage.list_projects():
+        resumo["total"] += 1
+        if info.get("schema_version", 0) >= SCHEMA_VERSION:
+            continue
+        try:
+            info = upgrade_project(info)
+        except Exception as e:
+            resumo["pendentes"].append({"id": info.get("id"), "nome": info.get("nome"), "erros": [f"erro na migração: {e}"]})
+            continue
+        atualizados.append(info)
+        errors = validate_project(info)
+        if errors:
+            resumo["invalidos"].append({"id": info.get("id"), "nome": info.get("nome"), "erros": errors})
+    storage.import_projects(atualizados)
+    resumo["atualizados"] = len(atualizados)
+    if not resumo["pendentes"]:
+        storage.set_meta("schema_version", SCHEMA_VERSION)
+    storage.set_meta("ultima_migracao", resumo)
+    return resumo
+
+
+if __name__ == "__main__":
+    import argparse
+    from storage import SQLiteStorage, ShardedJsonStorage, JsonStorage
+
+    parser = argparse.ArgumentParser(description="Migra todos os projetos para a versão atual do esquema.")
+    parser.add_argument("--backend", choices=["json", "sqlite", "sharded"], default="sqlite")
+    parser.add_argument("--path", default=None, help="Arquivo/diretório do armazenamento.")
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        storage = SQLiteStorage(args.path or "projects.db")
+    elif args.backend == "sharded":
+        storage = ShardedJsonStorage(args.path or "projects")
+    else:
+        storage = JsonStorage(args.path or "projects.json", {"direto": "historico_direto.json", "indireto": "historico_indireto.json"})
+    storage.init_storage()
+    resumo = migrate_store(storage)
+    print(f"{resumo['atualizados']} de {resumo['total']} projetos atualizados para a versão {SCHEMA_VERSION}.")
+    for invalido in resumo["invalidos"]:
+        print(f"Projeto {invalido['id']} ({invalido['nome']}), atualizado com dados inválidos: " + "; ".join(invalido["erros"]))
+    for pendente in resumo["pendentes"]:
+        print(f"Projeto {pendente['id']} ({pendente['nome']}), não atualizado: " + "; ".join(pendente["erros"]))
@@ -0,0 +1,69 @@
+"""
+Serialização dos arquivos de dados, escolhida pela extensão do arquivo:
+
+    .json           JSON legível (indent=4), o formato original
+    .msgpack        MessagePack (binário compacto)
+    .gz (sufixo)    compressão gzip sobre qualquer um dos anteriores,
+                    p. ex. 'projects.msgpack.gz' ou 'projects.json.gz'
+
+Na leitura o formato é detectado pelo conteúdo, de modo que arquivos JSON
+existentes continuam legíveis mesmo se o caminho configurado mudar.
+"""
+import gzip
+import json
+import os
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as e:
+        raise ImportError("O formato .msgpack requer o pacote 'msgpack' (pip install msgpack).") from e
+    return msgpack
+
+
+def _split_extension(path):
+    """Retorna (formato, comprimido) a partir da extensão do caminho."""
+    base, ext = os.path.splitext(path.lower())
+    compressed = ext == ".gz"
+    if compressed:
+        ext = os.path.splitext(base)[1]
+    return ("msgpack" if ext in (".msgpack", ".mpk") else "json"), compressed
+
+
+def dumps(data, path):
+    """Serializa 'data' no formato indicado pela extensão de 'path'."""
+    fmt, compressed = _split_extension(path)
+    if fmt == "msgpack":
+        raw = _msgpack().packb(data, use_bin_type=True)
+    elif compressed:
+        raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    else:
+        raw = json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8")
+    return gzip.compress(raw, compresslevel=6) if compressed else raw
+
+
+def loads(raw, default=None):
+    """
+    Desserializa bytes em qualquer um dos formatos suportados. Conteúdo vazio
+    (p. ex. um arquivo truncado) devolve 'default'.
+    """
+    if raw[:2] == GZIP_MAGIC:
+        raw = gzip.decompress(raw)
+    stripped = raw.lstrip()
+    if not stripped:
+        return default
+    if stripped[:1] in b"[{\"" or stripped[:3] == b"\xef\xbb\xbf":
+        return json.loads(raw.decode("utf-8-sig"))
+    return _msgpack().unpackb(raw, raw=False)
+
+
+def load_file(path, default=None):
+    """Lê um arquivo de dados; retorna 'default' se ele não existir ou estiver vazio."""
+    try:
+        with open(path, "rb") as f:
+            return loads(f.read(), default)
+    except FileNotFoundError:
+        return default
@@ -0,0 +1,862 @@
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import closing, contextmanager
+from datetime import datetime
+
+from delta import apply_patch, diff
+from serialization import dumps, load_file
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- BACKENDS DE ARMAZENAMENTO DOS PROJETOS ---
+
+TIPOS_HISTORICO = ("direto", "indireto")
+
+
+class ConflictError(Exception):
+    """
+    O projeto foi alterado por outra sessão desde que foi carregado
+    (a versão gravada não corresponde à versão do dicionário salvo).
+    """
+    def __init__(self, pid, expected, actual):
+        super().__init__(f"Projeto {pid} foi alterado por outra sessão (versão {actual}, esperada {expected}).")
+        self.pid = pid
+        self.expected = expected
+        self.actual = actual
+
+
+def _check_version(pid, stored_version, info):
+    """
+    Valida o controle otimista de concorrência e incrementa a versão do
+    projeto. Um id ainda não gravado (importação/migração) mantém a versão.
+    """
+    expected = info.get("version", 0)
+    if stored_version is None:
+        info["version"] = expected or 1
+        return
+    if stored_version != expected:
+        raise ConflictError(pid, expected, stored_version)
+    info["version"] = expected + 1
+
+
+def _import_version(stored_version, info):
+    """
+    Versão de um projeto gravado por import_projects: a do próprio projeto se
+    o id ainda não existe (cópia entre backends), senão uma acima da maior
+    entre a gravada e a do projeto. Regravar sem mudar a versão deixaria a
+    base de diff de outros processos e o portfólio presos ao dado antigo.
+    """
+    if stored_version is None:
+        return info.get("version") or 1
+    return max(stored_version, info.get("version") or 0) + 1
+
+
+@contextmanager
+def _restore_on_error(info):
+    """
+    Desfaz no dicionário do projeto os campos atribuídos durante a gravação
+    (id, created_at e version) se ela falhar, para que uma nova tentativa com
+    o mesmo dicionário não seja rejeitada como conflito de versão.
+    """
+    campos = ("id", "created_at", "version")
+    anteriores = {k: info[k] for k in campos if k in info}
+    try:
+        yield
+    except BaseException:
+        for k in campos:
+            info.pop(k, None)
+        info.update(anteriores)
+        raise
+
+
+SUMMARY_FIELDS = ("id", "nome", "created_at")
+
+
+def project_summary(info):
+    """Resumo de um projeto usado na listagem da página inicial."""
+    return {k: info.get(k) for k in SUMMARY_FIELDS}
+
+
+@contextmanager
+def file_lock(path):
+    """Lock exclusivo entre processos, mantido em um arquivo '<path>.lock'."""
+    with open(f"{path}.lock", "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write_json(path, data):
+    """
+    Grava os dados (no formato indicado pela extensão, ver serialization.py)
+    em um arquivo temporário no mesmo diretório e o renomeia sobre o destino,
+    de modo que uma falha no meio da escrita nunca deixa o arquivo truncado.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(dumps(data, path))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class StorageBackend:
+    """
+    Interface comum dos backends de armazenamento usados pelo ProjectManager.
+    Os projetos são dicionários com um campo 'id' inteiro; os históricos são
+    listas de entradas separadas por tipo de custo ('direto' ou 'indireto').
+    """
+    def init_storage(self):
+        """Prepara o armazenamento. Retorna True se ele acabou de ser criado."""
+        raise NotImplementedError
+
+    def list_projects(self):
+        raise NotImplementedError
+
+    def list_summaries(self):
+        """Lista apenas id, nome e created_at de cada projeto."""
+        return [project_summary(p) for p in self.list_projects()]
+
+    def project_versions(self):
+        """{id: version} de todos os projetos, para detectar quais mudaram."""
+        return {p["id"]: p.get("version") for p in self.list_projects()}
+
+    def get_project(self, pid):
+        raise NotImplementedError
+
+    def save_project(self, info):
+        """
+        Insere (atribuindo 'id' e 'created_at') ou atualiza um projeto,
+        incrementando seu campo 'version'. Levanta ConflictError se o
+        projeto gravado estiver em uma versão diferente da de 'info'.
+        """
+        raise NotImplementedError
+
+    def import_projects(self, projects):
+        """
+        Grava em lote projetos que já têm id (migrações). Um projeto ainda não
+        gravado mantém a versão; um já gravado passa a uma versão nova, para
+        que caches e sessões (também de outros processos) vejam a troca.
+        Os backends podem sobrescrever para usar uma única transação.
+        """
+        for info in projects:
+            self.save_project(info)
+
+    def delete_project(self, pid):
+        raise NotImplementedError
+
+    def project_history(self, pid):
+        """
+        Lista as versões gravadas de um projeto (mais recente primeiro).
+        Disponível apenas nos backends com log de alterações.
+        """
+        raise NotImplementedError
+
+    def load_project_at(self, pid, version):
+        """Reconstrói o projeto como estava na versão indicada."""
+        raise NotImplementedError
+
+    def list_historico(self, tipo):
+        raise NotImplementedError
+
+    def add_historico(self, tipo, entrada):
+        """Acrescenta uma entrada ao histórico, atribuindo o 'id'."""
+        raise NotImplementedError
+
+    def get_meta(self, key, default=None):
+        """Lê um metadado do armazenamento (p. ex. a versão do esquema)."""
+        raise NotImplementedError
+
+    def set_meta(self, key, value):
+        raise NotImplementedError
+
+    def data_version(self, scope, key=None):
+        """
+        Token barato (sem ler o conteúdo) que muda sempre que os dados de
+        'scope' ('projects', 'direto' ou 'indireto') mudam no disco. 'key'
+        restringe o token a uma leitura ('list', 'summaries' ou o id de um
+        projeto), quando o backend consegue distingui-las.
+        """
+        raise NotImplementedError
+
+
+def _stat_token(*paths):
+    """Identifica o estado de arquivos por inode, tamanho e mtime."""
+    token = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            token.append((st.st_ino, st.st_size, st.st_mtime_ns))
+        except FileNotFoundError:
+            token.append(None)
+    return tuple(token)
+
+
+class JsonStorage(StorageBackend):
+    """
+    Backend legado: todos os projetos em um único arquivo JSON, reescrito
+    por inteiro a cada alteração. As escritas são atômicas e protegidas por
+    um lock de arquivo, para que processos concorrentes não percam dados.
+    """
+    def __init__(self, path, historico_paths):
+        self.path = path
+        self.historico_paths = historico_paths
+
+    def init_storage(self):
+        created = not os.path.exists(self.path)
+        for _path in (self.path, *self.historico_paths.values()):
+            with file_lock(_path):
+                if not os.path.exists(_path):
+                    self._save(_path, [])
+        return created
+
+    def _load(self, path):
+        return load_file(path, [])
+
+    def _save(self, path, data):
+        atomic_write_json(path, data)
+
+    def list_projects(self):
+        return self._load(self.path)
+
+    def get_project(self, pid):
+        return next((p for p in self._load(self.path) if p["id"] == pid), None)
+
+    def save_project(self, info):
+        with _restore_on_error(info), file_lock(self.path):
+            projs = self._load(self.path)
+            if info.get("id"):
+                stored = next((p for p in projs if p["id"] == info["id"]), None)
+                _check_version(info["id"], stored.get("version", 0) if stored else None, info)
+                if stored:
+                    projs = [p if p["id"] != info["id"] else info for p in projs]
+                else:
+                    projs.append(info)
+            else:
+                info["id"] = (max(p["id"] for p in projs) + 1) if projs else 1
+                info["created_at"] = datetime.utcnow().isoformat()
+                info["version"] = 1
+                projs.append(info)
+            self._save(self.path, projs)
+        return info
+
+    def delete_project(self, pid):
+        with file_lock(self.path):
+            self._save(self.path, [p for p in self._load(self.path) if p["id"] != pid])
+
+    def list_historico(self, tipo):
+        return self._load(self.historico_paths[tipo])
+
+    def add_historico(self, tipo, entrada):
+        path = self.historico_paths[tipo]
+        with file_lock(path):
+            historico = self._load(path)
+            if not entrada.get("id"):
+                entrada["id"] = (max(h["id"] for h in historico) + 1) if historico else 1
+            historico.append(entrada)
+            self._save(path, historico)
+        return entrada
+
+    @property
+    def _meta_path(self):
+        return f"{os.path.splitext(self.path)[0]}.meta.json"
+
+    def get_meta(self, key, default=None):
+        return load_file(self._meta_path, {}).get(key, default)
+
+    def set_meta(self, key, value):
+        with file_lock(self._meta_path):
+            meta = load_file(self._meta_path, {})
+            meta[key] = value
+            atomic_write_json(self._meta_path, meta)
+
+    def data_version(self, scope, key=None):
+        return _stat_token(self.path if scope == "projects" else self.historico_paths[scope])
+
+
+class ShardedJsonStorage(JsonStorage):
+    """
+    Um arquivo por projeto ('<diretório>/projects/<id>.json') e um índice
+    compacto com os resumos ('index.json'). A página inicial lê só o índice
+    e load_project lê só o arquivo do projeto; o índice é reescrito apenas
+    quando um projeto é criado, renomeado ou excluído. 'extension' escolhe
+    o formato dos arquivos (p. ex. '.msgpack.gz', ver serialization.py).
+    """
+    def __init__(self, directory, extension=".json"):
+        self.directory = directory
+        self.extension = extension
+        self.projects_dir = os.path.join(directory, "projects")
+        self.index_path = os.path.join(directory, f"index{extension}")
+        super().__init__(self.index_path, {
+            "direto": os.path.join(directory, f"historico_direto{extension}"),
+            "indireto": os.path.join(directory, f"historico_indireto{extension}"),
+        })
+
+    def init_storage(self):
+        os.makedirs(self.projects_dir, exist_ok=True)
+        return super().init_storage()
+
+    def _project_path(self, pid):
+        return os.path.join(self.projects_dir, f"{int(pid)}{self.extension}")
+
+    def _load_project_file(self, pid):
+        return load_file(self._project_path(pid))
+
+    def list_summaries(self):
+        return self._load(self.index_path)
+
+    def list_projects(self):
+        projs = (self._load_project_file(s["id"]) for s in self._load(self.index_path))
+        return [p for p in projs if p is not None]
+
+    def get_project(self, pid):
+        return self._load_project_file(pid)
+
+    def save_project(self, info):
+        # O lock do índice serializa as escritas de projetos (ids e versões).
+        with _restore_on_error(info), file_lock(self.index_path):
+            index = self._load(self.index_path)
+            if info.get("id"):
+                stored = self._load_project_file(info["id"])
+                _check_version(info["id"], stored.get("version", 0) if stored else None, info)
+            else:
+                info["id"] = (max(s["id"] for s in index) + 1) if index else 1
+                info["created_at"] = datetime.utcnow().isoformat()
+                info["version"] = 1
+            atomic_write_json(self._project_path(info["id"]), info)
+
+            summary = project_summary(info)
+            position = next((i for i, s in enumerate(index) if s["id"] == info["id"]), None)
+            if position is None:
+                index.append(summary)
+                self._save(self.index_path, index)
+            elif index[position] != summary:
+                index[position] = summary
+                self._save(self.index_path, index)
+        return info
+
+    def import_projects(self, projects):
+        with file_lock(self.index_path):
+            index = {s["id"]: s for s in self._load(self.index_path)}
+            for info in projects:
+                stored = self._load_project_file(info["id"])
+                info["version"] = _import_version(stored.get("version", 0) if stored else None, info)
+                atomic_write_json(self._project_path(info["id"]), info)
+                index[info["id"]] = project_summary(info)
+            self._save(self.index_path, sorted(index.values(), key=lambda s: s["id"]))
+
+    def delete_project(self, pid):
+        with file_lock(self.index_path):
+            try:
+                os.remove(self._project_path(pid))
+            except FileNotFoundError:
+                pass
+            self._save(self.index_path, [s for s in self._load(self.index_path) if s["id"] != pid])
+
+    def data_version(self, scope, key=None):
+        if scope != "projects":
+            return super().data_version(scope, key)
+        if key == "summaries":
+            return _stat_token(self.index_path)
+        if key == "list":
+            # Toda escrita atômica cria e renomeia um temporário no
+            # diretório, alterando o mtime dele.
+            return _stat_token(self.index_path, self.projects_dir)
+        return _stat_token(self._project_path(key))
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Backend SQLite: uma linha por projeto, indexada pelo id, de modo que
+    leituras e gravações pontuais não dependem do tamanho do portfólio.
+    Cada escrita é uma transação (journal WAL); a verificação de versão e a
+    atribuição de ids acontecem dentro dela, com o banco travado para escrita.
+
+    Atualizações não regravam o projeto: apenas o patch em relação à versão
+    anterior é acrescentado a 'project_changes'. A compactação incorpora os
+    patches pendentes a um novo snapshot; snapshots e patches antigos são
+    mantidos como trilha de auditoria e permitem restaurar qualquer versão.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL DEFAULT '',
+            created_at TEXT,
+            version INTEGER NOT NULL DEFAULT 0,
+            snapshot_version INTEGER NOT NULL DEFAULT 0,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS project_changes (
+            project_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            patch TEXT NOT NULL,
+            PRIMARY KEY (project_id, version)
+        );
+        CREATE TABLE IF NOT EXISTS project_snapshots (
+            project_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (project_id, version)
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS historico_direto (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS historico_indireto (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data TEXT NOT NULL
+        );
+    """
+    # Número de patches pendentes que dispara a compactação em segundo plano
+    COMPACT_EVERY = 64
+
+    def __init__(self, path):
+        self.path = path
+        # Último estado gravado por este processo: {pid: (version, projeto)},
+        # evita reconstruir o projeto para calcular o próximo patch.
+        self._last_saved = {}
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    @contextmanager
+    def _write_transaction(self):
+        """
+        Abre uma transação de escrita (BEGIN IMMEDIATE), confirmada ao final
+        do bloco, e incrementa o contador de escritas usado em data_version.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('write_count', '1') "
+                    "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def init_storage(self):
+        created = not os.path.exists(self.path)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            colunas = {r[1] for r in conn.execute("PRAGMA table_info(projects)")}
+            if "version" not in colunas:
+                conn.execute("ALTER TABLE projects ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            if "snapshot_version" not in colunas:
+                # Bancos anteriores ao log de alterações: o dado atual vira o snapshot.
+                conn.execute("ALTER TABLE projects ADD COLUMN snapshot_version INTEGER NOT NULL DEFAULT 0")
+                conn.execute("UPDATE projects SET snapshot_version = version")
+                conn.execute("INSERT OR IGNORE INTO project_snapshots (project_id, version, data) SELECT id, version, data FROM projects")
+        return created
+
+    @staticmethod
+    def _historico_table(tipo):
+        if tipo not in TIPOS_HISTORICO:
+            raise ValueError(f"Tipo de histórico inválido: {tipo}")
+        return f"historico_{tipo}"
+
+    @staticmethod
+    def _replay(conn, pid):
+        """Snapshot + patches pendentes. Retorna (projeto, versão, nº de patches aplicados) ou None."""
+        row = conn.execute("SELECT data, snapshot_version, version FROM projects WHERE id = ?", (pid,)).fetchone()
+        if not row:
+            return None
+        doc = json.loads(row[0])
+        patches = conn.execute(
+            "SELECT patch FROM project_changes WHERE project_id = ? AND version > ? ORDER BY version", (pid, row[1])
+        ).fetchall()
+        for (patch,) in patches:
+            doc = apply_patch(doc, json.loads(patch))
+        return doc, row[2], len(patches)
+
+    @staticmethod
+    def _write_snapshot(conn, info):
+        data = json.dumps(info, ensure_ascii=False)
+        conn.execute(
+            "INSERT OR REPLACE INTO projects (id, nome, created_at, version, snapshot_version, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (info["id"], info.get("nome", ""), info.get("created_at"), info["version"], info["version"], data),
+        )
+        conn.execute("INSERT OR REPLACE INTO project_snapshots (project_id, version, data) VALUES (?, ?, ?)", (info["id"], info["version"], data))
+
+    def list_projects(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT id, data FROM projects ORDER BY id").fetchall()
+            changes = conn.execute(
+                "SELECT c.project_id, c.patch FROM project_changes c JOIN projects p ON p.id = c.project_id "
+                "WHERE c.version > p.snapshot_version ORDER BY c.project_id, c.version"
+            ).fetchall()
+        projects = {pid: json.loads(data) for pid, data in rows}
+        for pid, patch in changes:
+            projects[pid] = apply_patch(projects[pid], json.loads(patch))
+        return list(projects.values())
+
+    def list_summaries(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT id, nome, created_at FROM projects ORDER BY id").fetchall()
+        return [dict(zip(SUMMARY_FIELDS, r)) for r in rows]
+
+    def project_versions(self):
+        with closing(self._connect()) as conn:
+            return dict(conn.execute("SELECT id, version FROM projects"))
+
+    def get_project(self, pid):
+        with closing(self._connect()) as conn:
+            replayed = self._replay(conn, pid)
+        return replayed[0] if replayed else None
+
+    def save_project(self, info):
+        pending = 0
+        with _restore_on_error(info), self._write_transaction() as conn:
+            if info.get("id"):
+                pid = info["id"]
+                row = conn.execute("SELECT version, snapshot_version FROM projects WHERE id = ?", (pid,)).fetchone()
+                _check_version(pid, row[0] if row else None, info)
+                if row is None:
+                    self._write_snapshot(conn, info)
+                else:
+                    cached = self._last_saved.get(pid)
+                    previous = cached[1] if cached and cached[0] == row[0] else self._replay(conn, pid)[0]
+                    conn.execute(
+                        "INSERT INTO project_changes (project_id, version, created_at, patch) VALUES (?, ?, ?, ?)",
+                        (pid, info["version"], datetime.utcnow().isoformat(), json.dumps(diff(previous, info), ensure_ascii=False)),
+                    )
+                    conn.execute("UPDATE projects SET nome = ?, version = ? WHERE id = ?", (info.get("nome", ""), info["version"], pid))
+                    pending = info["version"] - row[1]
+            else:
+                info["created_at"] = datetime.utcnow().isoformat()
+                info["version"] = 1
+                cur = conn.execute(
+                    "INSERT INTO projects (nome, created_at, version, snapshot_version, data) VALUES (?, ?, 1, 1, '{}')",
+                    (info.get("nome", ""), info["created_at"]),
+                )
+                info["id"] = cur.lastrowid
+                self._write_snapshot(conn, info)
+        self._last_saved[info["id"]] = (info["version"], copy.deepcopy(info))
+        if pending >= self.COMPACT_EVERY:
+            threading.Thread(target=self.compact, args=(info["id"],), daemon=True).start()
+        return info
+
+    def import_projects(self, projects):
+        with self._write_transaction() as conn:
+            for info in projects:
+                row = conn.execute("SELECT version FROM projects WHERE id = ?", (info["id"],)).fetchone()
+                info["version"] = _import_version(row[0] if row else None, info)
+                conn.execute("DELETE FROM project_changes WHERE project_id = ? AND version > ?", (info["id"], info["version"]))
+                self._write_snapshot(conn, info)
+                self._last_saved.pop(info["id"], None)
+
+    def compact(self, pid=None):
+        """
+        Incorpora os patches pendentes a novos snapshots (de um projeto ou de
+        todos). Retorna o número de projetos compactados.
+        """
+        with closing(self._connect()) as conn:
+            if pid is None:
+                pids = [r[0] for r in conn.execute("SELECT id FROM projects WHERE version > snapshot_version")]
+            else:
+                pids = [pid]
+        compactados = 0
+        for _pid in pids:
+            with self._write_transaction() as conn:
+                replayed = self._replay(conn, _pid)
+                if not replayed or not replayed[2]:
+                    continue
+                doc, version, _ = replayed
+                data = json.dumps(doc, ensure_ascii=False)
+                conn.execute("UPDATE projects SET data = ?, snapshot_version = ? WHERE id = ?", (data, version, _pid))
+                conn.execute("INSERT OR REPLACE INTO project_snapshots (project_id, version, data) VALUES (?, ?, ?)", (_pid, version, data))
+            compactados += 1
+        return compactados
+
+    def delete_project(self, pid):
+        with self._write_transaction() as conn:
+            conn.execute("DELETE FROM projects WHERE id = ?", (pid,))
+            conn.execute("DELETE FROM project_changes WHERE project_id = ?", (pid,))
+            conn.execute("DELETE FROM project_snapshots WHERE project_id = ?", (pid,))
+        self._last_saved.pop(pid, None)
+
+    def project_history(self, pid):
+        with closing(self._connect()) as conn:
+            changes = conn.execute(
+                "SELECT version, created_at, patch FROM project_changes WHERE project_id = ? ORDER BY version DESC", (pid,)
+            ).fetchall()
+            first = conn.execute(
+                "SELECT version, data FROM project_snapshots WHERE project_id = ? ORDER BY version LIMIT 1", (pid,)
+            ).fetchone()
+        history = []
+        for version, created_at, patch in changes:
+            campos = sorted({str(op["path"][0]) for op in json.loads(patch) if op["path"]} - {"version"})
+            history.append({"version": version, "created_at": created_at, "campos": campos})
+        if first:
+            history.append({"version": first[0], "created_at": json.loads(first[1]).get("created_at"), "campos": []})
+        return history
+
+    def load_project_at(self, pid, version):
+        with closing(self._connect()) as conn:
+            base = conn.execute(
+                "SELECT version, data FROM project_snapshots WHERE project_id = ? AND version <= ? ORDER BY version DESC LIMIT 1",
+                (pid, version),
+            ).fetchone()
+            if not base:
+                return None
+            patches = conn.execute(
+                "SELECT patch FROM project_changes WHERE project_id = ? AND version > ? AND version <= ? ORDER BY version",
+                (pid, base[0], version),
+            ).fetchall()
+        doc = json.loads(base[1])
+        for (patch,) in patches:
+            doc = apply_patch(doc, json.loads(patch))
+        return doc
+
+    def list_historico(self, tipo):
+        table = self._historico_table(tipo)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT data FROM {table} ORDER BY id").fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def add_historico(self, tipo, entrada):
+        table = self._historico_table(tipo)
+        with self._write_transaction() as conn:
+            if entrada.get("id"):
+                conn.execute(f"INSERT OR REPLACE INTO {table} (id, data) VALUES (?, ?)", (entrada["id"], json.dumps(entrada, ensure_ascii=False)))
+            else:
+                cur = conn.execute(f"INSERT INTO {table} (data) VALUES ('{{}}')")
+                entrada["id"] = cur.lastrowid
+                conn.execute(f"UPDATE {table} SET data = ? WHERE id = ?", (json.dumps(entrada, ensure_ascii=False), entrada["id"]))
+        return entrada
+
+    def get_meta(self, key, default=None):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        with self._write_transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def data_version(self, scope, key=None):
+        # Inode, tamanho e mtime não bastam: depois de um checkpoint o -wal é
+        # reaproveitado com o mesmo tamanho, e duas escritas no mesmo tick do
+        # mtime seriam indistinguíveis. O contador de escritas (gravado na
+        # própria transação) muda a cada commit; o stat cobre a troca do arquivo.
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'write_count'").fetchone()
+        return _stat_token(self.path), row[0] if row else None
+
+
+class RWLock:
+    """Lock de leitores/escritor: várias leituras simultâneas ou uma escrita exclusiva."""
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class CachedStorage(StorageBackend):
+    """
+    Cache de leitura em memória sobre outro backend, compartilhável entre
+    sessões. Cada entrada guarda o data_version() do momento da leitura e é
+    descartada quando o arquivo muda no disco (inclusive por outro processo),
+    de modo que leituras repetidas só custam um os.stat (no SQLite, também
+    a leitura do contador de escritas).
+
+    get_project devolve uma cópia; as listas devolvidas são compartilhadas
+    entre as sessões e não devem ser modificadas.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = RWLock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, scope, key, loader):
+        version = self.backend.data_version(scope, key)
+        with self._lock.read():
+            entry = self._entries.get((scope, key))
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+        value = loader()
+        with self._lock.write():
+            self.misses += 1
+            self._entries[(scope, key)] = (version, value)
+        return value
+
+    def _invalidate(self, scope):
+        with self._lock.write():
+            for key in [k for k in self._entries if k[0] == scope]:
+                del self._entries[key]
+
+    def cache_stats(self):
+        """Contadores de acertos/falhas do cache e número de entradas."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def init_storage(self):
+        return self.backend.init_storage()
+
+    def list_projects(self):
+        return self._cached("projects", "list", self.backend.list_projects)
+
+    def list_summaries(self):
+        return self._cached("projects", "summaries", self.backend.list_summaries)
+
+    def project_versions(self):
+        return self._cached("projects", "versions", self.backend.project_versions)
+
+    def get_project(self, pid):
+        project = self._cached("projects", pid, lambda: self.backend.get_project(pid))
+        return copy.deepcopy(project)
+
+    def save_project(self, info):
+        try:
+            return self.backend.save_project(info)
+        finally:
+            self._invalidate("projects")
+
+    def delete_project(self, pid):
+        try:
+            self.backend.delete_project(pid)
+        finally:
+            self._invalidate("projects")
+
+    def list_historico(self, tipo):
+        return self._cached(tipo, "list", lambda: self.backend.list_historico(tipo))
+
+    def add_historico(self, tipo, entrada):
+        try:
+            return self.backend.add_historico(tipo, entrada)
+        finally:
+            self._invalidate(tipo)
+
+    def import_projects(self, projects):
+        try:
+            self.backend.import_projects(projects)
+        finally:
+            self._invalidate("projects")
+
+    def project_history(self, pid):
+        return self._cached("projects", ("history", pid), lambda: self.backend.project_history(pid))
+
+    def load_project_at(self, pid, version):
+        return self.backend.load_project_at(pid, version)
+
+    def get_meta(self, key, default=None):
+        return self.backend.get_meta(key, default)
+
+    def set_meta(self, key, value):
+        self.backend.set_meta(key, value)
+
+    def data_version(self, scope, key=None):
+        return self.backend.data_version(scope, key)
+
+
+def migrate_storage(origem, destino):
+    """
+    Copia todos os projetos e históricos de um backend para outro,
+    preservando ids e versões. Retorna a contagem de registros copiados.
+    """
+    projetos = origem.list_projects()
+    destino.import_projects(projetos)
+    resumo = {"projetos": len(projetos)}
+    for tipo in TIPOS_HISTORICO:
+        entradas = origem.list_historico(tipo)
+        for entrada in entradas:
+            destino.add_historico(tipo, entrada)
+        resumo[f"historico_{tipo}"] = len(entradas)
+    return resumo
+
+
+def import_from_json(storage, projects_path, historico_paths):
+    """
+    Importa (uma única vez) os arquivos JSON legados para outro backend,
+    preservando os ids. Retorna a contagem de registros importados.
+    """
+    return migrate_storage(JsonStorage(projects_path, historico_paths), storage)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migra projetos e históricos entre backends de armazenamento.")
+    parser.add_argument("--origem", choices=["json", "sqlite", "sharded"], default="json")
+    parser.add_argument("--destino", choices=["json", "sqlite", "sharded"], default="sqlite")
+    parser.add_argument("--db", default="projects.db")
+    parser.add_argument("--dir", default="projects", help="Diretório do armazenamento 'sharded'.")
+    parser.add_argument("--projects", default="projects.json")
+    parser.add_argument("--historico-direto", default="historico_direto.json")
+    parser.add_argument("--historico-indireto", default="historico_indireto.json")
+    args = parser.parse_args()
+
+    def open_backend(kind):
+        if kind == "sqlite":
+            return SQLiteStorage(args.db)
+        if kind == "sharded":
+            return ShardedJsonStorage(args.dir)
+        return JsonStorage(args.projects, {"direto": args.historico_direto, "indireto": args.historico_indireto})
+
+    if args.origem == args.destino:
+        parser.error("origem e destino devem ser diferentes.")
+    destino = open_backend(args.destino)
+    destino.init_storage()
+    print(migrate_storage(open_backend(args.origem), destino))
@@ -1,16 +1,22 @@
+import functools
+import time
 import streamlit as st
 import pandas as pd
-import json
-import os
 from datetime import datetime
-from weasyprint import HTML
-import base64
-from io import BytesIO
-import matplotlib.pyplot as plt
-import re
-from PIL import Image
-import requests
-import time
+from storage import CachedStorage, SQLiteStorage, JsonStorage, ConflictError, atomic_write_json, import_from_json
+from serialization import load_file
+from schema import SCHEMA_VERSION, migrate_store, upgrade_project
+from relatorio import gerar_pdf
+from orcamento.core import (
+    TIPOS_PAVIMENTO, DEFAULT_PAVIMENTO, ETAPAS_OBRA, DEFAULT_CUSTOS_INDIRETOS, DEFAULT_CUSTOS_INDIRETOS_FIXOS,
+    DEFAULT_CUSTOS_INDIRETOS_OBRA, DEFAULT_DURACAO_OBRA, CUB_DATA, Pavimento, Projeto,
+    calcular_areas, custo_direto, area_privativa_total, calcular_vgv, custo_indireto_venda,
+    custo_terreno, resultado_financeiro, GRAFO_PROJETO, ResultadoProjeto, redistribuir,
+)
+from orcamento.core.lote import PavimentosLote, calcular_lote, calcular_portfolio
+from orcamento.core.cenarios import Premissas
+from orcamento.core.sensibilidade import analisar_sensibilidade
+from orcamento.core.cronograma import cronograma_de_premissas
 
 # --- CONSTANTES GLOBAIS e outras funções ---
 
@@ -34,74 +40,10 @@ def safe_float(valor_str, default=0.0):
         return default
 
 JSON_PATH = "projects.json"
+DB_PATH = "projects.db"
 HISTORICO_DIRETO_PATH = "historico_direto.json"
 HISTORICO_INDIRETO_PATH = "historico_indireto.json"
 
-TIPOS_PAVIMENTO = {
-    "Área Privativa (Autônoma)": (1.00, 1.00), "Áreas de lazer ambientadas": (2.00, 4.00), "Varandas": (0.75, 1.00),
-    "Terraços / Áreas Descobertas": (0.30, 0.60), "Garagem (Subsolo)": (0.50, 0.75), "Estacionamento (terreno)": (0.05, 0.10),
-    "Salas com Acabamento": (1.00, 1.00), "Salas sem Acabamento": (0.75, 0.90), "Loja sem Acabamento": (0.40, 0.60),
-    "Serviço (unifam. baixa, aberta)": (0.50, 0.50), "Barrilete / Cx D'água / Casa Máquinas": (0.50, 0.75),
-    "Piscinas": (0.50, 0.75), "Quintais / Calçadas / Jardins": (0.10, 0.30), "Projeção Terreno sem Benfeitoria": (0.00, 0.00),
-}
-DEFAULT_PAVIMENTO = {"nome": "Pavimento Tipo", "tipo": "Área Privativa (Autônoma)", "rep": 1, "coef": 1.00, "area": 100.0, "constr": True}
-
-ETAPAS_OBRA = {
-    "Serviços Preliminares e Fundações":        (7.0, 8.0, 9.0),
-    "Estrutura (Supraestrutura)":               (14.0, 16.0, 22.0),
-    "Vedações (Alvenaria)":                     (8.0, 10.0, 15.0),
-    "Cobertura e Impermeabilização":            (4.0, 5.0, 8.0),
-    "Revestimentos de Fachada":                 (5.0, 6.0, 10.0),
-    "Instalações (Elétrica e Hidráulica)":      (12.0, 15.0, 18.0),
-    "Esquadrias (Portas e Janelas)":            (6.0, 8.0, 12.0),
-    "Revestimentos de Piso":                    (8.0, 10.0, 15.0),
-    "Revestimentos de Parede":                  (6.0, 8.0, 12.0),
-    "Revestimentos de Forro":                   (3.0, 4.0, 6.0),
-    "Pintura":                                  (4.0, 5.0, 8.0),
-    "Serviços Complementares e Externos":       (3.0, 5.0, 10.0)
-}
-
-DEFAULT_CUSTOS_INDIRETOS = {
-    "IRPJ/ CS/ PIS/ COFINS":        (3.0, 4.0, 6.0),
-    "Corretagem":                   (3.0, 3.61, 5.0),
-    "Publicidade":                  (0.5, 0.9, 2.0),
-    "Manutenção":                   (0.3, 0.5, 1.0),
-    "Custo Fixo da Incorporadora": (3.0, 4.0, 6.0),
-    "Assessoria Técnica":           (0.5, 0.7, 1.5),
-    "Projetos":                     (0.4, 0.52, 1.5),
-    "Licenças e Incorporação":      (0.1, 0.2, 0.5),
-    "Outorga Onerosa":              (0.0, 0.0, 10.0),
-    "Condomínio":                   (0.0, 0.0, 0.5),
-    "IPTU":                         (0.05, 0.07, 0.2),
-    "Preparação do Terreno":        (0.2, 0.33, 1.0),
-    "Financiamento Bancário":       (1.0, 1.9, 3.0),
-}
-DEFAULT_CUSTOS_INDIRETOS_FIXOS = {}
-DEFAULT_CUSTOS_INDIRETOS_OBRA = {
-    "Administração de Obra (Engenheiro/Arquiteto)": 15000.0,
-    "Mestre de Obras e Encarregados": 8000.0,
-    "Aluguel de Equipamentos (andaimes, betoneira, etc.)": 5000.0,
-    "Consumo de Energia": 1000.0,
-    "Consumo de Água": 500.0,
-    "Telefone e Internet": 300.0,
-    "Seguros e Licenças de Canteiro": 1200.0,
-    "Transporte de Materiais e Pessoas": 2500.0,
-    "Despesas de Escritório e Apoio": 800.0,
-}
-
-CUB_DATA = {
-    "R-1": {
-        "acabamento_baixo": 2000.00,
-        "acabamento_normal": 2500.00,
-        "acabamento_alto": 3000.00
-    },
-    "P-1": {
-        "acabamento_baixo": 1800.00,
-        "acabamento_normal": 2200.00,
-        "acabamento_alto": 2700.00
-    },
-}
-
 def init_session_state_vars(info):
     """
     Inicializa as variáveis de estado da sessão do Streamlit com os dados do projeto.
@@ -110,24 +52,16 @@ def init_session_state_vars(info):
         st.session_state.pavimentos = [p.copy() for p in info.get('pavimentos', [DEFAULT_PAVIMENTO.copy()])]
     if 'unidades' not in st.session_state:
         st.session_state.unidades = [u.copy() for u in info.get('unidades', [])]
-    if 'deleting_pav_index' not in st.session_state:
-        st.session_state.deleting_pav_index = None
     if 'custos_indiretos_obra' not in st.session_state:
         st.session_state.custos_indiretos_obra = info.get('custos_indiretos_obra', {k: v for k, v in DEFAULT_CUSTOS_INDIRETOS_OBRA.items()})
     if 'duracao_obra' not in st.session_state:
-        st.session_state.duracao_obra = info.get('duracao_obra', 12)
+        st.session_state.duracao_obra = info.get('duracao_obra', DEFAULT_DURACAO_OBRA)
     if 'etapas_percentuais' not in st.session_state:
         etapas_salvas = info.get('etapas_percentuais', {})
-        if etapas_salvas and isinstance(list(etapas_salvas.values())[0], (int, float)):
-            st.session_state.etapas_percentuais = {etapa: {"percentual": val, "fonte": "Manual"} for etapa, val in etapas_salvas.items()}
-        else:
-            st.session_state.etapas_percentuais = {etapa: etapas_salvas.get(etapa, {"percentual": vals[1], "fonte": "Manual"}) for etapa, vals in ETAPAS_OBRA.items()}
+        st.session_state.etapas_percentuais = {etapa: etapas_salvas.get(etapa, {"percentual": vals[1], "fonte": "Manual"}) for etapa, vals in ETAPAS_OBRA.items()}
     if 'custos_indiretos_percentuais' not in st.session_state:
         custos_salvos = info.get('custos_indiretos_percentuais', {})
-        if custos_salvos and isinstance(list(custos_salvos.values())[0], (int, float)):
-            st.session_state.custos_indiretos_percentuais = {item: {"percentual": val, "fonte": "Manual"} for item, val in custos_salvos.items()}
-        else:
-            st.session_state.custos_indiretos_percentuais = {item: custos_salvos.get(item, {"percentual": vals[1], "fonte": "Manual"}) for item, vals in DEFAULT_CUSTOS_INDIRETOS.items()}
+        st.session_state.custos_indiretos_percentuais = {item: custos_salvos.get(item, {"percentual": vals[1], "fonte": "Manual"}) for item, vals in DEFAULT_CUSTOS_INDIRETOS.items()}
     # Adicionando o preço médio de venda ao estado da sessão se não existir
     if 'preco_medio_venda_m2' not in st.session_state:
         st.session_state.preco_medio_venda_m2 = info['custos_config'].get('preco_medio_venda_m2', 10000.0)
@@ -135,156 +69,330 @@ def init_session_state_vars(info):
     if 'custo_direto_ajustado' not in st.session_state:
         st.session_state.custo_direto_ajustado = None
 
-# --- NOVAS FUNÇÕES DE CÁLCULO ---
+# --- FUNÇÕES DE CÁLCULO ---
+# Adaptadores finos sobre orcamento.core, mantidos com a assinatura usada pelas páginas.
 def calculate_financial_metrics(info, pavimentos_df, custo_direto_total, custo_indireto_obra_total):
     """
     Calcula todas as métricas financeiras do projeto.
     """
-    custos_config = info.get('custos_config', {})
-    
-    # Recalcula a área privativa total com base nos dados das unidades
-    total_area_privativa = sum(u['area_privativa_total'] for u in info.get('unidades', []) if 'area_privativa_total' in u)
-    preco_medio_venda_m2 = custos_config.get('preco_medio_venda_m2', 10000.0)
-    vgv_total = total_area_privativa * preco_medio_venda_m2
-
-    custos_indiretos_percentuais = info.get('custos_indiretos_percentuais', {})
-    custo_indireto_calculado = 0
-    if custos_indiretos_percentuais:
-        for item, values in custos_indiretos_percentuais.items():
-            percentual = values.get('percentual', 0)
-            custo_indireto_calculado += vgv_total * (float(percentual) / 100)
-
-    custo_terreno_total = info.get('area_terreno', 0) * custos_config.get('custo_terreno_m2', 2500.0)
-
-    valor_total_despesas = custo_direto_total + custo_indireto_calculado + custo_terreno_total + custo_indireto_obra_total
-    lucratividade_valor = vgv_total - valor_total_despesas
-    lucratividade_percentual = (lucratividade_valor / vgv_total) * 100 if vgv_total > 0 else 0
-
+    projeto = Projeto.from_dict(info)
+    area_privativa = area_privativa_total(projeto.unidades)
+    vgv_total = calcular_vgv(area_privativa, projeto.custos.preco_medio_venda_m2)
+    # Os custos diretos e de administração vêm da página (estado da sessão),
+    # que pode estar à frente do que foi salvo em 'info'.
+    resultado = resultado_financeiro(
+        vgv_total,
+        custo_direto_total,
+        custo_indireto_venda(vgv_total, projeto.custos_indiretos_percentuais),
+        custo_terreno(projeto.area_terreno, projeto.custos.custo_terreno_m2),
+        custo_indireto_obra_total,
+        area_privativa=area_privativa,
+    )
     return {
-        "vgv_total": vgv_total,
-        "custo_indireto_calculado": custo_indireto_calculado,
-        "custo_terreno_total": custo_terreno_total,
-        "valor_total_despesas": valor_total_despesas,
-        "lucratividade_valor": lucratividade_valor,
-        "lucratividade_percentual": lucratividade_percentual,
-        "area_privativa_total": total_area_privativa
+        "vgv_total": resultado.vgv_total,
+        "custo_indireto_calculado": resultado.custo_indireto_calculado,
+        "custo_terreno_total": resultado.custo_terreno_total,
+        "valor_total_despesas": resultado.valor_total_despesas,
+        "lucratividade_valor": resultado.lucratividade_valor,
+        "lucratividade_percentual": resultado.lucratividade_percentual,
+        "area_privativa_total": resultado.area_privativa_total
     }
 
-def calcular_areas_e_custos(pavimentos_list, custos_config):
+def calcular_areas_e_custos(pavimentos_list, custos_config, detalhar=True):
     """
     Calcula as áreas e custos diretos totais com base na lista de pavimentos.
+    Os totais vêm de orcamento.core. Com detalhar=True também é devolvido o
+    DataFrame por pavimento, para as tabelas e gráficos das páginas; com
+    detalhar=False o quarto valor é None e nenhum DataFrame é montado.
     """
-    pavimentos_df = pd.DataFrame(pavimentos_list)
-    if pavimentos_df.empty:
-        return 0, 0, 0, pd.DataFrame()
+    if not pavimentos_list:
+        return 0, 0, 0, pd.DataFrame() if detalhar else None
 
     custo_area_privativa = custos_config.get('custo_area_privativa', 4500.0)
-    
-    pavimentos_df["area_total"] = pavimentos_df["area"] * pavimentos_df["rep"]
-    pavimentos_df["area_eq"] = pavimentos_df["area_total"] * pavimentos_df["coef"]
-    # Corrigindo o cálculo para usar o campo 'constr' do DataFrame
-    pavimentos_df["area_constr"] = pavimentos_df.apply(lambda r: r["area_total"] if r["constr"] else 0.0, axis=1)
-    pavimentos_df["custo_direto"] = pavimentos_df["area_eq"] * custo_area_privativa
-    
-    area_construida_total = pavimentos_df["area_constr"].sum()
-    area_equivalente_total = pavimentos_df["area_eq"].sum()
-    custo_direto_total = pavimentos_df["custo_direto"].sum()
-    
-    return area_construida_total, area_equivalente_total, custo_direto_total, pavimentos_df
+    areas = calcular_areas([Pavimento.from_dict(p) for p in pavimentos_list])
+
+    pavimentos_df = None
+    if detalhar:
+        lote = calcular_lote(PavimentosLote.from_listas([pavimentos_list], [custo_area_privativa]))
+        pavimentos_df = pd.DataFrame(pavimentos_list)
+        pavimentos_df["area_total"] = lote.area_total
+        pavimentos_df["area_eq"] = lote.area_eq
+        pavimentos_df["area_constr"] = lote.area_constr
+        pavimentos_df["custo_direto"] = lote.custo_direto
+
+    return areas.area_construida, areas.area_equivalente, custo_direto(areas.area_equivalente, custo_area_privativa), pavimentos_df
+
+# Colunas calculadas das grades de pavimentos e unidades (somente leitura no editor)
+COLUNAS_CALCULADAS_PAVIMENTOS = ["area_total", "area_eq", "area_constr"]
+COLUNAS_CALCULADAS_UNIDADES = ["area_privativa_total"]
+UNIDADE_PADRAO = {"nome": "", "quantidade": 1, "area_privativa": 100.0}
+# Tipos das colunas das grades vazias (sem linhas o pandas criaria tudo como float64,
+# o que o editor não aceita nas colunas de texto)
+TIPOS_COLUNAS_PAVIMENTOS = {"nome": object, "tipo": object, "rep": int, "coef": float, "area": float, "constr": bool}
+TIPOS_COLUNAS_UNIDADES = {"nome": object, "quantidade": int, "area_privativa": float}
+
+def _registros(df):
+    """Linhas do DataFrame como dicts, sem as células vazias (chaves ausentes nos dados gravados)."""
+    return [{k: v for k, v in registro.items() if v is not None and v == v} for registro in df.to_dict("records")]
+
+def tabela_pavimentos(pavimentos):
+    """
+    DataFrame dos pavimentos para o editor em grade, com as áreas total,
+    equivalente e construída de cada linha calculadas por coluna.
+    """
+    df = pd.DataFrame(pavimentos)
+    df = df.reindex(columns=[*DEFAULT_PAVIMENTO, *(c for c in df.columns if c not in DEFAULT_PAVIMENTO)])
+    if df.empty:
+        df = df.astype(TIPOS_COLUNAS_PAVIMENTOS)
+    df["area_total"] = df["area"].astype(float) * df["rep"].astype(float)
+    df["area_eq"] = df["area_total"] * df["coef"].astype(float)
+    df["area_constr"] = df["area_total"].where(df["constr"].astype(bool), 0.0)
+    return df
+
+def normalizar_pavimentos(df):
+    """
+    Pavimentos (dicts, como gravados) a partir da grade editada, por coluna:
+    células vazias de linhas novas recebem os valores de DEFAULT_PAVIMENTO,
+    tipos desconhecidos viram o tipo padrão e o coeficiente é limitado à
+    faixa do tipo em TIPOS_PAVIMENTO.
+    """
+    df = df.drop(columns=COLUNAS_CALCULADAS_PAVIMENTOS, errors="ignore")
+    df = df.assign(**{col: df[col].where(df[col].notna(), padrao) if col in df else padrao for col, padrao in DEFAULT_PAVIMENTO.items()})
+    df.loc[~df["tipo"].isin(list(TIPOS_PAVIMENTO)), "tipo"] = DEFAULT_PAVIMENTO["tipo"]
+    minimo = df["tipo"].map({tipo: faixa[0] for tipo, faixa in TIPOS_PAVIMENTO.items()})
+    maximo = df["tipo"].map({tipo: faixa[1] for tipo, faixa in TIPOS_PAVIMENTO.items()})
+    df["coef"] = pd.to_numeric(df["coef"], errors="coerce").fillna(minimo).clip(minimo, maximo).astype(float)
+    df["rep"] = pd.to_numeric(df["rep"], errors="coerce").fillna(1).clip(lower=1).astype(int)
+    df["area"] = pd.to_numeric(df["area"], errors="coerce").fillna(0.0).clip(lower=0.0).astype(float)
+    df["constr"] = df["constr"].astype(bool)
+    df["nome"] = df["nome"].astype(str)
+    return _registros(df)
+
+def tabela_unidades(unidades):
+    """DataFrame dos tipos de unidade para o editor em grade, com a área privativa total por coluna."""
+    df = pd.DataFrame(unidades)
+    df = df.reindex(columns=[*UNIDADE_PADRAO, *(c for c in df.columns if c not in UNIDADE_PADRAO and c not in COLUNAS_CALCULADAS_UNIDADES)])
+    if df.empty:
+        df = df.astype(TIPOS_COLUNAS_UNIDADES)
+    df["area_privativa_total"] = df["quantidade"].astype(float) * df["area_privativa"].astype(float)
+    return df
+
+def normalizar_unidades(df):
+    """
+    Tipos de unidade (dicts, como gravados) a partir da grade editada:
+    quantidade inteira de pelo menos 1, área não negativa, nome 'Unidade n'
+    quando vazio e a área privativa total recalculada.
+    """
+    df = df.drop(columns=COLUNAS_CALCULADAS_UNIDADES, errors="ignore").reset_index(drop=True)
+    nomes = df["nome"].where(df["nome"].notna() & (df["nome"].astype(str).str.strip() != ""))
+    df["nome"] = nomes.fillna(pd.Series([f"Unidade {i + 1}" for i in range(len(df))], dtype=object)).astype(str)
+    df["quantidade"] = pd.to_numeric(df["quantidade"], errors="coerce").fillna(UNIDADE_PADRAO["quantidade"]).clip(lower=1).astype(int)
+    df["area_privativa"] = pd.to_numeric(df["area_privativa"], errors="coerce").fillna(UNIDADE_PADRAO["area_privativa"]).clip(lower=0.0).astype(float)
+    df["area_privativa_total"] = df["quantidade"] * df["area_privativa"]
+    return _registros(df)
+
+def premissas_da_sessao(info):
+    """
+    Premissas de cálculo (ver orcamento.core.cenarios) do projeto carregado,
+    com os pavimentos, etapas e custos de administração editados na sessão,
+    como no cálculo da página de resultados.
+    """
+    dados = dict(info)
+    for key in ('pavimentos', 'etapas_percentuais', 'custos_indiretos_obra', 'duracao_obra'):
+        if key in st.session_state:
+            dados[key] = st.session_state[key]
+    return Premissas.from_projeto(dados)
+
+def resultado_da_sessao(info):
+    """
+    ResultadoProjeto (ver orcamento.core.resultado) do projeto carregado, com
+    os pavimentos, unidades, percentuais indiretos e custos de administração
+    editados na sessão. Os nós do grafo são memoizados no processo, de modo
+    que as páginas compartilham os valores já calculados e uma alteração só
+    recalcula os nós que dependem dela.
+    """
+    dados = dict(info)
+    for key in ('pavimentos', 'unidades', 'custos_indiretos_percentuais', 'custos_indiretos_obra', 'duracao_obra'):
+        if key in st.session_state:
+            dados[key] = st.session_state[key]
+    return ResultadoProjeto.from_projeto(dados)
+
+def render_estatisticas_calculo():
+    """
+    Tempo e taxa de acertos no cache de cada nó do grafo de cálculo e número
+    de execuções de cada página na sessão, na barra lateral.
+    """
+    with st.sidebar.expander("⏱️ Desempenho do Cálculo"):
+        execucoes = st.session_state.get("execucoes_paginas", {})
+        st.caption("Execuções nesta sessão: " + ", ".join(f"{pagina.removeprefix('sidebar_')} {n}" for pagina, n in execucoes.items()))
+        tempos = st.session_state.get("tempos_execucao", {})
+        if tempos:
+            st.caption("Fragmentos: " + ", ".join(f"{nome} {t['execucoes']}× (última {t['ultima_ms']:.0f} ms)" for nome, t in tempos.items()))
+        st.dataframe(pd.DataFrame([
+            {"Nó": nome, "Avaliações": e.avaliacoes, "Acertos (%)": e.taxa_acertos * 100,
+             "Tempo médio (ms)": e.tempo_medio * 1000, "Último (ms)": e.tempo_ultimo * 1000}
+            for nome, e in GRAFO_PROJETO.estatisticas.items()
+        ]), hide_index=True, use_container_width=True, column_config={
+            "Acertos (%)": st.column_config.NumberColumn(format="%.0f%%"),
+            "Tempo médio (ms)": st.column_config.NumberColumn(format="%.3f"),
+            "Último (ms)": st.column_config.NumberColumn(format="%.3f"),
+        })
+
+def cronograma_da_sessao(info):
+    """
+    Cronograma físico-financeiro (ver orcamento.core.cronograma) do projeto
+    carregado, com as janelas e a curva gravadas em info['cronograma'].
+    """
+    config = info.get('cronograma', {})
+    return cronograma_de_premissas(premissas_da_sessao(info), config.get('janelas'), config.get('curva', 's'))
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def analise_de_sensibilidade(chave, variacao, usar_faixas, _premissas):
+    """
+    analisar_sensibilidade com cache por premissas (chave = Premissas.chave()),
+    compartilhado entre páginas e sessões.
+    """
+    return analisar_sensibilidade(_premissas, variacao, usar_faixas)
 
 # Cria uma classe para gerenciar o projeto
 class ProjectManager:
     """
-    Gerencia a persistência de dados de projetos em arquivos JSON.
+    Gerencia a persistência de dados de projetos. O armazenamento é delegado
+    a um backend (SQLite por padrão, ver storage.py), envolvido por um cache
+    de leitura invalidado pelo mtime dos arquivos.
     """
-    def __init__(self, path):
+    def __init__(self, path=JSON_PATH, storage=None):
         self.path = path
-        self.init_storage()
         # Adicionando o caminho do histórico como atributo da classe
         self.HISTORICO_DIRETO_PATH = HISTORICO_DIRETO_PATH
         self.HISTORICO_INDIRETO_PATH = HISTORICO_INDIRETO_PATH
+        self.storage = CachedStorage(storage if storage is not None else SQLiteStorage(DB_PATH))
+        # (data_version, DataFrame, {id: version}) do último cálculo do portfólio
+        self._portfolio = None
+        self.init_storage()
 
     def init_storage(self):
-        """Inicializa o arquivo de armazenamento se ele não existir."""
-        if not os.path.exists(self.path):
-            with open(self.path, "w", encoding="utf-8") as f:
-                json.dump([], f, ensure_ascii=False, indent=4)
-        if not os.path.exists(HISTORICO_DIRETO_PATH):
-            with open(HISTORICO_DIRETO_PATH, "w", encoding="utf-8") as f:
-                json.dump([], f, ensure_ascii=False, indent=4)
-        if not os.path.exists(HISTORICO_INDIRETO_PATH):
-            with open(HISTORICO_INDIRETO_PATH, "w", encoding="utf-8") as f:
-                json.dump([], f, ensure_ascii=False, indent=4)
+        """
+        Inicializa o armazenamento. Na primeira execução de um backend novo,
+        importa os arquivos JSON legados, se existirem, e migra em lote os
+        projetos gravados em versões antigas do esquema.
+        """
+        created = self.storage.init_storage()
+        if created and not isinstance(self.storage.backend, JsonStorage):
+            import_from_json(self.storage, self.path, {"direto": HISTORICO_DIRETO_PATH, "indireto": HISTORICO_INDIRETO_PATH})
+        if self.storage.get_meta("schema_version", 0) < SCHEMA_VERSION:
+            migrate_store(self.storage)
+        # Resumo da última migração de esquema (None se nenhuma foi necessária)
+        self.migration_summary = self.storage.get_meta("ultima_migracao")
 
     def load_json(self, path=None):
-        """Carrega dados de um arquivo JSON."""
+        """
+        Carrega dados de um arquivo. Aceita JSON ou os formatos binários de
+        serialization.py, detectados pelo conteúdo.
+        """
         _path = path if path else self.path
-        if not os.path.exists(_path):
-            return []
-        with open(_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return load_file(_path, [])
 
     def save_json(self, data, path=None):
-        """Salva dados em um arquivo JSON."""
+        """Salva dados em um arquivo, no formato indicado pela extensão (.json, .msgpack, .gz)."""
         _path = path if path else self.path
-        with open(_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        atomic_write_json(_path, data)
 
     def list_projects(self):
         """Lista todos os projetos salvos."""
-        return self.load_json()
+        return self.storage.list_projects()
+
+    def list_project_summaries(self):
+        """Lista apenas id, nome e data de criação dos projetos (sem carregá-los por inteiro)."""
+        return self.storage.list_summaries()
 
     def save_project(self, info):
-        """Salva ou atualiza um projeto."""
-        projs = self.load_json()
-        if info.get("id"):
-            projs = [p if p["id"] != info["id"] else info for p in projs]
-        else:
-            pid = (max(p["id"] for p in projs) + 1) if projs else 1
-            info["id"] = pid
-            info["created_at"] = datetime.utcnow().isoformat()
-            projs.append(info)
-        self.save_json(projs)
+        """
+        Salva ou atualiza um projeto. Levanta ConflictError se outra sessão
+        tiver salvo o projeto depois que ele foi carregado.
+        """
+        info.setdefault("schema_version", SCHEMA_VERSION)
+        self.storage.save_project(info)
 
     def load_project(self, pid):
-        """Carrega um projeto específico pelo ID."""
-        project_data = next((p for p in self.load_json() if p["id"] == pid), None)
-        if not project_data:
-            return None
-        
-        # Converte formatos antigos para os novos se necessário
-        if 'etapas_percentuais' in project_data:
-            etapas = project_data['etapas_percentuais']
-            if isinstance(etapas, dict) and etapas and isinstance(list(etapas.values())[0], (int, float)):
-                project_data['etapas_percentuais'] = {k: {"percentual": v, "fonte": "Manual"} for k, v in etapas.items()}
-        if 'custos_indiretos_percentuais' in project_data:
-            custos = project_data['custos_indiretos_percentuais']
-            if isinstance(custos, dict) and custos and isinstance(list(custos.values())[0], (int, float)):
-                project_data['custos_indiretos_percentuais'] = {k: {"percentual": v, "fonte": "Manual"} for k, v in custos.items()}
-        if 'unidades' not in project_data:
-            project_data['unidades'] = []
-            
-        return project_data
+        """
+        Carrega um projeto específico pelo ID. Os formatos antigos já foram
+        convertidos pela migração em lote (ver schema.py); upgrade_project só
+        converte aqui um registro que ela não tenha conseguido atualizar.
+        """
+        info = self.storage.get_project(pid)
+        return upgrade_project(info) if info is not None else None
 
     def delete_project(self, pid):
         """Deleta um projeto pelo ID."""
-        projs = [p for p in self.load_json() if p["id"] != pid]
-        self.save_json(projs)
+        self.storage.delete_project(pid)
 
-# Instância única do ProjectManager no estado da sessão
-if 'project_manager' not in st.session_state:
-    st.session_state.project_manager = ProjectManager(JSON_PATH)
+    def project_history(self, pid):
+        """
+        Lista as versões gravadas do projeto (mais recente primeiro), ou uma
+        lista vazia se o backend não mantiver log de alterações.
+        """
+        try:
+            return self.storage.project_history(pid)
+        except NotImplementedError:
+            return []
+
+    def load_project_at(self, pid, version):
+        """Reconstrói o projeto como estava em uma versão anterior."""
+        return upgrade_project(self.storage.load_project_at(pid, version))
+
+    def list_historico(self, tipo_custo):
+        """Lista as entradas do histórico de custos ('direto' ou 'indireto')."""
+        return self.storage.list_historico(tipo_custo)
+
+    def add_historico(self, tipo_custo, entrada):
+        """Acrescenta uma entrada ao histórico de custos."""
+        return self.storage.add_historico(tipo_custo, entrada)
+
+    def portfolio(self):
+        """
+        Resultado financeiro (VGV, custos, lucro, margem) de todos os projetos
+        gravados, em um DataFrame com uma linha por projeto, ordenado pelo id.
+        É reaproveitado enquanto o armazenamento não mudar; quando muda, só os
+        projetos com outra versão são relidos e recalculados. O DataFrame é
+        compartilhado entre as sessões e não deve ser modificado.
+        """
+        token = self.storage.data_version("projects", "list")
+        cached = self._portfolio
+        if cached is not None and cached[0] == token:
+            return cached[1]
+        versions = self.storage.project_versions()
+        alterados = [pid for pid, v in versions.items() if cached is None or cached[2].get(pid) != v]
+        if cached is None or len(alterados) > len(versions) // 2:
+            portfolio_df = pd.DataFrame(calcular_portfolio(self.list_projects()).as_columns())
+        else:
+            mantidos = cached[1][cached[1]["id"].isin(versions.keys()) & ~cached[1]["id"].isin(alterados)]
+            projetos = [p for p in map(self.storage.get_project, alterados) if p is not None]
+            portfolio_df = mantidos
+            if projetos:
+                portfolio_df = pd.concat([mantidos, pd.DataFrame(calcular_portfolio(projetos).as_columns())], ignore_index=True)
+        portfolio_df = portfolio_df.sort_values("id", ignore_index=True)
+        self._portfolio = (token, portfolio_df, versions)
+        return portfolio_df
+
+    def cache_stats(self):
+        """Contadores de acertos/falhas do cache de leitura."""
+        return self.storage.cache_stats()
+
+@st.cache_resource
+def get_project_manager():
+    """
+    Instância única do ProjectManager, compartilhada por todas as sessões
+    do processo do servidor (e, com ela, o cache de leitura).
+    """
+    return ProjectManager(JSON_PATH)
 
 def save_to_historico(info, tipo_custo):
     """Salva os custos de um projeto no histórico."""
-    path = HISTORICO_DIRETO_PATH if tipo_custo == 'direto' else HISTORICO_INDIRETO_PATH
     session_key = 'etapas_percentuais' if tipo_custo == 'direto' else 'custos_indiretos_percentuais'
-    historico = st.session_state.project_manager.load_json(path)
     percentuais = {k: v['percentual'] for k, v in info[session_key].items()}
-    nova_entrada = { "id": (max(p["id"] for p in historico) + 1) if historico else 1, "nome": info["nome"],
-        "data": datetime.now().strftime("%Y-%m-%d"), "percentuais": percentuais }
-    historico.append(nova_entrada)
-    st.session_state.project_manager.save_json(historico, path)
+    nova_entrada = { "nome": info["nome"], "data": datetime.now().strftime("%Y-%m-%d"), "percentuais": percentuais }
+    get_project_manager().add_historico(tipo_custo, nova_entrada)
     st.toast(f"Custos {tipo_custo} de '{info['nome']}' arquivados no histórico!", icon="📚")
 
 def render_metric_card(title, value, color="#31708f", icon="bi-cash-coin"):
@@ -302,43 +410,81 @@ def render_metric_card(title, value, color="#31708f", icon="bi-cash-coin"):
     </div>
     """
 
-def handle_percentage_redistribution(session_key, constants_dict):
+def handle_percentage_redistribution(session_key, constants_dict, editados=None):
     """
-    Lida com a redistribuição de porcentagens entre os itens.
+    Lida com a redistribuição de porcentagens entre os itens, em uma única
+    passada e sem st.rerun (ver orcamento.core.redistribuicao).
+
+    'editados' é {item: novo percentual}; sem ele, são considerados editados
+    todos os itens que mudaram desde a última redistribuição. Os demais
+    itens são ajustados em proporção aos valores anteriores, dentro das
+    faixas (mínimo, padrão, máximo) de 'constants_dict', para que o total
+    seja 100. Devolve {item: percentual}.
     """
     previous_key = f"previous_{session_key}"
-    if previous_key not in st.session_state:
-        st.session_state[previous_key] = {k: v.copy() for k, v in st.session_state[session_key].items()}
-    
-    current, previous = st.session_state[session_key], st.session_state[previous_key]
-    if current == previous:
-        return
-
-    changed_item_key = None
-    for k, v in current.items():
-        if v.get('percentual', 0) != previous.get(k, {}).get('percentual', 0):
-            changed_item_key = k
-            break
-    
-    if not changed_item_key:
-        return
-        
-    delta = current[changed_item_key]['percentual'] - previous[changed_item_key]['percentual']
-    total_others = sum(v['percentual'] for k, v in previous.items() if k != changed_item_key)
-    
-    # Se o total dos outros itens for 0, não há como redistribuir
-    if total_others <= 0:
-        st.session_state[previous_key] = {k: v.copy() for k, v in current.items()}
-        return
-
-    for item, values in current.items():
-        if item != changed_item_key:
-            min_val, _, max_val = constants_dict[item]
-            proportion = previous[item]['percentual'] / total_others
-            new_percent = values['percentual'] - (delta * proportion)
-            current[item]['percentual'] = max(min_val, min(new_percent, max_val))
-            
+    current = st.session_state[session_key]
+    previous = st.session_state.get(previous_key) or {k: v.copy() for k, v in current.items()}
+    if editados is None:
+        editados = {k: v.get('percentual', 0) for k, v in current.items() if v.get('percentual', 0) != previous.get(k, {}).get('percentual', 0)}
+    if editados:
+        anteriores = {k: previous.get(k, v).get('percentual', 0) for k, v in current.items()}
+        novos = redistribuir(
+            {**anteriores, **editados}, {k: (vals[0], vals[2]) for k, vals in constants_dict.items()}, editados, anteriores,
+        )
+        for item, percentual in novos.items():
+            current[item]['percentual'] = percentual
     st.session_state[previous_key] = {k: v.copy() for k, v in current.items()}
+    return {k: v['percentual'] for k, v in current.items()}
+
+def registrar_execucao(pagina):
+    """Conta as execuções do script de cada página na sessão (ver render_estatisticas_calculo)."""
+    execucoes = st.session_state.setdefault("execucoes_paginas", {})
+    execucoes[pagina] = execucoes.get(pagina, 0) + 1
+
+# Widgets dos editores de percentuais e custos, cujo estado é aplicado aos
+# dados no início de cada execução (ver as páginas 2 a 4)
+PREFIXOS_WIDGETS_EDITORES = ("slider_etapa_", "input_etapa_", "custo_percentual_", "custo_mensal_", "duracao_obra_slider")
+
+def chaves_widgets_editores():
+    """
+    Chaves de sessão dos widgets dos editores. Devem ser apagadas junto com
+    os dados que editam, para que o valor antigo de um widget não seja
+    aplicado sobre os dados recarregados.
+    """
+    return [key for key in st.session_state if isinstance(key, str) and key.startswith(PREFIXOS_WIDGETS_EDITORES)]
+
+def medir_execucao(nome):
+    """
+    Decorador que conta as execuções da função (em geral um fragmento) e
+    guarda a duração da última em st.session_state['tempos_execucao'][nome],
+    em ms (ver render_estatisticas_calculo).
+    """
+    def decorar(func):
+        @functools.wraps(func)
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tempos = st.session_state.setdefault("tempos_execucao", {})
+                anterior = tempos.get(nome, {"execucoes": 0})
+                tempos[nome] = {"execucoes": anterior["execucoes"] + 1, "ultima_ms": (time.perf_counter() - inicio) * 1000}
+        return medida
+    return decorar
+
+def restore_project_version(pid, version):
+    """
+    Carrega na sessão o projeto como estava em 'version'. A restauração só é
+    gravada (como uma nova versão) quando o usuário salvar o projeto.
+    """
+    pm = get_project_manager()
+    restaurado = pm.load_project_at(pid, version)
+    restaurado["version"] = pm.load_project(pid)["version"]
+    keys_to_reset = ["pavimentos", "unidades", "etapas_percentuais", "previous_etapas_percentuais", "custos_indiretos_percentuais",
+                     "previous_custos_indiretos_percentuais", "custos_indiretos_obra", "duracao_obra", "preco_medio_venda_m2", "custo_direto_ajustado", "simulacao"]
+    for key in keys_to_reset + chaves_widgets_editores():
+        if key in st.session_state: del st.session_state[key]
+    st.session_state.projeto_info = restaurado
     st.rerun()
 
 def render_sidebar(form_key):
@@ -346,6 +492,7 @@ def render_sidebar(form_key):
     Renderiza a barra lateral com as opções do projeto.
     """
     st.sidebar.title("Estudo de Viabilidade")
+    registrar_execucao(form_key)
     
     if "projeto_info" in st.session_state:
         info = st.session_state.projeto_info
@@ -354,8 +501,11 @@ def render_sidebar(form_key):
         
         # Botão para salvar
         if st.sidebar.button("💾 Salvar Todas as Alterações", use_container_width=True, type="primary"):
-            st.session_state.project_manager.save_project(st.session_state.projeto_info)
-            st.sidebar.success("Projeto salvo com sucesso!")
+            try:
+                get_project_manager().save_project(st.session_state.projeto_info)
+                st.sidebar.success("Projeto salvo com sucesso!")
+            except ConflictError:
+                st.sidebar.error("O projeto foi alterado em outra sessão. Recarregue-o antes de salvar para não sobrescrever essas alterações.")
         
         # Botões de arquivamento no histórico
         with st.sidebar.expander("📚 Arquivar no Histórico"):
@@ -364,10 +514,22 @@ def render_sidebar(form_key):
             if st.button("Arquivar Custos Indiretos", use_container_width=True):
                 save_to_historico(info, 'indireto')
         
+        # Restauração de uma versão gravada anteriormente
+        versoes = get_project_manager().project_history(info["id"]) if info.get("id") else []
+        if len(versoes) > 1:
+            with st.sidebar.expander("🕒 Versões Salvas"):
+                opcoes = {
+                    f"v{v['version']} – {datetime.fromisoformat(v['created_at']).strftime('%d/%m/%Y %H:%M') if v['created_at'] else '-'}": v['version']
+                    for v in versoes
+                }
+                escolha = st.selectbox("Versão", list(opcoes), key=f"versao_{form_key}")
+                if st.button("Restaurar Versão", use_container_width=True, key=f"restaurar_{form_key}"):
+                    restore_project_version(info["id"], opcoes[escolha])
+
         # Botão para mudar de projeto
         if st.sidebar.button("Mudar de Projeto", use_container_width=True):
-            keys_to_delete = ["projeto_info", "pavimentos", "etapas_percentuais", "previous_etapas_percentuais", "custos_indiretos_percentuais", "previous_custos_indiretos_percentuais", "preco_medio_venda_m2", "custo_direto_ajustado", "ai_analysis"]
-            for key in keys_to_delete:
+            keys_to_delete = ["projeto_info", "pavimentos", "etapas_percentuais", "previous_etapas_percentuais", "custos_indiretos_percentuais", "previous_custos_indiretos_percentuais", "preco_medio_venda_m2", "custo_direto_ajustado", "ai_analysis", "simulacao"]
+            for key in keys_to_delete + chaves_widgets_editores():
                 if key in st.session_state: del st.session_state[key]
             st.switch_page("Início.py")
     else:
@@ -378,301 +540,14 @@ def render_sidebar(form_key):
 
 def generate_pdf_report(info, vgv_total, valor_total_despesas, lucratividade_valor, lucratividade_percentual,
                        custo_direto_total, custo_indireto_calculado, custo_terreno_total, area_construida_total,
-                       custos_config, custos_indiretos_percentuais, pavimentos_df, custo_indireto_obra_total):
+                       custos_config, custos_indiretos_percentuais, pavimentos_df, custo_indireto_obra_total, cronograma=None):
     """
-    Gera um relatório PDF detalhado do projeto.
+    Gera um relatório PDF detalhado do projeto. Se 'cronograma' for dado
+    (ver cronograma_da_sessao), inclui o cronograma físico-financeiro mensal.
+    O HTML, a renderização sem rede e o cache dos PDFs estão em relatorio.py.
     """
-    def create_html_card(title, value, color):
-        return f"""
-        <td style="background-color: {color}; color: white; border-radius: 8px; padding: 15px; text-align: center; width: 25%;">
-            <div style="font-size: 16px; font-weight: bold; margin-bottom: 5px;">{title}</div>
-            <div style="font-size: 16px; font-weight: bold;">{value}</div>
-        </td>
-        """
-    
-    # Gerar os dados para a seção de Composição do Custo Total
-    composicao_custos = [
-        ("Custo Direto", custo_direto_total, '#2ca02c'),
-        ("Custo Indireto (Venda)", custo_indireto_calculado, '#1f77b4'),
-        ("Custo Indireto (Obra)", custo_indireto_obra_total, '#6f42c1'),
-        ("Custo do Terreno", custo_terreno_total, '#ff7f0e')
-    ]
-    
-    total_custos_composicao = sum(c[1] for c in composicao_custos)
-    
-    tabela_composicao_html = ""
-    for label, valor, cor in composicao_custos:
-        percentual = (valor / total_custos_composicao) * 100 if total_custos_composicao > 0 else 0
-        tabela_composicao_html += f"""
-        <td style="background-color: {cor}; color: white; border-radius: 8px; padding: 15px; text-align: center; width: 25%;">
-            <div style="font-size: 14px; font-weight: bold; margin-bottom: 5px;">{label} ({percentual:.1f}%)</div>
-            <div style="font-size: 18px; font-weight: bold;">R$ {fmt_br(valor)}</div>
-        </td>
-        """
-        
-    # Inicializa as variáveis para evitar NameError
-    tabela_pavimentos_html = ""
-    tabela_etapas_html = ""
-    tabela_custos_indiretos_html = ""
-    
-    # Criar tabela de detalhamento dos pavimentos
-    if not pavimentos_df.empty:
-        # Calcular os somatórios
-        total_area = pavimentos_df["area"].sum()
-        total_area_eq = pavimentos_df["area_eq"].sum()
-        total_area_constr = pavimentos_df["area_constr"].sum()
-        
-        for index, row in pavimentos_df.iterrows():
-            tabela_pavimentos_html += f"""
-            <tr>
-                <td>{row['nome']}</td>
-                <td>{row['tipo']}</td>
-                <td style="text-align: center;">{row['rep']}</td>
-                <td style="text-align: right;">{row['coef']:.2f}</td>
-                <td style="text-align: right;">{fmt_br(row['area'])} m²</td>
-                <td style="text-align: right;">{fmt_br(row['area_eq'])} m²</td>
-                <td style="text-align: right;">{fmt_br(row['area_constr'])} m²</td>
-            </tr>
-            """
-        # Adiciona a linha de total
-        tabela_pavimentos_html += f"""
-        <tr style="font-weight: bold; background-color: #f2f2f2;">
-            <td colspan="4">Total</td>
-            <td style="text-align: right;">{fmt_br(total_area)} m²</td>
-            <td style="text-align: right;">{fmt_br(total_area_eq)} m²</td>
-            <td style="text-align: right;">{fmt_br(total_area_constr)} m²</td>
-        </tr>
-        """
-    
-    # Criar tabela de custos por etapa da obra
-    if info.get('etapas_percentuais'):
-        total_custo_etapas = 0
-        total_percentual_etapas = 0
-        for etapa, (min_val, default_val, max_val) in ETAPAS_OBRA.items():
-            percentual = info['etapas_percentuais'].get(etapa, {}).get('percentual', 0)
-            custo = custo_direto_total * (float(percentual) / 100)
-            tabela_etapas_html += f"""
-            <tr>
-                <td>{etapa}</td>
-                <td style="text-align: right;">{percentual:.2f}%</td>
-                <td style="text-align: right;">R$ {fmt_br(custo)}</td>
-            </tr>
-            """
-            total_custo_etapas += custo
-            total_percentual_etapas += percentual
-        # Adiciona a linha de total
-        tabela_etapas_html += f"""
-        <tr style="font-weight: bold; background-color: #f2f2f2;">
-            <td>Total</td>
-            <td style="text-align: right;">{total_percentual_etapas:.2f}%</td>
-            <td style="text-align: right;">R$ {fmt_br(total_custo_etapas)}</td>
-        </tr>
-        """
-    
-    # Criar tabela de custos indiretos
-    if custos_indiretos_percentuais:
-        total_custo_indireto = 0
-        total_percentual_indireto = 0
-        for item, values in custos_indiretos_percentuais.items():
-            percentual = values.get('percentual', 0)
-            custo = vgv_total * (float(percentual) / 100)
-            tabela_custos_indiretos_html += f"""
-            <tr>
-                <td>{item}</td>
-                <td style="text-align: right;">{percentual:.2f}%</td>
-                <td style="text-align: right;">R$ {fmt_br(custo)}</td>
-            </tr>
-            """
-            total_custo_indireto += custo
-            total_percentual_indireto += percentual
-        # Adiciona a linha de total
-        tabela_custos_indiretos_html += f"""
-        <tr style="font-weight: bold; background-color: #f2f2f2;">
-            <td>Total</td>
-            <td style="text-align: right;">{total_percentual_indireto:.2f}%</td>
-            <td style="text-align: right;">R$ {fmt_br(total_custo_indireto)}</td>
-        </tr>
-        """
-    
-    relacao_ac_priv = area_construida_total / info.get('area_privativa', 1) if info.get('area_privativa', 1) > 0 else 0
-    
-    html_string = f"""
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">
-        <style>
-            @page {{
-                size: A4;
-                margin: 1.5cm;
-                @top-center {{
-                    content: "Relatório de Viabilidade - {info.get('nome', 'N/A')}";
-                    font-family: 'Roboto', sans-serif;
-                    font-size: 14px;
-                    color: #888;
-                }}
-                @bottom-right {{
-                    content: "Página " counter(page) " de " counter(pages);
-                    font-family: 'Roboto', sans-serif;
-                    font-size: 10px;
-                    color: #888;
-                }}
-            }}
-            body {{
-                font-family: 'Roboto', sans-serif;
-                color: #333;
-            }}
-            .cover-page {{
-                height: 100%;
-                display: flex;
-                flex-direction: column;
-                justify-content: center;
-                align-items: center;
-                text-align: center;
-                page-break-after: always;
-            }}
-            .cover-page h1 {{
-                font-size: 36px;
-                color: #1a5276;
-                margin-bottom: 20px;
-            }}
-            .cover-page h2 {{
-                font-size: 28px;
-                color: #1f618d;
-                margin-bottom: 40px;
-            }}
-            .cover-page p {{
-                font-size: 16px;
-                color: #555;
-            }}
-            .page-break {{
-                page-break-before: always;
-            }}
-            h2.section-title {{
-                color: #1f618d;
-                border-bottom: 2px solid #aed6f1;
-                padding-bottom: 5px;
-                margin-top: 30px;
-                margin-bottom: 20px;
-            }}
-            table.card-container {{
-                width: 100%;
-                border-spacing: 10px;
-                margin-bottom: 20px;
-            }}
-            table.data-table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-top: 20px;
-            }}
-            table.data-table th, table.data-table td {{
-                border: 1px solid #ddd;
-                padding: 8px;
-                text-align: left;
-            }}
-            table.data-table th {{
-                background-color: #f2f2f2;
-                font-weight: bold;
-                font-size: 11px;
-            }}
-            table.data-table td {{
-                font-size: 10px;
-            }}
-            table.data-table tbody tr:nth-child(odd) {{
-                background-color: #f9f9f9;
-            }}
-            table.data-table tbody tr:hover {{
-                background-color: #f1f1f1;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="cover-page">
-            <h1>Relatório de Viabilidade de Empreendimento</h1>
-            <h2>{info.get('nome', 'N/A')}</h2>
-            <p>Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}</p>
-        </div>
-        
-        <h2 class="section-title">Resumo Financeiro e de Área</h2>
-        <table class="card-container">
-            <tr>
-                {create_html_card("VGV Total", f"R$ {fmt_br(vgv_total)}", "#00829d")}
-                {create_html_card("Custo Total", f"R$ {fmt_br(valor_total_despesas)}", "#6a42c1")}
-                {create_html_card("Lucro Bruto", f"R$ {fmt_br(lucratividade_valor)}", "#3c763d")}
-                {create_html_card("Margem de Lucro", f"{lucratividade_percentual:.2f}%", "#a94442")}
-            </tr>
-        </table>
-        
-        <h2 class="section-title">Dados de Área e Venda</h2>
-        <table class="card-container">
-            <tr>
-                {create_html_card("Área Privativa", f"{fmt_br(info.get('area_privativa', 0))} m²", "#1f77b4")}
-                {create_html_card("Área Construída", f"{fmt_br(area_construida_total)} m²", "#ff7f0e")}
-                {create_html_card("Preço Venda / m²", f"R$ {fmt_br(custos_config.get('preco_medio_venda_m2', 0))}", "#2ca02c")}
-                {create_html_card("Relação AC/AP", f"{relacao_ac_priv:.2f}", "#d62728")}
-            </tr>
-        </table>
-
-        <h2 class="section-title">Composição do Custo Total</h2>
-        <table class="card-container">
-            <tr>
-                {create_html_card(f"Custo Direto ({custo_direto_total / valor_total_despesas * 100 if valor_total_despesas > 0 else 0:.2f}%)", f"R$ {fmt_br(custo_direto_total)}", "#31708f")}
-                {create_html_card(f"Indiretos Venda ({custo_indireto_calculado / valor_total_despesas * 100 if valor_total_despesas > 0 else 0:.2f}%)", f"R$ {fmt_br(custo_indireto_calculado)}", "#8a6d3b")}
-                {create_html_card(f"Indiretos Obra ({custo_indireto_obra_total / valor_total_despesas * 100 if valor_total_despesas > 0 else 0:.2f}%)", f"R$ {fmt_br(custo_indireto_obra_total)}", "#6f42c1")}
-                {create_html_card(f"Custo do Terreno ({custo_terreno_total / valor_total_despesas * 100 if valor_total_despesas > 0 else 0:.2f}%)", f"R$ {fmt_br(custo_terreno_total)}", "#ff7f0e")}
-            </tr>
-        </table>
-
-        <div class="page-break"></div>
-        <h2 class="section-title">Detalhamento dos Pavimentos</h2>
-        <table class="data-table">
-            <thead>
-                <tr>
-                    <th style="width: 10%;">Nome</th>
-                    <th style="width: 32.50%;">Tipo</th>
-                    <th style="width: 4%; text-align: center;">Rep.</th>
-                    <th style="width: 4%; text-align: right;">Coef.</th>
-                    <th style="width: 14.75%; text-align: right;">Área (m²)</th>
-                    <th style="width: 18.00%; text-align: right;">Área Eq. Total (m²)</th>
-                    <th style="width: 16.75%; text-align: right;">Área Constr. (m²)</th>
-                </tr>
-            </thead>
-            <tbody>
-                {tabela_pavimentos_html}
-            </tbody>
-        </table>
-        
-        <div class="page-break"></div>
-        <h2 class="section-title">Custo Direto por Etapa da Obra</h2>
-        <table class="data-table">
-            <thead>
-                <tr>
-                    <th>Etapa</th>
-                    <th style="text-align: right;">Percentual (%)</th>
-                    <th style="text-align: right;">Custo (R$)</th>
-                </tr>
-            </thead>
-            <tbody>
-                {tabela_etapas_html}
-            </tbody>
-        </table>
-
-        <div class="page-break"></div>
-        <h2 class="section-title">Detalhamento dos Custos Indiretos</h2>
-        <table class="data-table">
-            <thead>
-                <tr>
-                    <th>Item</th>
-                    <th style="text-align: right;">Percentual (%)</th>
-                    <th style="text-align: right;">Custo (R$)</th>
-                </tr>
-            </thead>
-            <tbody>
-                {tabela_custos_indiretos_html}
-            </tbody>
-        </table>
-
-    </body>
-    </html>
-    """
-    return HTML(string=html_string).write_pdf()
+    return gerar_pdf(
+        info, vgv_total, valor_total_despesas, lucratividade_valor, lucratividade_percentual,
+        custo_direto_total, custo_indireto_calculado, custo_terreno_total, area_construida_total,
+        custos_config, custos_indiretos_percentuais, pavimentos_df, custo_indireto_obra_total, cronograma=cronograma,
+    )